@@ -0,0 +1,152 @@
+import csv
+import io
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# ---------- REGISTRO DELLE OPERAZIONI ----------
+#
+# Una riga per file toccato (conversione o rinomina), in CSV o JSON-lines a
+# seconda dell'estensione. Le righe restano in memoria e vengono scritte in
+# blocco (un write + un fsync) quando superano AUDIT_FLUSH_BYTES o quando
+# sono passati AUDIT_FLUSH_S secondi dall'ultimo flush.
+
+AUDIT_FLUSH_BYTES = 256 * 1024
+AUDIT_FLUSH_S = 2.0
+
+AUDIT_FIELDS = (
+    "run", "ts", "action", "folder", "old", "new", "key", "view", "seq",
+    "bytes_in", "bytes_out", "ms",
+)
+
+_INT_FIELDS = ("seq", "bytes_in", "bytes_out")
+
+# distingue i run avviati dallo stesso processo nello stesso secondo (GUI, test)
+_RUN_SEQ = itertools.count(1)
+
+
+class AuditSink:
+    """Registro strutturato (CSV o JSON-lines) delle operazioni di un run; thread-safe.
+
+    Si usa anche come context manager; `close()` scrive le righe rimaste.
+    Il controllo sul tempo avviene a ogni nuova riga.
+    """
+
+    def __init__(self, path, fmt=None, flush_bytes=AUDIT_FLUSH_BYTES, flush_s=AUDIT_FLUSH_S,
+                 run_id=None):
+        self.path = Path(path)
+        self.fmt = fmt or ("csv" if self.path.suffix.lower() == ".csv" else "jsonl")
+        self.flush_bytes = flush_bytes
+        self.flush_s = flush_s
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_RUN_SEQ)}"
+        self.rows = 0
+
+        self._lock = threading.Lock()
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf, lineterminator="\n") if self.fmt == "csv" else None
+        self._last_flush = time.monotonic()
+
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "a", encoding="utf-8", newline="")
+        if self._csv is not None and new_file:
+            self._csv.writerow(AUDIT_FIELDS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, action, folder, old, new, key=None, view=None, seq=None, bytes_in=None,
+               bytes_out=None, ms=None):
+        """Aggiunge una riga: action è "convert", "rename", "publish", "update" o "duplicate"."""
+        row = (
+            self.run_id, round(time.time(), 3), action, str(folder), old, new, key, view, seq,
+            bytes_in, bytes_out, None if ms is None else round(ms, 3),
+        )
+        with self._lock:
+            if self._csv is not None:
+                self._csv.writerow(["" if v is None else v for v in row])
+            else:
+                self._buf.write(json.dumps(dict(zip(AUDIT_FIELDS, row)), ensure_ascii=False) + "\n")
+            self.rows += 1
+            if (self._buf.tell() >= self.flush_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_s):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        data = self._buf.getvalue()
+        if not data:
+            return
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._flush_locked()
+            self._file.close()
+
+
+class DeferredAudit:
+    """Tiene da parte le righe per un AuditSink finché release() non le scrive.
+
+    In modalità staged (vedi staging.py) le operazioni finiscono nel
+    registro solo dopo la pubblicazione, quando sono davvero avvenute.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._rows = []
+        self._lock = threading.Lock()
+
+    def record(self, *args, **kwargs):
+        with self._lock:
+            self._rows.append((args, kwargs))
+
+    def release(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        for args, kwargs in rows:
+            self.sink.record(*args, **kwargs)
+
+
+def open_audit(audit):
+    """Accetta un AuditSink, un path o None; ritorna (sink, da_chiudere)."""
+    if audit is None or isinstance(audit, AuditSink):
+        return audit, False
+    return AuditSink(audit), True
+
+
+def read_audit(path):
+    """Legge un registro (CSV o JSON-lines) e genera le righe come dict, in ordine."""
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                for field in _INT_FIELDS:
+                    row[field] = int(row[field]) if row.get(field) else None
+                for field in ("ts", "ms"):
+                    row[field] = float(row[field]) if row.get(field) else None
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue  # riga troncata da un'interruzione
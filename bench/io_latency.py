@@ -0,0 +1,63 @@
+"""Throughput con latenza di rete simulata, al variare dei thread di I/O.
+
+    python bench/io_latency.py
+    python bench/io_latency.py --brand adidas --count 300 --delay-ms 5 --threads 0,4,8,16
+
+Genera una cartella sintetica (bench/shoot.py), poi per ogni valore di
+--threads ne elabora una copia con engine.run_profile(io_threads=N) dentro
+slowfs.LatencyFS e riporta secondi, immagini/s e operazioni rallentate.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from engine import run_profile  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+from shoot import DEFAULT_MIX, MODE_FORMATS, make_shoot  # noqa: E402
+from slowfs import LatencyFS  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run completo con latenza di filesystem simulata")
+    parser.add_argument("--brand", choices=sorted(PROFILES), default="nike")
+    parser.add_argument("--count", type=int, default=140, help="immagini nella cartella")
+    parser.add_argument("--size", default="400x400", help="dimensione delle immagini, LxA")
+    parser.add_argument("--delay-ms", type=float, default=3.0, help="latenza per operazione")
+    parser.add_argument("--threads", default="0,4,16", help="valori di io_threads da provare")
+    parser.add_argument("--workers", type=int, default=None, help="processi di conversione")
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.brand]
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    mix = [m for m in DEFAULT_MIX if MODE_FORMATS[m][1] in profile.extensions]
+    work_dir = Path(tempfile.mkdtemp(prefix="renamer-io-"))
+    try:
+        template = work_dir / "template"
+        make_shoot(args.brand, template, args.count, size, mix)
+
+        print(f"{'IO THREADS':>10} {'SEC':>8} {'IMG/S':>8} {'OPS FS':>8} {'SPEEDUP':>8}")
+        baseline = None
+        for threads in (int(t) for t in args.threads.split(",")):
+            folder = work_dir / f"run-{threads}"
+            shutil.copytree(template, folder)
+            with LatencyFS(delay=args.delay_ms / 1000) as fs:
+                t0 = time.perf_counter()
+                run_profile(profile, folder, workers=args.workers, io_threads=threads)
+                seconds = time.perf_counter() - t0
+            baseline = baseline or seconds
+            print(f"{threads:>10} {seconds:>8.2f} {args.count / seconds:>8.1f} {fs.total_calls:>8} "
+                  f"{baseline / seconds:>7.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Micro-benchmark: parser Nike storico (loop sui caratteri) contro NIKE.classify.
+
+    python bench/parse_names.py            # 100k nomi
+    python bench/parse_names.py 500000
+
+Controlla anche che, sui nomi che il parser storico riconosce, i risultati
+coincidano (a parte le varianti nuove: dettagli PHSYD_002 / PHSYD-002).
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from profiles import NIKE, VIEW_ORDER  # noqa: E402
+
+
+def legacy_parse_filename(path: Path):
+    """Copia del parse_filename originale, solo per confronto."""
+    name = path.stem
+    parts = name.split("_")
+    if len(parts) < 3:
+        return None
+
+    article_code = parts[1]
+    ph_part = parts[2]
+
+    if not article_code or not ph_part.startswith("PH"):
+        return None
+
+    view_code = ph_part[:5]
+    rest = ph_part[5:]
+
+    seq_digits = ""
+    for ch in rest:
+        if ch.isdigit():
+            seq_digits += ch
+        elif ch == "-":
+            break
+
+    seq_num = int(seq_digits) if seq_digits.isdigit() else 0
+    return article_code, view_code, seq_num
+
+
+def nike_names(count, seed=0):
+    """Nomi Nike sintetici: per lo più AURORA standard, più qualche variante."""
+    rnd = random.Random(seed)
+    views = list(VIEW_ORDER)
+    prefixes = ["AURORA", "AURORA", "AURORA", "NIKE", "DAM"]
+    names = []
+    for _ in range(count):
+        article = f"{rnd.randrange(100000, 999999)}-{rnd.randrange(0, 999):03d}"
+        view = rnd.choice(views)
+        seq = rnd.randrange(1, 20)
+        shape = rnd.random()
+        if shape < 0.80:
+            stem = f"{rnd.choice(prefixes)}_{article}_{view}{seq:03d}-2000"
+        elif shape < 0.88:
+            stem = f"{rnd.choice(prefixes)}_{article}_{view}{seq:03d}"
+        elif shape < 0.93:
+            stem = f"AURORA_{article}_PHSYD_{seq:03d}-2000"
+        elif shape < 0.97:
+            stem = f"{article}_{view}{seq:03d}-2000"
+        else:
+            stem = f"IMG_{rnd.randrange(10000)}"
+        names.append(stem + rnd.choice((".png", ".jpg")))
+    return names
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    count = int(argv[0]) if argv else 100_000
+    names = nike_names(count)
+
+    legacy, t_legacy = timed(lambda ns: [legacy_parse_filename(Path(n)) for n in ns], names)
+    legacy_str, t_legacy_str = timed(
+        lambda ns: [legacy_parse_filename(_Stem(n)) for n in ns], names
+    )
+    results, t_new = timed(NIKE.classify, names)
+
+    mismatches = 0
+    variants = {}
+    for old, new in zip(legacy, results):
+        if new is not None:
+            variants[new[0]] = variants.get(new[0], 0) + 1
+        if old is not None and (new is None or (new[0] != "detail" and new[1:] != old)):
+            mismatches += 1
+
+    print(f"nomi:                  {count}")
+    print(f"storico (Path):        {t_legacy:.3f} s  ({count / t_legacy:,.0f} nomi/s)")
+    print(f"storico (solo stem):   {t_legacy_str:.3f} s  ({count / t_legacy_str:,.0f} nomi/s)")
+    print(f"NIKE.classify:         {t_new:.3f} s  ({count / t_new:,.0f} nomi/s)")
+    print(f"varianti:              {dict(sorted(variants.items()))}")
+    print(f"non riconosciuti:      {results.count(None)} (storico: {legacy.count(None)})")
+    print(f"differenze vs storico: {mismatches}")
+    return 1 if mismatches else 0
+
+
+class _Stem:
+    """Finto Path con il solo .stem, per misurare il parser senza il costo di Path()."""
+
+    __slots__ = ("stem",)
+
+    def __init__(self, name):
+        self.stem = name.rsplit(".", 1)[0]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Benchmark della pipeline su cartelle sintetiche.
+
+    python bench/run.py                                  # nike + adidas + newbalance, 140 file
+    python bench/run.py --brand nike --count 700 --size 2000x2000 --workers 4
+    python bench/run.py --compare bench/results/vecchio.json
+
+Misura separatamente scan, parse, convert e rename (più il run completo di
+engine.run_profile) e riporta immagini/s, picco di RSS e numero di syscall
+di lettura/scrittura (/proc/self/io, solo Linux). I risultati vanno in un
+file JSON (default bench/results/bench-<data>.json) da confrontare tra
+versioni con --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import PIL  # noqa: E402
+
+from converter import (  # noqa: E402
+    convert_file_timed, finalize_conversion, open_pool, resolve_workers, submit_bounded,
+)
+from engine import commit_group, run_profile  # noqa: E402
+from grouping import GroupRecord, StreamGrouper  # noqa: E402
+from profiles import PROFILES  # noqa: E402
+from scanner import scan_folder  # noqa: E402
+from shoot import DEFAULT_MIX, MODE_FORMATS, make_shoot  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _proc_io():
+    """Syscall di lettura/scrittura del processo (None fuori da Linux)."""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["syscr"]), int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux: KB, macOS: byte
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _cpu_s():
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def measure(stage, images, func):
+    """Esegue func() e ritorna (risultato, metriche della fase)."""
+    io0, cpu0 = _proc_io(), _cpu_s()
+    t0 = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - t0
+    io1, cpu1 = _proc_io(), _cpu_s()
+    metrics = {
+        "stage": stage,
+        "images": images,
+        "seconds": round(seconds, 4),
+        "images_per_s": round(images / seconds, 1) if seconds > 0 else None,
+        "cpu_s": round(cpu1 - cpu0, 3),
+        "peak_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+        "peak_rss_children_mb": _rss_mb(resource.RUSAGE_CHILDREN),
+        "syscalls_read": io1[0] - io0[0] if io0 and io1 else None,
+        "syscalls_write": io1[1] - io0[1] if io0 and io1 else None,
+    }
+    return result, metrics
+
+
+def bench_brand(brand, count, size, workers, work_dir, end_to_end=True):
+    profile = PROFILES[brand]
+    mix = [m for m in DEFAULT_MIX if MODE_FORMATS[m][1] in profile.extensions]
+    folder = work_dir / brand
+    t0 = time.perf_counter()
+    make_shoot(brand, folder, count, size, mix)
+    generated_s = time.perf_counter() - t0
+    stages = []
+
+    # ---- scan ----
+    inventory, m = measure("scan", count, lambda: scan_folder(folder))
+    stages.append(m)
+    files = inventory.files(profile.extensions)
+
+    # ---- parse ----
+    names = [f.name for f in files]
+    parsed, m = measure("parse", len(names), lambda: profile.classify(names))
+    stages.append(m)
+
+    # ---- convert ----
+    jobs = [(f.path, f.path.with_suffix(".jpg")) for f, p in zip(files, parsed)
+            if p is not None and f.suffix != ".jpg"]
+
+    def convert():
+        # stesso percorso del run (engine._run_folder): pool, budget di memoria, worker con tempi
+        errors = 0
+        with open_pool(workers, jobs=len(jobs)) as pool:
+            queued = [(i, src, dst) for i, (src, dst) in enumerate(jobs)]
+            for _, (src, dst, error, _, _) in submit_bounded(pool, queued, workers,
+                                                             worker=convert_file_timed):
+                if finalize_conversion(src, dst, error):
+                    errors += 1
+        return errors
+
+    errors, m = measure("convert", len(jobs), convert)
+    m["errors"] = errors
+    stages.append(m)
+
+    # ---- rename ----
+    converted = {dst.name for _, dst in jobs}
+    records = []
+    for f, p in zip(files, parsed):
+        if p is None:
+            continue
+        name = f.path.with_suffix(".jpg").name if f.path.with_suffix(".jpg").name in converted else f.name
+        records.append((p, name))
+
+    def rename():
+        grouper = StreamGrouper(order=profile.sort_key)
+        for (variant, key, view, seq), name in records:
+            grouper.add(GroupRecord(key, name, view, seq), variant)
+        existing = set(scan_folder(folder).names())
+        renamed = 0
+        for key, group in grouper.groups():
+            renamed += len(commit_group(profile, folder, key, group, existing).moves)
+        return renamed
+
+    renamed, m = measure("rename", len(records), rename)
+    m["renamed"] = renamed
+    stages.append(m)
+
+    # ---- run completo su una cartella nuova ----
+    if end_to_end:
+        e2e = work_dir / f"{brand}-e2e"
+        make_shoot(brand, e2e, count, size, mix)
+        summary, m = measure(
+            "end_to_end", count,
+            lambda: run_profile(profile, e2e, workers=workers, use_manifest=False),
+        )
+        m["summary"] = {k: v for k, v in summary.items() if isinstance(v, int)}
+        stages.append(m)
+
+    return {
+        "brand": brand,
+        "count": count,
+        "size": list(size),
+        "mix": mix,
+        "workers": resolve_workers(workers),
+        "generate_s": round(generated_s, 3),
+        "stages": stages,
+    }
+
+
+def _git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(current, previous):
+    """Righe di confronto images/s tra due file di risultati."""
+    old = {(r["brand"], s["stage"]): s for r in previous["runs"] for s in r["stages"]}
+    lines = [f"{'BRAND':<12} {'FASE':<11} {'PRIMA':>10} {'ORA':>10} {'Δ':>8}"]
+    for run in current["runs"]:
+        for stage in run["stages"]:
+            before = old.get((run["brand"], stage["stage"]))
+            if not before or not before.get("images_per_s") or not stage.get("images_per_s"):
+                continue
+            delta = stage["images_per_s"] / before["images_per_s"] - 1
+            lines.append(
+                f"{run['brand']:<12} {stage['stage']:<11} {before['images_per_s']:>10.1f} "
+                f"{stage['images_per_s']:>10.1f} {delta:>+8.1%}"
+            )
+    return lines
+
+
+def format_table(results):
+    lines = [f"{'BRAND':<12} {'FASE':<11} {'IMG':>6} {'SEC':>8} {'IMG/S':>9} {'RSS MB':>8} {'SYSC R/W':>14}"]
+    for run in results["runs"]:
+        for s in run["stages"]:
+            sysc = f"{s['syscalls_read']}/{s['syscalls_write']}" if s["syscalls_read"] is not None else "-"
+            lines.append(
+                f"{run['brand']:<12} {s['stage']:<11} {s['images']:>6} {s['seconds']:>8.3f} "
+                f"{s['images_per_s'] or 0:>9.1f} {s['peak_rss_mb']:>8.1f} {sysc:>14}"
+            )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark della pipeline di conversione/rinomina")
+    parser.add_argument("--brand", action="append", choices=sorted(PROFILES),
+                        help="profilo da misurare (ripetibile, default: tutti)")
+    parser.add_argument("--count", type=int, default=140, help="immagini per cartella")
+    parser.add_argument("--size", default="1500x1500", help="dimensione delle immagini, LxA")
+    parser.add_argument("--workers", type=int, default=None, help="processi di conversione")
+    parser.add_argument("--no-e2e", action="store_true", help="salta il run completo")
+    parser.add_argument("--out", default=None, help="file JSON dei risultati")
+    parser.add_argument("--compare", default=None, help="risultati precedenti da confrontare")
+    parser.add_argument("--keep", action="store_true", help="non cancella le cartelle generate")
+    args = parser.parse_args(argv)
+
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    brands = args.brand or sorted(PROFILES)
+    work_dir = Path(tempfile.mkdtemp(prefix="renamer-bench-"))
+    try:
+        runs = [bench_brand(b, args.count, size, args.workers, work_dir, not args.no_e2e)
+                for b in brands]
+    finally:
+        if args.keep:
+            print(f"cartelle generate in {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "runs": runs,
+    }
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    for line in format_table(results):
+        print(line)
+    if args.compare:
+        print()
+        for line in compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8"))):
+            print(line)
+    print(f"\nrisultati: {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Generatori di cartelle sintetiche per i benchmark.
+
+Le immagini sono "foto prodotto" finte: sfondo bianco (o trasparente) con
+una sagoma sfumata al centro, così la compressione somiglia a quella reale.
+Ogni combinazione (modo, dimensione) viene disegnata una volta sola e poi
+salvata più volte, con il nome del file stampato in un angolo.
+"""
+import random
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+# viste Nike nell'ordine usato per generare i nomi
+NIKE_VIEWS = ["PHCFH", "PHSLH", "PHSRH", "PHCBH", "PHSTH", "PHSUH", "PHSYD"]
+
+# modo → (formato, estensione) dei file generati
+MODE_FORMATS = {
+    "RGBA": ("PNG", ".png"),
+    "P": ("PNG", ".png"),
+    "RGB": ("PNG", ".png"),
+    "TIFF": ("TIFF", ".tif"),
+    "JPEG": ("JPEG", ".jpg"),
+}
+
+DEFAULT_MIX = ("RGBA", "RGBA", "P", "RGB", "TIFF", "JPEG")
+
+
+def product_image(mode, size):
+    """Sfondo neutro con una sagoma sfumata; `mode` è una chiave di MODE_FORMATS."""
+    width, height = size
+    transparent = mode == "RGBA"
+    img = Image.new("RGBA" if transparent else "RGB", size,
+                    (255, 255, 255, 0) if transparent else (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    box = (width // 6, height // 4, width * 5 // 6, height * 3 // 4)
+    draw.rounded_rectangle(box, radius=min(width, height) // 10, fill=(200, 40, 40, 255))
+    draw.ellipse((width // 3, height // 3, width * 2 // 3, height * 2 // 3), fill=(30, 30, 30, 255))
+    img = img.filter(ImageFilter.GaussianBlur(radius=max(1, min(width, height) // 200)))
+    if mode == "P":
+        return img.convert("P", palette=Image.ADAPTIVE)
+    return img
+
+
+class _Templates:
+    def __init__(self, size):
+        self.size = size
+        self._cache = {}
+
+    def get(self, mode):
+        if mode not in self._cache:
+            self._cache[mode] = product_image(mode, self.size)
+        return self._cache[mode]
+
+
+def _ink(img):
+    """Colore (o indice di palette) più scuro e opaco disponibile per il testo."""
+    if img.mode == "P":
+        palette = img.getpalette()
+        return min(range(len(palette) // 3), key=lambda i: sum(palette[i * 3:i * 3 + 3]))
+    return (0, 0, 0, 255) if img.mode == "RGBA" else (0, 0, 0)
+
+
+def _save(templates, folder, stem, mode):
+    fmt, ext = MODE_FORMATS[mode]
+    path = folder / (stem + ext)
+    # il nome stampato nell'angolo rende ogni file unico (niente doppioni per dedup.py)
+    img = templates.get(mode).copy()
+    ImageDraw.Draw(img).text((4, 4), stem, fill=_ink(img))
+    if fmt == "JPEG":
+        img.convert("RGB").save(path, "JPEG", quality=90)
+    else:
+        img.save(path, fmt)
+    return path
+
+
+def make_nike_shoot(folder, count, size=(1500, 1500), mix=DEFAULT_MIX, seed=0):
+    """`count` file AURORA_<articolo>_PH<vista><seq>-2000.<ext>, 7 viste per articolo."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    templates = _Templates(size)
+    paths = []
+    article = None
+    for i in range(count):
+        if i % len(NIKE_VIEWS) == 0:
+            article = f"{rnd.randrange(100000, 999999)}-{rnd.randrange(0, 999):03d}"
+        view = NIKE_VIEWS[i % len(NIKE_VIEWS)]
+        stem = f"AURORA_{article}_{view}{1 + i // len(NIKE_VIEWS) % 3:03d}-2000"
+        paths.append(_save(templates, folder, stem, mix[i % len(mix)]))
+    return paths
+
+
+def make_prefix_shoot(folder, count, prefix_len=6, per_prefix=6, size=(1500, 1500), mix=DEFAULT_MIX,
+                      seed=0):
+    """`count` file in stile adidas (prefix_len=6) / New Balance (7): <PREFISSO>_<n>.<ext>."""
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ0123456789"
+    templates = _Templates(size)
+    paths = []
+    prefix = None
+    for i in range(count):
+        if i % per_prefix == 0:
+            prefix = "".join(rnd.choice(alphabet) for _ in range(prefix_len))
+        stem = f"{prefix}_{i:06d}"
+        paths.append(_save(templates, folder, stem, mix[i % len(mix)]))
+    return paths
+
+
+def make_shoot(brand, folder, count, size=(1500, 1500), mix=DEFAULT_MIX, seed=0):
+    """Cartella sintetica per un profilo di profiles.PROFILES."""
+    if brand == "nike":
+        return make_nike_shoot(folder, count, size, mix, seed)
+    prefix_len = 7 if brand == "newbalance" else 6
+    return make_prefix_shoot(folder, count, prefix_len, size=size, mix=mix, seed=seed)
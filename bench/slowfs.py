@@ -0,0 +1,61 @@
+"""Filesystem "lento" per provare in locale il comportamento su SMB / NFS.
+
+    with LatencyFS(delay=0.003):
+        run_profile(NIKE, folder, io_threads=16)
+
+Dentro il blocco ogni operazione sui metadati (stat, scandir, rename,
+unlink, fsync, ...) e ogni open() del processo aspetta `delay` secondi
+prima di partire, come un giro di andata e ritorno col server. L'attesa
+è un time.sleep, quindi rilascia il GIL: più thread di I/O sovrappongono
+le attese proprio come farebbero con una share vera.
+
+I processi di conversione creati con fork dentro il blocco ereditano la
+latenza. La lettura dei dati non viene rallentata (solo l'open), quindi il
+prefetch qui si vede solo per l'header letto in anticipo.
+"""
+import builtins
+import io
+import os
+import time
+
+# (modulo, funzione) rallentati
+PATCHED = (
+    (os, "stat"), (os, "lstat"), (os, "scandir"), (os, "listdir"), (os, "rename"), (os, "replace"),
+    (os, "remove"), (os, "unlink"), (os, "mkdir"), (os, "rmdir"), (os, "fsync"),
+    (builtins, "open"), (io, "open"),
+)
+
+
+class LatencyFS:
+    """Aggiunge `delay` secondi a ogni operazione sul filesystem; conta le operazioni fatte."""
+
+    def __init__(self, delay=0.002):
+        self.delay = delay
+        self.calls = {}
+        self._saved = []
+
+    def _slow(self, name, func):
+        delay = self.delay
+        calls = self.calls
+
+        def slow(*args, **kwargs):
+            calls[name] = calls.get(name, 0) + 1
+            time.sleep(delay)
+            return func(*args, **kwargs)
+        return slow
+
+    def __enter__(self):
+        for module, name in PATCHED:
+            original = getattr(module, name)
+            self._saved.append((module, name, original))
+            setattr(module, name, self._slow(name, original))
+        return self
+
+    def __exit__(self, *exc):
+        for module, name, original in reversed(self._saved):
+            setattr(module, name, original)
+        self._saved = []
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
@@ -0,0 +1,490 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from PIL import Image
+
+from fsio import warm
+
+# qualità JPEG usata per tutte le conversioni
+JPEG_QUALITY = 95
+
+# numero di processi di default (None = tutti i core disponibili)
+DEFAULT_WORKERS = None
+
+# primi byte di ogni JPEG (SOI + inizio del primo marker)
+JPEG_MAGIC = b"\xff\xd8\xff"
+
+# memoria totale (stimata) per le conversioni contemporanee
+MEMORY_BUDGET = 2 * 1024 ** 3
+
+# sopra questa soglia l'alpha viene appiattito a strisce orizzontali
+STRIP_MIN_PIXELS = 16_000_000
+STRIP_BYTES = 64 * 1024 ** 2
+
+# derivati (formati web): nome → lato lungo in px, es. {"2000": 2000, "thumb": 300}
+DERIVATIVE_QUALITY = 90
+DERIVATIVE_RE = re.compile(r"@(?P<size>[A-Za-z0-9]+)\.jpg$", re.IGNORECASE)
+
+# sottocartella (nascosta) dove finiscono gli originali convertiti se vanno conservati
+ORIGINALS_DIR = ".renamer_originals"
+
+# i master TIFF/PNG da 100–300 MP superano il limite anti "decompression bomb" di
+# Pillow: il limite viene alzato solo mentre si aprono i nostri file (vedi
+# master_pixel_limit), il resto del processo resta protetto dal default
+MASTER_MAX_PIXELS = 400_000_000
+
+_limit_lock = threading.Lock()
+_limit_users = 0
+_saved_limit = None
+
+
+@contextmanager
+def master_pixel_limit():
+    """Alza Image.MAX_IMAGE_PIXELS a MASTER_MAX_PIXELS per la durata del blocco.
+
+    Il limite di Pillow è globale: il primo blocco aperto lo alza, l'ultimo
+    a chiudersi rimette il valore di prima (blocchi in thread diversi si
+    sovrappongono senza aspettarsi). Un limite già più alto, o disattivato,
+    non viene toccato.
+    """
+    global _limit_users, _saved_limit
+    with _limit_lock:
+        if _limit_users == 0:
+            _saved_limit = Image.MAX_IMAGE_PIXELS
+            if _saved_limit is not None and _saved_limit < MASTER_MAX_PIXELS:
+                Image.MAX_IMAGE_PIXELS = MASTER_MAX_PIXELS
+        _limit_users += 1
+    try:
+        yield
+    finally:
+        with _limit_lock:
+            _limit_users -= 1
+            if _limit_users == 0:
+                Image.MAX_IMAGE_PIXELS = _saved_limit
+
+
+def pool_context():
+    """Contesto multiprocessing dei pool di processi.
+
+    Con fork il figlio copia anche i lock tenuti in quel momento dagli
+    altri thread (thread di I/O dentro Image.open, logging...) e può
+    restare bloccato per sempre: i worker partono invece da un processo
+    pulito, forkserver dove esiste, spawn altrove (Windows, macOS).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def resolve_workers(workers=None) -> int:
+    """Ritorna il numero effettivo di processi da usare."""
+    if workers is None:
+        workers = DEFAULT_WORKERS
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def has_alpha(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """Porta l'immagine in RGB, con sfondo bianco se ha trasparenza.
+
+    Per le immagini grandi l'alpha viene appiattito a strisce: oltre al
+    sorgente si alloca solo l'RGB finale, non una copia RGBA, uno sfondo
+    e il canale alpha separato. Il picco si riduce ma non è limitato:
+    sorgente decodificato e RGB finale restano in memoria insieme.
+    """
+    if not has_alpha(img):
+        return img.convert("RGB")
+
+    width, height = img.size
+    if width * height < STRIP_MIN_PIXELS:
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        alpha = img.split()[3]
+        background.paste(img, mask=alpha)
+        return background
+
+    background = Image.new("RGB", img.size, (255, 255, 255))
+    rows = max(1, STRIP_BYTES // (width * 4))
+    for top in range(0, height, rows):
+        bottom = min(top + rows, height)
+        strip = img.crop((0, top, width, bottom)).convert("RGBA")
+        background.paste(strip, (0, top), mask=strip)
+        del strip
+    return background
+
+
+def estimate_memory(path) -> int:
+    """Byte stimati per convertire `path`: sorgente decodificato + RGB finale.
+
+    Legge solo l'header. Se il file non è leggibile ritorna 0 (l'errore
+    arriverà dal worker).
+    """
+    try:
+        with master_pixel_limit(), Image.open(path) as img:
+            width, height = img.size
+            bands = len(img.getbands())
+            depth = 2 if img.mode.startswith(("I;16", "RGB;16")) else 1
+    except Exception:
+        return 0
+    return width * height * (bands * depth + 3)
+
+
+class MemoryBudget:
+    """Controllo di ammissione sulla memoria *stimata* delle conversioni in corso.
+
+    Un job entra se ci sta nel budget, oppure se non c'è nessun altro job in
+    corso: un file più grande del budget viene comunque convertito, da solo
+    e senza nessun limite. Riduce il picco delle conversioni contemporanee,
+    non è un tetto alla memoria del processo.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = MEMORY_BUDGET if limit is None else limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self, cost) -> bool:
+        with self._cond:
+            if self.in_use and self.in_use + cost > self.limit:
+                return False
+            self.in_use += cost
+            return True
+
+    def acquire(self, cost):
+        with self._cond:
+            while self.in_use and self.in_use + cost > self.limit:
+                self._cond.wait()
+            self.in_use += cost
+
+    def release(self, cost):
+        with self._cond:
+            self.in_use -= cost
+            self._cond.notify_all()
+
+
+# budget condiviso da tutte le conversioni del processo (anche tra cartelle in parallelo)
+shared_budget = MemoryBudget()
+
+
+def _admit(budget, cost, busy) -> bool:
+    """Ammette un job: senza attendere se ci sono altri job nostri in corso, altrimenti bloccando."""
+    if busy:
+        return budget.try_acquire(cost)
+    budget.acquire(cost)
+    return True
+
+
+def is_passthrough_jpeg(path) -> bool:
+    """True se il file è già un JPEG RGB (baseline o progressive).
+
+    Legge solo i primi byte e l'header: Image.open non decodifica i pixel.
+    Questi file possono diventare .jpg con un semplice rename, senza ricodifica.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(JPEG_MAGIC)) != JPEG_MAGIC:
+                return False
+        with master_pixel_limit(), Image.open(path) as img:
+            return img.format == "JPEG" and img.mode == "RGB"
+    except Exception:
+        return False
+
+
+def passthrough_file(src, dst):
+    """Porta src a dst byte per byte (rename). Ritorna l'errore o None."""
+    try:
+        os.rename(src, dst)
+    except OSError as e:
+        return str(e)
+    return None
+
+
+def convert_file(src, dst, timings=None):
+    """Worker: decodifica src, appiattisce l'alpha e salva dst in JPEG.
+
+    Gira in un processo separato, quindi riceve e ritorna solo stringhe.
+    Ritorna (src, dst, errore) con errore None se la conversione è andata bene.
+    Se `timings` è una lista, ci aggiunge i secondi di decode, flatten ed encode.
+    """
+    try:
+        t0 = time.perf_counter()
+        with master_pixel_limit(), Image.open(src) as img:
+            img.load()
+            t1 = time.perf_counter()
+            rgb = flatten_to_rgb(img)
+            # il sorgente decodificato non serve più durante l'encode
+            img.close()
+        t2 = time.perf_counter()
+        rgb.save(dst, "JPEG", quality=JPEG_QUALITY)
+        del rgb
+        if timings is not None:
+            timings.extend((t1 - t0, t2 - t1, time.perf_counter() - t2))
+    except Exception as e:
+        # niente JPEG troncati lasciati in giro
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return src, dst, str(e)
+    return src, dst, None
+
+
+def convert_file_timed(src, dst):
+    """Come convert_file, con in più i tempi del worker.
+
+    Ritorna (src, dst, errore, secondi, fasi) dove fasi è la tupla
+    (decode, flatten, encode) in secondi, o None se la conversione è fallita.
+    """
+    t0 = time.perf_counter()
+    timings = []
+    src, dst, error = convert_file(src, dst, timings)
+    return src, dst, error, time.perf_counter() - t0, tuple(timings) if timings else None
+
+
+def is_written(dst) -> bool:
+    """True se il JPEG di destinazione esiste e non è vuoto."""
+    try:
+        return os.stat(dst).st_size > 0
+    except OSError:
+        return False
+
+
+def convert_many(jobs, workers=None, memory_budget=None):
+    """Converte una lista di coppie (src, dst) in parallelo.
+
+    I risultati tornano nello stesso ordine di `jobs`, come tuple
+    (src, dst, errore). Con un solo worker non viene creato nessun pool.
+    I job entrano nel pool solo se la loro memoria stimata sta nel budget.
+    """
+    jobs = [(str(src), str(dst)) for src, dst in jobs]
+    if not jobs:
+        return
+
+    workers = min(resolve_workers(workers), len(jobs))
+    if workers == 1:
+        for src, dst in jobs:
+            yield convert_file(src, dst)
+        return
+
+    budget = shared_budget if memory_budget is None else MemoryBudget(memory_budget)
+    with open_pool(workers) as pool:
+        in_flight = deque()
+        queued = deque(jobs)
+        while queued or in_flight:
+            while queued and len(in_flight) < workers * 2:
+                src, dst = queued[0]
+                cost = estimate_memory(src)
+                if not _admit(budget, cost, busy=bool(in_flight)):
+                    break
+                queued.popleft()
+                in_flight.append((pool.submit(convert_file, src, dst), cost))
+
+            future, cost = in_flight.popleft()
+            result = future.result()
+            budget.release(cost)
+            yield result
+
+
+def prefetch_source(src) -> int:
+    """Legge in anticipo un sorgente (cache del client di rete) e ne stima la memoria."""
+    warm(src)
+    return estimate_memory(src)
+
+
+def submit_bounded(pool, jobs, workers=None, memory_budget=None, worker=convert_file, io=None):
+    """Invia (key, src, dst) al pool rispettando il budget di memoria.
+
+    Genera (key, risultato) man mano che le conversioni finiscono, in
+    ordine di completamento; il risultato è quello di `worker`
+    (convert_file o convert_file_timed).
+    Con un `io` (fsio.IOExecutor) i prossimi sorgenti in coda vengono letti
+    in anticipo sui thread di I/O insieme all'header per la stima della
+    memoria: su una cartella di rete il worker non aspetta più la lettura.
+    """
+    max_in_flight = resolve_workers(workers) * 2
+    budget = shared_budget if memory_budget is None else MemoryBudget(memory_budget)
+    queued = deque(jobs)
+    # stime (future) dei primi job in coda, nello stesso ordine di `queued`
+    costs = deque()
+    in_flight = {}
+    while queued or in_flight:
+        if io is not None:
+            while len(costs) < min(len(queued), max_in_flight * 2):
+                costs.append(io.submit(prefetch_source, queued[len(costs)][1]))
+        while queued and len(in_flight) < max_in_flight:
+            key, src, dst = queued[0]
+            cost = costs[0].result() if costs else estimate_memory(src)
+            if not _admit(budget, cost, busy=bool(in_flight)):
+                break
+            queued.popleft()
+            if costs:
+                costs.popleft()
+            in_flight[pool.submit(worker, str(src), str(dst))] = (key, cost)
+
+        finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in finished:
+            key, cost = in_flight.pop(future)
+            budget.release(cost)
+            yield key, future.result()
+
+
+def open_pool(workers=None, jobs=None):
+    """Crea il pool di processi per la conversione.
+
+    Se `jobs` è indicato, il pool non supera il numero di job. I worker
+    partono con pool_context(), mai con fork.
+    """
+    workers = resolve_workers(workers)
+    if jobs is not None:
+        workers = max(1, min(workers, jobs))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+
+
+def derivative_path(master, name) -> Path:
+    """Nome deterministico del derivato: ABC123-00.jpg → ABC123-00@2000.jpg."""
+    master = Path(master)
+    return master.with_name(f"{master.stem}@{name}.jpg")
+
+
+def is_derivative_name(name, specs=None, names=()) -> bool:
+    """True per i derivati (ABC123-00@thumb.jpg): non vanno mai rinominati.
+
+    Conta come derivato <master>@<misura>.jpg se <misura> è tra quelle di
+    `specs`, o se <master>.jpg è tra i `names` della cartella (derivati di
+    un run precedente con altre misure). Un photo@2x.jpg da solo resta
+    un'immagine come le altre.
+    """
+    m = DERIVATIVE_RE.search(name)
+    if m is None:
+        return False
+    if specs and m.group("size") in specs:
+        return True
+    return name[:m.start()] + ".jpg" in names
+
+
+def parse_derivative_specs(text):
+    """ "2000,1000,thumb=300" → {"2000": 2000, "1000": 1000, "thumb": 300}"""
+    specs = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, side = part.partition("=")
+        specs[name] = int(side or name)
+    return specs
+
+
+def pending_derivatives(master, specs):
+    """Derivati di `master` da (ri)generare: mancanti o più vecchi del master."""
+    master_mtime = os.stat(master).st_mtime_ns
+    targets = []
+    for name, side in specs.items():
+        dst = derivative_path(master, name)
+        try:
+            if os.stat(dst).st_mtime_ns >= master_mtime:
+                continue
+        except OSError:
+            pass
+        targets.append((str(dst), int(side)))
+    return targets
+
+
+def make_derivatives(master, targets):
+    """Worker: genera tutti i derivati di `master` con una sola decodifica.
+
+    targets: lista di (dst, lato_lungo). Il master viene decodificato una
+    volta (per i JPEG con draft, cioè già scalato in DCT alla misura più
+    grande richiesta); ogni misura parte dalla precedente con reduce() e
+    un resize LANCZOS finale.
+    Ritorna (master, n_scritti, errore).
+    """
+    targets = sorted(targets, key=lambda t: t[1], reverse=True)
+    written = 0
+    try:
+        with master_pixel_limit(), Image.open(master) as img:
+            width, height = img.size
+            largest = targets[0][1]
+            scale = min(1.0, largest / max(width, height))
+            img.draft("RGB", (max(1, int(width * scale)), max(1, int(height * scale))))
+            current = img.convert("RGB")
+
+        for dst, side in targets:
+            long_side = max(current.size)
+            if long_side > side:
+                factor = long_side // side
+                if factor >= 2:
+                    current = current.reduce(factor)
+                ratio = side / max(current.size)
+                if ratio < 1:
+                    size = (max(1, round(current.width * ratio)), max(1, round(current.height * ratio)))
+                    current = current.resize(size, Image.LANCZOS)
+            current.save(dst, "JPEG", quality=DERIVATIVE_QUALITY)
+            written += 1
+    except Exception as e:
+        return master, written, str(e)
+    return master, written, None
+
+
+def derive_many(masters, specs, workers=None):
+    """Genera i derivati configurati per una lista di master, in parallelo.
+
+    Salta i derivati già più recenti del master. Genera (master, n_scritti,
+    errore) nello stesso ordine dei master che avevano lavoro da fare.
+    """
+    jobs = []
+    for master in masters:
+        targets = pending_derivatives(master, specs)
+        if targets:
+            jobs.append((str(master), targets))
+    if not jobs:
+        return
+
+    workers = min(resolve_workers(workers), len(jobs))
+    if workers == 1:
+        for master, targets in jobs:
+            yield make_derivatives(master, targets)
+        return
+
+    with open_pool(workers) as pool:
+        yield from pool.map(
+            make_derivatives, [m for m, _ in jobs], [t for _, t in jobs], chunksize=4
+        )
+
+
+def conversion_error(dst, error):
+    """Errore della conversione, compreso il caso di un JPEG mancante o vuoto (None se ok)."""
+    if error is None and not is_written(dst):
+        error = "file di destinazione mancante o vuoto"
+    return error
+
+
+def dispose_source(src, keep_dir=None):
+    """Elimina un originale, o lo sposta in `keep_dir` se va conservato."""
+    src = Path(src)
+    if keep_dir is None:
+        src.unlink()
+    else:
+        os.makedirs(keep_dir, exist_ok=True)
+        os.replace(src, Path(keep_dir) / src.name)
+
+
+def finalize_conversion(src, dst, error, keep_dir=None):
+    """Elimina l'originale solo se il JPEG è stato scritto davvero.
+
+    Con `keep_dir` l'originale viene spostato lì invece di essere
+    eliminato (così la conversione si può annullare, vedi rollback.py).
+    Ritorna il messaggio di errore (o None se tutto ok).
+    """
+    error = conversion_error(dst, error)
+    if error is not None:
+        return error
+    dispose_source(src, keep_dir)
+    return None
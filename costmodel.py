@@ -0,0 +1,174 @@
+import io
+import time
+
+from PIL import Image
+
+from converter import JPEG_QUALITY, flatten_to_rgb, master_pixel_limit, resolve_workers
+from progress import format_eta
+from scanner import scan_folder, walk_image_dirs
+
+# ---------- MODELLO DI COSTO (dry-run) ----------
+#
+# Stima del tempo di ricodifica e dei byte in uscita a partire dal solo
+# header delle immagini. I valori di default vengono da conversioni reali
+# su foto prodotto (un core, decodifica + appiattimento + JPEG q95);
+# `CostModel.calibrate()` li rimisura sui file della cartella.
+
+# megapixel/s per core, per formato sorgente
+DEFAULT_MPIX_PER_S = {
+    "PNG": 25.0,
+    "TIFF": 60.0,
+    "BMP": 70.0,
+    "WEBP": 30.0,
+    "JPEG": 45.0,  # JPEG CMYK / scala di grigi da ricodificare
+}
+FALLBACK_MPIX_PER_S = 30.0
+
+# byte del JPEG finale per pixel (q95, sfondi bianchi da catalogo)
+DEFAULT_JPEG_BYTES_PER_PIXEL = 0.25
+
+# costo fisso per file (apertura, scrittura, fsync del sistema) in secondi
+PER_FILE_OVERHEAD_S = 0.004
+
+# file convertiti davvero (in memoria) per la calibrazione
+CALIBRATION_SAMPLES = 3
+
+
+def read_header(path):
+    """(formato, modo, larghezza, altezza) letti dal solo header, o None se illeggibile."""
+    try:
+        with master_pixel_limit(), Image.open(path) as img:
+            return img.format or "", img.mode, img.width, img.height
+    except Exception:
+        return None
+
+
+class CostModel:
+    """Velocità di conversione per formato e byte per pixel del JPEG finale."""
+
+    def __init__(self, mpix_per_s=None, jpeg_bytes_per_pixel=DEFAULT_JPEG_BYTES_PER_PIXEL,
+                 calibrated=False):
+        self.mpix_per_s = dict(DEFAULT_MPIX_PER_S if mpix_per_s is None else mpix_per_s)
+        self.jpeg_bytes_per_pixel = jpeg_bytes_per_pixel
+        self.calibrated = calibrated
+
+    def estimate(self, header):
+        """(secondi di CPU, byte in uscita) per convertire un'immagine."""
+        fmt, _, width, height = header
+        pixels = width * height
+        speed = self.mpix_per_s.get(fmt, FALLBACK_MPIX_PER_S)
+        seconds = pixels / (speed * 1e6) + PER_FILE_OVERHEAD_S
+        return seconds, int(pixels * self.jpeg_bytes_per_pixel)
+
+    @classmethod
+    def calibrate(cls, paths, samples=CALIBRATION_SAMPLES):
+        """Misura il modello convertendo in memoria alcuni file (il disco non viene toccato).
+
+        Per ogni formato usa fino a `samples` file; i formati senza campioni
+        restano ai valori di default. Ritorna il modello di default se
+        nessun file è leggibile.
+        """
+        timings = {}
+        out_bytes = 0
+        out_pixels = 0
+        for path in paths:
+            header = read_header(path)
+            if header is None:
+                continue
+            fmt, _, width, height = header
+            runs = timings.setdefault(fmt, [])
+            if len(runs) >= samples:
+                continue
+            buf = io.BytesIO()
+            t0 = time.perf_counter()
+            try:
+                with master_pixel_limit(), Image.open(path) as img:
+                    rgb = flatten_to_rgb(img)
+                rgb.save(buf, "JPEG", quality=JPEG_QUALITY)
+            except Exception:
+                continue
+            elapsed = time.perf_counter() - t0
+            runs.append((width * height, elapsed))
+            out_bytes += buf.tell()
+            out_pixels += width * height
+
+        if not out_pixels:
+            return cls()
+
+        speeds = dict(DEFAULT_MPIX_PER_S)
+        for fmt, runs in timings.items():
+            pixels = sum(p for p, _ in runs)
+            seconds = sum(s for _, s in runs)
+            if pixels and seconds > 0:
+                speeds[fmt] = pixels / seconds / 1e6
+        return cls(speeds, out_bytes / out_pixels, calibrated=True)
+
+
+def sample_paths(root, extensions, recursive=False, limit=50):
+    """Primi file da convertire (non .jpg) di `root` da usare per la calibrazione."""
+    folders = walk_image_dirs(root, extensions) if recursive else [root]
+    paths = []
+    for folder in folders:
+        for f in scan_folder(folder).files(extensions):
+            if f.suffix != ".jpg":
+                paths.append(f.path)
+                if len(paths) >= limit:
+                    return paths
+    return paths
+
+
+class PlanEstimate:
+    """Somma dei costi stimati delle conversioni di una cartella."""
+
+    def __init__(self, model, workers=None):
+        self.model = model
+        self.workers = resolve_workers(workers)
+        self.files = 0
+        self.pixels = 0
+        self.cpu_s = 0.0
+        self.in_bytes = 0
+        self.out_bytes = 0
+        self.unreadable = 0
+
+    def add(self, path, in_bytes=0):
+        """Aggiunge una conversione; ritorna (secondi, byte in uscita) o None se illeggibile."""
+        header = read_header(path)
+        if header is None:
+            self.unreadable += 1
+            return None
+        seconds, out_bytes = self.model.estimate(header)
+        self.files += 1
+        self.pixels += header[2] * header[3]
+        self.cpu_s += seconds
+        self.in_bytes += in_bytes
+        self.out_bytes += out_bytes
+        return seconds, out_bytes
+
+    @property
+    def wall_s(self):
+        """Tempo stimato con `workers` processi (i job sono indipendenti)."""
+        return self.cpu_s / max(1, min(self.workers, self.files or 1))
+
+    def update_summary(self, summary):
+        """Campi interi nel riepilogo, così main.py li somma tra le cartelle."""
+        summary["est_pixels"] = self.pixels
+        summary["est_cpu_ms"] = int(self.cpu_s * 1000)
+        summary["est_wall_ms"] = int(self.wall_s * 1000)
+        summary["est_in_bytes"] = self.in_bytes
+        summary["est_out_bytes"] = self.out_bytes
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def format_estimate(pixels, cpu_s, wall_s, workers, out_bytes, calibrated=False):
+    """Riga di log con la stima (tempi in mm:ss)."""
+    source = "calibrato" if calibrated else "valori di default"
+    return (
+        f"[PLAN] {pixels / 1e6:.1f} MP · CPU ~{format_eta(cpu_s)} · "
+        f"~{format_eta(wall_s)} con {workers} worker · output ~{format_bytes(out_bytes)} ({source})"
+    )
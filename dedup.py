@@ -0,0 +1,203 @@
+import hashlib
+import mmap
+import os
+from collections import defaultdict
+
+from PIL import Image
+
+from converter import flatten_to_rgb, has_alpha, master_pixel_limit, open_pool, resolve_workers
+from manifest import HASH_CHUNK, file_hash
+
+# ---------- DOPPIONI ----------
+#
+# Lo stesso scatto finisce spesso due volte nella cartella (PNG + JPG, o
+# riesportato con un altro nome). Prima di pianificare conversioni e
+# rinomine si cercano i doppioni in tre passi, ognuno solo sui file che il
+# passo precedente non ha già distinto:
+#
+#   1) dimensione (gratis, viene dallo scan)
+#   2) hash dei primi PARTIAL_BYTES
+#   3) hash completo a blocchi (mmap sopra MMAP_MIN_BYTES), lo stesso del
+#      manifest, così i file già elaborati non vanno riletti
+#
+# Con mode="perceptual" i file rimasti vengono confrontati anche con un
+# dHash a 64 bit calcolato su una decodifica ridotta: trova lo stesso
+# scatto salvato in formati diversi. Il confronto avviene solo tra file
+# della stessa chiave (articolo / prefisso).
+#
+# Nel run il controllo è spento di default (DEFAULT_DEDUP): due file con lo
+# stesso contenuto possono essere voluti, e leggere tutta la cartella per
+# gli hash costa. Si attiva con --dedup / DEDUP nei brand.
+
+DEDUP_MODES = ("off", "exact", "perceptual")
+DEFAULT_DEDUP = "off"
+
+PARTIAL_BYTES = 64 * 1024
+MMAP_MIN_BYTES = 8 * 1024 ** 2
+
+# dHash: (PHASH_SIZE + 1) x PHASH_SIZE pixel in scala di grigi
+PHASH_SIZE = 8
+# lato massimo della decodifica ridotta (JPEG: draft in DCT, altri: reduce)
+PHASH_DECODE = 64
+# bit diversi tollerati perché due immagini siano lo stesso scatto
+PHASH_DISTANCE = 4
+# sotto questo numero di file il dHash si calcola senza pool
+PHASH_POOL_MIN = 32
+
+
+def partial_hash(path, size=PARTIAL_BYTES) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(size), digest_size=20).hexdigest()
+
+
+def content_hash(path, use_mmap=True) -> str:
+    """Hash BLAKE2b del contenuto (uguale a manifest.file_hash).
+
+    Sopra MMAP_MIN_BYTES il file viene mappato in memoria e passato a
+    blocchi di HASH_CHUNK senza copie in user space.
+    """
+    if not use_mmap or os.path.getsize(path) < MMAP_MIN_BYTES:
+        return file_hash(path)
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            for start in range(0, len(mm), HASH_CHUNK):
+                h.update(view[start:start + HASH_CHUNK])
+        finally:
+            view.release()
+    return h.hexdigest()
+
+
+def perceptual_hash(path):
+    """Worker: dHash a 64 bit di `path`; ritorna (path, hash) con hash None se illeggibile."""
+    try:
+        with master_pixel_limit(), Image.open(path) as img:
+            img.draft("RGB", (PHASH_DECODE, PHASH_DECODE))
+            if img.mode not in ("RGB", "RGBA", "L"):
+                img = img.convert("RGBA" if has_alpha(img) else "RGB")
+            img.thumbnail((PHASH_DECODE, PHASH_DECODE))
+            # la trasparenza diventa bianca, come nel JPG convertito
+            small = flatten_to_rgb(img)
+        gray = small.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.BILINEAR).tobytes()
+    except Exception:
+        return str(path), None
+    bits = 0
+    width = PHASH_SIZE + 1
+    for row in range(PHASH_SIZE):
+        for col in range(PHASH_SIZE):
+            i = row * width + col
+            bits = (bits << 1) | (gray[i] > gray[i + 1])
+    return str(path), bits
+
+
+def _read_hashes(func, members, io):
+    """func(path) per ogni membro (anche sui thread di `io`); None se il file è illeggibile."""
+    def safe(member):
+        try:
+            return func(member[0].path)
+        except OSError:
+            return None
+    return list(io.map(safe, members)) if io is not None else [safe(m) for m in members]
+
+
+def hamming(a, b) -> int:
+    return (a ^ b).bit_count()
+
+
+def _perceptual_hashes(entries, workers):
+    paths = [str(e.path) for e in entries]
+    workers = resolve_workers(workers)
+    if workers == 1 or len(paths) < PHASH_POOL_MIN:
+        return dict(map(perceptual_hash, paths))
+    with open_pool(workers, jobs=len(paths)) as pool:
+        return dict(pool.map(perceptual_hash, paths, chunksize=16))
+
+
+def find_duplicates(files, reference=(), mode="exact", key_of=None, prefer=None, workers=None,
+                    use_mmap=True, distance=PHASH_DISTANCE, io=None):
+    """Trova i doppioni tra i file da elaborare.
+
+    files      – FileEntry candidati (vedi scanner.py)
+    reference  – coppie (FileEntry, hash o None) dei file già elaborati
+                 (manifest): restano sempre loro l'originale
+    key_of     – nome → chiave, limita il confronto percettivo a una chiave
+    prefer     – chiave di ordinamento: a parità di contenuto resta il primo
+                 (default: per nome)
+    io         – fsio.IOExecutor opzionale: le letture per gli hash partono
+                 in parallelo
+
+    Ritorna {nome del doppione: (nome dell'originale, "exact" | "perceptual")}.
+    I file illeggibili non sono mai doppioni.
+    """
+    duplicates = {}
+    if mode in (None, False, "off") or not files:
+        return duplicates
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"modalità dedup sconosciuta: {mode}")
+    prefer = prefer or (lambda e: e.name)
+
+    def resolve(members, kind):
+        refs = sorted((e for e, _, is_ref in members if is_ref), key=lambda e: e.name)
+        fresh = sorted((e for e, _, is_ref in members if not is_ref), key=prefer)
+        keep = refs[0] if refs else fresh.pop(0)
+        for entry in fresh:
+            duplicates[entry.name] = (keep.name, kind)
+
+    # ---- 1) dimensione ----
+    by_size = defaultdict(list)
+    for entry in files:
+        by_size[entry.size].append((entry, None, False))
+    for entry, known in reference:
+        if entry.size in by_size:
+            by_size[entry.size].append((entry, known, True))
+
+    for size, same_size in by_size.items():
+        if len(same_size) < 2:
+            continue
+        # ---- 2) primi byte (i file piccoli passano direttamente all'hash completo) ----
+        clusters = [same_size]
+        if size > PARTIAL_BYTES:
+            by_head = defaultdict(list)
+            for member, digest in zip(same_size, _read_hashes(partial_hash, same_size, io)):
+                if digest is not None:
+                    by_head[digest].append(member)
+            clusters = [c for c in by_head.values() if len(c) > 1]
+
+        # ---- 3) contenuto completo ----
+        for cluster in clusters:
+            by_hash = defaultdict(list)
+            # hash già noti (manifest) riusati, gli altri letti nello stesso ordine
+            unknown = [m for m in cluster if not m[1]]
+            digests = iter(_read_hashes(lambda p: content_hash(p, use_mmap), unknown, io))
+            for member in cluster:
+                digest = member[1] or next(digests)
+                if digest is not None:
+                    by_hash[digest].append(member)
+            for members in by_hash.values():
+                if len(members) > 1 and any(not is_ref for _, _, is_ref in members):
+                    resolve(members, "exact")
+
+    if mode != "perceptual":
+        return duplicates
+
+    # ---- 4) dHash sui file rimasti, per chiave ----
+    remaining = [e for e in files if e.name not in duplicates]
+    hashes = _perceptual_hashes(remaining, workers)
+    by_key = defaultdict(list)
+    for entry in remaining:
+        if hashes.get(str(entry.path)) is not None:
+            by_key[key_of(entry.name) if key_of else None].append(entry)
+
+    for entries in by_key.values():
+        kept = []
+        for entry in sorted(entries, key=prefer):
+            bits = hashes[str(entry.path)]
+            for other, other_bits in kept:
+                if hamming(bits, other_bits) <= distance:
+                    duplicates[entry.name] = (other.name, "perceptual")
+                    break
+            else:
+                kept.append((entry, bits))
+
+    return duplicates
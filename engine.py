@@ -0,0 +1,714 @@
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from audit import DeferredAudit, open_audit
+from converter import (
+    ORIGINALS_DIR, conversion_error, convert_file_timed, convert_many, derive_many,
+    finalize_conversion, is_derivative_name, is_passthrough_jpeg, open_pool, passthrough_file,
+    resolve_workers, submit_bounded,
+)
+from costmodel import CostModel, PlanEstimate, format_estimate
+from dedup import DEFAULT_DEDUP, find_duplicates
+from fsio import DEFAULT_IO_THREADS, open_io, stat_all
+from grouping import GroupRecord, StreamGrouper
+from manifest import DEFAULT_USE_MANIFEST, Manifest
+from profiling import DISABLED, Profiler
+from recursive import DEFAULT_PARALLEL_DIRS, format_summary, process_tree
+from rename_plan import apply_plan, build_plan, recover_intents
+from scanner import scan_folder
+from staging import Stage, recover_staging
+
+
+def _quiet(message):
+    pass
+
+
+def new_summary(folder):
+    return {"folder": str(folder), "converted": 0, "passthrough": 0, "renamed": 0, "skipped": 0,
+            "errors": 0, "unchanged": 0, "updated": 0, "duplicates": 0}
+
+
+def commit_group(profile, folder, key, records, existing, log=_quiet, group_callback=None,
+                 manifest=None, dry_run=False, audit=None, profiler=None, io=None, target=None,
+                 stage=None):
+    """Rinomina tutte le immagini (già in JPG) di una chiave.
+
+    `existing` è l'insieme dei nomi presenti in cartella e viene
+    aggiornato con le rinomine fatte. Con un manifest la numerazione
+    riparte dopo le immagini già elaborate in run precedenti.
+    Con dry_run=True il piano viene solo riportato nel log.
+    Con un `audit` (AuditSink) ogni rinomina viene registrata.
+    Con un `profiler` (vedi profiling.py) i tempi finiscono nelle fasi
+    "rename" e "audit". Con un `io` (fsio.IOExecutor) rinomine, stat e
+    hash per manifest e audit vengono spediti in parallelo.
+    Con un `target` diverso da `folder` (output_dir) i file vanno lì ed
+    `existing` sono i nomi di `target`. Con uno `stage` (staging.Stage) i
+    file entrano nell'area di staging e vengono pubblicati a fine cartella.
+    Ritorna il piano (applicato o no).
+    """
+    prof = profiler or DISABLED
+    target = Path(target) if target is not None else folder
+    external = target != folder
+    log(f"[ARTICLE] {key} – immagini: {len(records)}")
+    if group_callback:
+        group_callback(key)
+
+    records.sort(key=profile.sort_key)
+
+    start = manifest.next_index(key) if manifest is not None else 0
+    mapping = [(folder / r.name, profile.output_name(key, idx)) for idx, r in enumerate(records, start)]
+    plan = build_plan(target, mapping, existing, external)
+
+    for src, dst, reason in plan.collisions:
+        log(f"[WARN] {dst.name} {reason}, salto {src.name}.")
+    if plan.cycles:
+        log(f"[INFO] Cicli di rinomina risolti: {plan.cycles}")
+
+    if dry_run:
+        for src, dst in plan.moves:
+            if not external:
+                existing.discard(src.name)
+            existing.add(dst.name)
+            log(f"   [DRY-RUN] {src.name}  →  {dst.name}")
+        return plan
+
+    t0 = time.perf_counter()
+    if stage is None:
+        moves = apply_plan(plan, intents=True, io=io)
+    else:
+        # i convertiti entrano nell'area anche se hanno già il nome finale
+        stage.put_plan(plan, {r.name for r in records if r.convert})
+        moves = plan.moves
+    locate = stage.locate if stage is not None else target.joinpath
+    elapsed = time.perf_counter() - t0
+    prof.add("rename", elapsed, len(moves))
+    per_file_ms = elapsed * 1000 / len(moves) if moves else 0
+    by_name = {r.name: r for r in records} if audit is not None else None
+    sizes = None
+    if audit is not None and io is not None:
+        sizes = list(io.map(os.path.getsize, [locate(dst.name) for _, dst in moves]))
+    for i, (src, dst) in enumerate(moves):
+        if not external:
+            existing.discard(src.name)
+        existing.add(dst.name)
+        log(f"   {src.name}  →  {dst.name}")
+        if audit is not None:
+            with prof.stage("audit"):
+                r = by_name[src.name]
+                size = sizes[i] if sizes is not None else os.stat(locate(dst.name)).st_size
+                # pubblicato in output_dir: il registro tiene il path completo per il rollback
+                if external:
+                    audit.record("publish", folder, src.name, str(dst), key, r.view, r.seq, size,
+                                 size, per_file_ms)
+                else:
+                    audit.record("rename", folder, src.name, dst.name, key, r.view, r.seq, size,
+                                 size, per_file_ms)
+
+    if manifest is not None:
+        skipped = {src.name for src, _, _ in plan.collisions}
+        manifest.record_many(
+            [(locate(new_name), src.name, key, idx)
+             for idx, (src, new_name) in enumerate(mapping, start) if src.name not in skipped],
+            io,
+        )
+
+    return plan
+
+
+def build_derivatives(masters, derivatives, workers, summary, log=_quiet):
+    """Formati web dei master (una decodifica per master, saltati se già aggiornati)."""
+    summary["derivatives"] = 0
+    for master, written, error in derive_many(masters, derivatives, workers=workers):
+        summary["derivatives"] += written
+        if error:
+            summary["errors"] += 1
+            log(f"[ERROR] Derivati di {Path(master).name}: {error}")
+    log(f"[INFO] Derivati generati: {summary['derivatives']}")
+
+
+def _run_tree(profile, root, log_callback, progress_callback, group_callback, workers, parallel_dirs,
+              use_manifest, dry_run, derivatives, cost_model, audit, keep_originals, dedup, profiler,
+              io, staged, output_dir):
+    """Modalità ricorsiva: ogni cartella con immagini è un'unità indipendente.
+
+    Con un output_dir la struttura delle sottocartelle viene ripetuta lì.
+    """
+    if output_dir is not None and Path(output_dir).resolve().is_relative_to(root.resolve()):
+        raise ValueError(f"output_dir dentro la cartella da elaborare: {output_dir}")
+    lock = threading.Lock()
+    progress = {}
+
+    def dir_progress(folder):
+        def update(done, total):
+            with lock:
+                progress[folder] = (done, total)
+                done_all = sum(d for d, _ in progress.values())
+                total_all = sum(t for _, t in progress.values())
+            progress_callback(done_all, total_all)
+        return update if progress_callback else None
+
+    per_dir_workers = max(1, resolve_workers(workers) // parallel_dirs)
+    summaries = process_tree(
+        root,
+        lambda d: run_profile(
+            profile,
+            d,
+            log_callback=log_callback,
+            progress_callback=dir_progress(d),
+            group_callback=group_callback,
+            workers=per_dir_workers,
+            use_manifest=use_manifest,
+            dry_run=dry_run,
+            derivatives=derivatives,
+            cost_model=cost_model,
+            audit=audit,
+            keep_originals=keep_originals,
+            dedup=dedup,
+            profiling=profiler,
+            io_threads=io,
+            staged=staged,
+            output_dir=Path(output_dir) / d.relative_to(root) if output_dir is not None else None,
+        ),
+        profile.extensions,
+        parallel_dirs=parallel_dirs,
+    )
+
+    log = log_callback or _quiet
+    log("[SUMMARY]")
+    for line in format_summary(summaries):
+        log(line)
+    if dry_run:
+        cpu_s = sum(s.get("est_cpu_ms", 0) for s in summaries) / 1000
+        total_workers = resolve_workers(workers)
+        log(format_estimate(
+            sum(s.get("est_pixels", 0) for s in summaries), cpu_s, cpu_s / total_workers,
+            total_workers, sum(s.get("est_out_bytes", 0) for s in summaries),
+            cost_model is not None and cost_model.calibrated,
+        ))
+    return summaries
+
+
+def run_profile(profile, folder, log_callback=None, progress_callback=None, group_callback=None,
+                workers=None, recursive=False, parallel_dirs=DEFAULT_PARALLEL_DIRS,
+                use_manifest=DEFAULT_USE_MANIFEST, dry_run=False, derivatives=None, cost_model=None,
+                audit=None, keep_originals=False, dedup=DEFAULT_DEDUP, profiling=None,
+                io_threads=DEFAULT_IO_THREADS, staged=False, output_dir=None):
+    """Converte e rinomina le immagini di `folder` secondo un profilo brand.
+
+    Pipeline a stadi, uguale per tutti i brand:
+      1) parsing dei nomi (profile.parse) e raggruppamento per chiave;
+         i file che sono già JPEG entrano nel gruppo senza ricodifica
+      2) conversione in JPG in un pool di processi
+      3) rinomina di ogni chiave appena tutte le sue immagini sono pronte
+      4) derivati web dei master (opzionale)
+
+    progress_callback(done, total)   – total = conversioni + rinomine
+    group_callback(key)              – chiamato quando una chiave viene completata
+
+    Con use_manifest=True (default False) i file già elaborati in run
+    precedenti (vedi manifest.py) vengono saltati; se il loro contenuto è cambiato restano
+    al nome e all'indice che hanno, con record del manifest, derivati e
+    audit ("update") aggiornati (summary["updated"]). Con dry_run=True conversioni e rinomine
+    vengono solo pianificate e riportate nel log, senza toccare il disco;
+    il riepilogo contiene allora il piano completo (summary["plan"]) e la
+    stima dei costi letta dai soli header (est_*, vedi costmodel.py, con
+    `cost_model` eventualmente calibrato).
+    `derivatives` ({"2000": 2000, "thumb": 300, ...}) genera i formati web
+    accanto a ogni master rinominato (vedi converter.derive_many).
+    `audit` (AuditSink o path .csv / .jsonl) registra ogni conversione e
+    rinomina fatta (vedi audit.py); con keep_originals=True gli originali
+    convertiti vengono spostati in ORIGINALS_DIR invece di essere eliminati,
+    così rollback.py può annullare anche le conversioni.
+    `dedup` ("exact", "perceptual" o "off", default; vedi dedup.py) cerca i doppioni
+    prima di pianificare le conversioni: restano dove sono, fuori dalla
+    numerazione, e finiscono nel log (e in summary["plan"]["duplicates"]).
+    `profiling` (True, "cprofile,tracemalloc", un profiling.Profiler; None =
+    variabile d'ambiente RENAMER_PROFILE) misura le singole fasi e chiude il
+    run con una tabella [PROFILE] nel log.
+    `io_threads` (numero di thread o fsio.IOExecutor, 0 = sincrono) sovrappone
+    le operazioni sul filesystem: stat, header, rinomine in blocco e lettura
+    anticipata dei sorgenti da convertire. Serve sulle cartelle di rete
+    (SMB / NFS), dove ogni operazione paga la latenza del server.
+    Con staged=True conversioni e rinomine passano per un'area di staging e
+    vengono pubblicate a fine cartella con rename atomici; i sorgenti si
+    eliminano solo dopo (vedi staging.py). `output_dir` pubblica in un'altra
+    cartella (sottocartelle ripetute in modalità ricorsiva) e implica staged.
+
+    Ritorna il riepilogo della cartella (dict); con recursive=True elabora
+    tutte le sottocartelle e ritorna la lista dei riepiloghi.
+    """
+    folder = Path(folder)
+    profiler = profiling if isinstance(profiling, Profiler) else Profiler.from_env(profiling)
+    # il run più esterno avvia il profiler e stampa il riepilogo
+    owns_profiler = profiler.enabled and not profiler.running
+    profiler.start()
+    audit, close_audit = open_audit(None if dry_run else audit)
+    io, close_io = open_io(io_threads)
+    try:
+        if recursive:
+            return _run_tree(
+                profile, folder, log_callback, progress_callback, group_callback, workers,
+                parallel_dirs, use_manifest, dry_run, derivatives, cost_model, audit, keep_originals,
+                dedup, profiler, io, staged, output_dir,
+            )
+        return _run_folder(
+            profile, folder, log_callback, progress_callback, group_callback, workers,
+            use_manifest, dry_run, derivatives, cost_model, audit, keep_originals, dedup, profiler, io,
+            staged, output_dir,
+        )
+    finally:
+        if close_io:
+            io.close()
+        if close_audit:
+            audit.close()
+        if owns_profiler:
+            profiler.stop()
+            log = log_callback or _quiet
+            for line in profiler.report():
+                log(line)
+
+
+def _run_folder(profile, folder, log_callback, progress_callback, group_callback, workers,
+                use_manifest, dry_run, derivatives, cost_model, audit, keep_originals, dedup,
+                profiler, io, staged, output_dir):
+    """Una sola cartella (vedi run_profile)."""
+    prof = profiler
+    log = prof.wrap("log", log_callback or _quiet)
+    summary = new_summary(folder)
+    # destinazione dei file finali: la cartella stessa o output_dir
+    target = Path(output_dir) if output_dir is not None else folder
+    external = target.resolve() != folder.resolve()
+    if not external:
+        target = folder
+    staged = staged or external
+    with prof.stage("manifest"):
+        # il manifest sta accanto ai file finali
+        manifest = Manifest(target) if use_manifest else None
+
+    log(f"[INFO] Cartella: {folder} (profilo {profile.label})")
+    if external:
+        log(f"[INFO] Destinazione: {target}")
+    if not dry_run:
+        if external:
+            os.makedirs(target, exist_ok=True)
+        with prof.stage("recover"):
+            recovered = recover_intents(folder)
+            published, discarded = recover_staging(target)
+        if recovered:
+            log(f"[WARN] Recuperati {recovered} file rimasti su nomi temporanei da un run interrotto")
+        if published:
+            log(f"[WARN] Completata la pubblicazione di un run interrotto: {published} file")
+        if discarded:
+            log(f"[WARN] Scartate {discarded} aree di staging di run interrotti (sorgenti intatti)")
+
+    with prof.stage("scan"):
+        inventory = scan_folder(folder)
+        existing = set(inventory.names())
+        candidates = []
+        derived = []
+        for f in inventory.files(profile.extensions):
+            if is_derivative_name(f.name, derivatives, existing):
+                derived.append(f.name)
+            else:
+                candidates.append(f)
+        # nomi occupati nella destinazione
+        outputs = inventory
+        if external:
+            outputs = scan_folder(target) if target.is_dir() else None
+        taken = set(outputs.names()) if outputs is not None else set()
+        if not external:
+            taken = existing
+    if derived:
+        examples = ", ".join(derived[:3]) + (", ..." if len(derived) > 3 else "")
+        log(f"[INFO] Derivati esclusi dalla rinomina: {len(derived)} ({examples})")
+    if not dry_run and discarded and manifest is not None:
+        # record salvati per una pubblicazione mai avvenuta
+        manifest.prune(taken)
+    if io is not None:
+        # size / mtime servono a manifest, doppioni e stime: tutti gli stat insieme
+        with prof.stage("stat", len(candidates)):
+            stat_all(io, candidates)
+    processed = []
+    states = {}
+    if manifest is not None and external:
+        # i sorgenti pubblicati non restano in cartella: i file già elaborati
+        # sono quelli del manifest nella destinazione
+        if outputs is not None:
+            with prof.stage("manifest"):
+                states = {f.name: manifest.check(f) for f in outputs.files(profile.extensions)
+                          if f.name in manifest}
+                processed = [f for f in outputs.files(profile.extensions) if states.get(f.name)]
+    elif manifest is not None:
+        known = candidates
+        with prof.stage("manifest", len(known)):
+            states = {f.name: manifest.check(f) for f in known}
+        candidates = [f for f in known if not states[f.name]]
+        processed = [f for f in known if states[f.name]]
+        summary["unchanged"] = sum(1 for state in states.values() if state == "unchanged")
+        if summary["unchanged"]:
+            log(f"[INFO] Già elaborate (manifest): {summary['unchanged']}")
+    # un file noto con contenuto nuovo ha già il nome finale: resta al suo
+    # posto e al suo indice, si aggiornano solo record del manifest e derivati
+    for f in processed:
+        if states.get(f.name) != "updated":
+            continue
+        summary["updated"] += 1
+        log(f"[INFO] Contenuto cambiato, resta {f.name} (manifest aggiornato)")
+        if audit is not None:
+            record = manifest.records[f.name]
+            audit.record("update", target, f.name, f.name, record.get("key"), None,
+                         record.get("index"), f.size, f.size)
+    masters = [f.path for f in processed]
+
+    log(f"[INFO] Immagini trovate: {len(candidates)}")
+
+    if not candidates:
+        log("[WARN] Nessuna immagine trovata.")
+        if progress_callback:
+            progress_callback(0, 0)
+        if derivatives and not dry_run:
+            with prof.stage("derivatives", len(masters)):
+                build_derivatives(masters, derivatives, workers, summary, log)
+        if manifest is not None and not dry_run:
+            with prof.stage("manifest"):
+                manifest.save()
+        return summary
+
+    if dry_run:
+        plan_out = summary["plan"] = {"convert": [], "rename": [], "duplicates": []}
+
+    keep_dir = folder / ORIGINALS_DIR if keep_originals else None
+    stage = None
+    if staged and not dry_run:
+        stage = Stage(target, keep_dir, io)
+        if audit is not None:
+            # nel registro solo ciò che è stato pubblicato davvero
+            audit = DeferredAudit(audit)
+
+    # ---- STADIO 1: parsing, doppioni e raggruppamento ----
+    group_t0 = time.perf_counter()
+    parsed = []
+    for f in candidates:
+        found = profile.identify(f.path)
+        if not found:
+            log(f"[SKIP] Nome non riconosciuto: {f.name}")
+            summary["skipped"] += 1
+            continue
+        parsed.append((f, found))
+    group_s = time.perf_counter() - group_t0
+
+    if dedup not in (None, False, "off") and len(parsed) > 1:
+        # i file già elaborati (manifest) fanno da originale, con l'hash già noto
+        with prof.stage("dedup", len(parsed)):
+            keys = {f.name: found[1] for f, found in parsed}
+            duplicates = find_duplicates(
+                [f for f, _ in parsed],
+                reference=[(f, manifest.records[f.name].get("hash")) for f in processed],
+                mode=dedup,
+                key_of=keys.get,
+                # a parità di contenuto resta il file che non va convertito
+                prefer=lambda e: (e.suffix != ".jpg", e.name),
+                workers=workers,
+                io=io,
+            )
+        if duplicates:
+            for f, (variant, key, view, seq) in parsed:
+                if f.name not in duplicates:
+                    continue
+                original, kind = duplicates[f.name]
+                log(f"[DUP] {f.name} = {original} ({'identico' if kind == 'exact' else 'percettivo'}), "
+                    "escluso dalla numerazione")
+                if dry_run:
+                    plan_out["duplicates"].append({"name": f.name, "original": original, "kind": kind})
+                elif audit is not None:
+                    audit.record("duplicate", folder, f.name, original, key, view, seq, f.size)
+            summary["duplicates"] = len(duplicates)
+            parsed = [(f, found) for f, found in parsed if f.name not in duplicates]
+
+    # un record compatto per file; i gruppi escono già ordinati per chiave
+    # (con cartelle enormi l'ordinamento dei record passa per blocchi su
+    # disco; l'elenco dei file e `parsed` restano comunque in memoria)
+    group_t0 = time.perf_counter()
+    passthrough = None
+    if io is not None:
+        # header dei non-.jpg letti in parallelo (sono già JPEG?)
+        probes = [f for f, _ in parsed if f.suffix != ".jpg"]
+        probed = io.map(is_passthrough_jpeg, [f.path for f in probes])
+        passthrough = {f.name for f, ok in zip(probes, probed) if ok}
+    grouper = StreamGrouper(order=profile.sort_key)
+    scheduled = set()  # JPG di destinazione già assegnati a una conversione
+    for f, (variant, key, view, seq) in parsed:
+        convert = False
+        if f.suffix != ".jpg":
+            jpg_name = f.path.with_suffix(".jpg").name
+            if passthrough is not None:
+                is_jpeg = f.name in passthrough
+            else:
+                is_jpeg = is_passthrough_jpeg(f.path)
+            if is_jpeg:
+                # è già un JPEG RGB: lo rinomina direttamente il piano, senza ricodifica
+                summary["passthrough"] += 1
+                log(f"{'[DRY-RUN] ' if dry_run else ''}Già JPEG, senza ricodifica: {f.name}")
+            elif jpg_name in existing or jpg_name in scheduled:
+                # es. ABC123_a.png e ABC123_a.tif: il secondo sovrascriverebbe il primo
+                log(f"[WARN] Esiste già {jpg_name}, salto conversione di {f.name}")
+                summary["skipped"] += 1
+                continue
+            else:
+                convert = True
+                scheduled.add(jpg_name)
+        grouper.add(GroupRecord(key, f.name, view, seq, convert), variant)
+    del parsed
+    prof.add("group", group_s + time.perf_counter() - group_t0, len(candidates))
+
+    stats = grouper.stats
+    largest = stats.largest()
+    log(f"[INFO] Codici: {stats.keys}" + (f" (max {largest[1]} immagini: {largest[0]})" if largest else ""))
+    if len(profile.patterns) > 1 and stats.variants:
+        log("[INFO] Varianti nomi: " + " · ".join(f"{v} {n}" for v, n in sorted(stats.variants.items())))
+    if grouper.spilled:
+        log(f"[INFO] Raggruppamento su disco: {grouper.spilled} blocchi")
+        prof.count("spill_chunks", grouper.spilled)
+
+    total_to_process = stats.convert + stats.files
+    done = 0
+    if progress_callback:
+        progress_callback(done, total_to_process)
+
+    pending = dict(stats.convert_per_key)
+    held = {}
+    to_convert = []
+
+    def commit(key, records):
+        nonlocal done
+        if not records:
+            return  # tutte le conversioni della chiave sono fallite
+        plan = commit_group(profile, folder, key, records, taken, log, group_callback, manifest,
+                            dry_run, audit, prof, io, target, stage)
+        done += len(records)
+        if dry_run:
+            plan_out["rename"].extend([src.name, dst.name] for src, dst in plan.moves)
+        masters.extend(dst for _, dst in plan.accepted)
+        summary["renamed"] += len(plan.moves)
+        summary["skipped"] += len(plan.collisions)
+        if progress_callback:
+            progress_callback(done, total_to_process)
+
+    # le chiavi senza conversioni vengono rinominate appena escono dal raggruppamento
+    for key, records in grouper.groups():
+        if key in pending:
+            held[key] = records
+            to_convert.extend((key, r) for r in records if r.convert)
+        else:
+            commit(key, records)
+
+    # ---- STADIO 2 + 3: conversione e rinomina per chiave ----
+    if to_convert and dry_run:
+        estimate = PlanEstimate(cost_model or CostModel(), workers)
+        for key, record in to_convert:
+            src = folder / record.name
+            record.name = src.with_suffix(".jpg").name
+            existing.discard(src.name)
+            existing.add(record.name)
+            summary["converted"] += 1
+
+            entry = inventory.get(src.name)
+            cost = estimate.add(src, entry.size if entry is not None else 0)
+            est_ms, est_bytes = (int(cost[0] * 1000), cost[1]) if cost else (None, None)
+            plan_out["convert"].append(
+                {"src": src.name, "dst": record.name, "est_ms": est_ms, "est_bytes": est_bytes}
+            )
+            log(f"[DRY-RUN] {src.suffix[1:].upper()} → JPG: {src.name}")
+
+            done += 1
+            pending[key] -= 1
+            if pending[key] == 0:
+                commit(key, held.pop(key))
+        estimate.update_summary(summary)
+        log(format_estimate(estimate.pixels, estimate.cpu_s, estimate.wall_s, estimate.workers,
+                            estimate.out_bytes, estimate.model.calibrated))
+        if estimate.unreadable:
+            log(f"[WARN] Header illeggibili (conversione probabilmente fallirà): {estimate.unreadable}")
+
+    elif to_convert:
+        convert_t0 = time.perf_counter()
+        with open_pool(workers, jobs=len(to_convert)) as pool:
+            jobs = []
+            for key, record in to_convert:
+                src = folder / record.name
+                # dimensione del sorgente letta prima che venga eliminato
+                size_in = inventory.get(record.name).size if audit is not None else None
+                dst = src.with_suffix(".jpg")
+                if stage is not None:
+                    dst = stage.converted_path(dst.name)
+                jobs.append(((key, record, size_in), src, dst))
+
+            def finalize(item):
+                job, (src, dst, error, seconds, stages) = item
+                with prof.stage("finalize"):
+                    if stage is None:
+                        error = finalize_conversion(src, dst, error, keep_dir)
+                    else:
+                        # il sorgente si elimina solo dopo la pubblicazione
+                        error = conversion_error(dst, error)
+                return job, (src, dst, error, seconds, stages)
+
+            results = submit_bounded(pool, jobs, workers, worker=convert_file_timed, io=io)
+            # con un io, stat del JPEG ed eliminazione del sorgente girano sui thread di I/O
+            results = io.map(finalize, results) if io is not None else map(finalize, results)
+            for (key, record, size_in), (src, dst, error, seconds, stages) in results:
+                if stages is not None and prof.enabled:
+                    prof.add("decode", stages[0])
+                    prof.add("flatten", stages[1])
+                    prof.add("encode", stages[2])
+                src, dst = Path(src), Path(dst)
+                if error:
+                    # l'immagine non convertita resta fuori dalla numerazione
+                    log(f"[ERROR] Conversione fallita {src.name}: {error}")
+                    held[key].remove(record)
+                    summary["errors"] += 1
+                    prof.count("convert_errors")
+                else:
+                    record.name = dst.name
+                    existing.discard(src.name)
+                    existing.add(dst.name)
+                    if stage is not None:
+                        stage.add_conversion(src, dst)
+                    summary["converted"] += 1
+                    log(f"{src.suffix[1:].upper()} → JPG: {src.name}")
+                    if audit is not None:
+                        with prof.stage("audit"):
+                            audit.record(
+                                "convert", folder, src.name, dst.name, key, record.view, record.seq,
+                                size_in, os.stat(dst).st_size, seconds * 1000,
+                            )
+
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total_to_process)
+
+                pending[key] -= 1
+                if pending[key] == 0:
+                    commit(key, held.pop(key))
+        # tempo reale del pool (comprende le rinomine fatte nel frattempo)
+        prof.add("convert", time.perf_counter() - convert_t0, len(to_convert))
+
+    if group_callback:
+        group_callback("")  # reset
+
+    if stage is not None:
+        # tutti i dati su disco in un passaggio, poi i rename nella destinazione
+        with prof.stage("sync", len(stage)):
+            stage.sync()
+            if manifest is not None:
+                # manifest su disco prima del journal: dopo la pubblicazione è già coerente
+                manifest.prune(taken)
+                manifest.save(sync=True)
+        with prof.stage("publish", len(stage)):
+            published = stage.publish()
+        if audit is not None:
+            audit.release()
+        if published:
+            log(f"[INFO] Pubblicati {published} file in {target}")
+
+    # ---- STADIO 4: derivati ----
+    if derivatives and not dry_run:
+        with prof.stage("derivatives", len(masters)):
+            build_derivatives(masters, derivatives, workers, summary, log)
+
+    if summary["converted"] or summary["passthrough"]:
+        log(f"[INFO] Ricodificate: {summary['converted']} · senza ricodifica: {summary['passthrough']}")
+
+    if manifest is not None and not dry_run:
+        with prof.stage("manifest"):
+            manifest.prune(taken)
+            manifest.save()
+
+    log("[OK] Rinomina completata.")
+
+    return summary
+
+
+def convert_folder(profile, folder, workers=None, log_callback=None):
+    """Converte in JPG le immagini di `folder` senza rinominarle.
+
+    Base di convert_all_to_jpg negli script adidas / New Balance: i file
+    che sono già JPEG RGB diventano .jpg con un rename, gli altri vengono
+    convertiti nel pool (risultati nell'ordine dei file) e l'originale si
+    elimina solo se il JPEG è stato scritto. Un sorgente il cui .jpg esiste
+    già, o è già destinazione di un altro sorgente, resta dov'è.
+    Ritorna il riepilogo (dict) della cartella.
+    """
+    log = log_callback or _quiet
+    folder = Path(folder)
+    summary = new_summary(folder)
+    inventory = scan_folder(folder)
+    taken = set(inventory.names())
+    jobs = []
+    for f in inventory.files(profile.extensions):
+        if f.suffix == ".jpg":
+            continue
+        dst = f.path.with_suffix(".jpg")
+        if dst.name in taken:
+            log(f"[WARN] Esiste già {dst.name}, salto conversione di {f.name}")
+            summary["skipped"] += 1
+            continue
+        taken.add(dst.name)
+        if is_passthrough_jpeg(f.path):
+            error = passthrough_file(f.path, dst)
+            if error:
+                log(f"[ERROR] Conversione fallita {f.name}: {error}")
+                summary["errors"] += 1
+            else:
+                log(f"Già JPEG, senza ricodifica: {f.name}")
+                summary["passthrough"] += 1
+            continue
+        jobs.append((f.path, dst))
+
+    for src, dst, error in convert_many(jobs, workers):
+        src = Path(src)
+        error = finalize_conversion(src, dst, error)
+        if error:
+            log(f"[ERROR] Conversione fallita {src.name}: {error}")
+            summary["errors"] += 1
+        else:
+            log(f"{src.suffix[1:].upper()} → JPG: {src.name}")
+            summary["converted"] += 1
+    return summary
+
+
+# ---------- RESOCONTO STORICO (adidas / New Balance) ----------
+#
+# Gli script adidas e New Balance stampavano una riga per file con 🔄 / ❌ /
+# "Renamed:" e il numero di codici trovati; legacy_report riporta in quel
+# formato le righe del log comune, le altre passano invariate.
+
+_LEGACY_LINES = (
+    (re.compile(r"[A-Z0-9]+ → JPG: (?P<src>.+)"),
+     lambda m: f"🔄 Convertito {m['src']} → {Path(m['src']).stem}.jpg"),
+    (re.compile(r"\[ERROR\] Conversione fallita (?P<src>.+?): (?P<error>.*)"),
+     lambda m: f"❌ Errore convertendo {m['src']}: {m['error']}"),
+    (re.compile(r"\[WARN\] Esiste già (?P<dst>.+), salto conversione di (?P<src>.+)"),
+     lambda m: f"⚠️ Esiste già {m['dst']}, salto conversione di {m['src']}"),
+    (re.compile(r"\[WARN\] (?P<dst>\S+) esiste già, salto (?P<src>.+)\."),
+     lambda m: f"⚠️ WARNING: {m['dst']} esiste già, salto."),
+    (re.compile(r"   (?P<src>[^\[].*?)  →  (?P<dst>.+)"),
+     lambda m: f"Renamed: {m['src']} → {m['dst']}"),
+    (re.compile(r"\[INFO\] Codici: (?P<count>\d+).*"),
+     lambda m: f"📦 Trovati {m['count']} codici diversi"),
+)
+
+
+def legacy_report(log):
+    """Avvolge un log_callback: le righe per file tornano nel formato storico (🔄 / ❌ / Renamed)."""
+    def report(message):
+        for pattern, fmt in _LEGACY_LINES:
+            m = pattern.fullmatch(message)
+            if m is not None:
+                message = fmt(m)
+                break
+        log(message)
+    return report
@@ -0,0 +1,119 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# ---------- I/O CONCORRENTE ----------
+#
+# Sulle cartelle di rete (SMB / NFS) ogni stat, open, rename e unlink è un
+# giro di andata e ritorno col server: fatti uno dopo l'altro, il tempo del
+# run è dominato dalla latenza e non dal disco. IOExecutor tiene più
+# operazioni di metadati e letture in volo su un pool di thread limitato
+# (le chiamate di sistema rilasciano il GIL):
+#
+#   - stat dei file dello scan in parallelo (size / mtime per manifest e doppioni)
+#   - header dei sorgenti letti in anticipo (passthrough, memoria stimata)
+#   - rinomine di un piano spedite in blocco, una passata alla volta
+#   - sorgenti delle conversioni letti in anticipo (prefetch), così il
+#     worker li trova nella cache del client invece di aspettare la rete
+#
+# Con io_threads=0 (default) tutto resta sincrono come prima.
+
+DEFAULT_IO_THREADS = 0
+
+# blocchi letti dal prefetch (i byte vengono scartati: serve la cache del client)
+PREFETCH_CHUNK = 1024 * 1024
+
+
+class IOExecutor:
+    """Pool di thread per le operazioni sul filesystem; si usa anche come context manager."""
+
+    def __init__(self, threads):
+        self.threads = max(1, int(threads))
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="renamer-io")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, func, *args):
+        return self._pool.submit(func, *args)
+
+    def map(self, func, items, window=None):
+        """Come map(), con al più `window` chiamate in volo (default: 4 per thread).
+
+        I risultati escono nell'ordine di `items`; un'eccezione viene
+        rilanciata quando si arriva al suo elemento.
+        """
+        window = window or self.threads * 4
+        in_flight = deque()
+        for item in items:
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+            in_flight.append(self._pool.submit(func, item))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+def open_io(io_threads):
+    """IOExecutor da un numero di thread (0 / None = sincrono) o da un executor già aperto.
+
+    Ritorna (executor o None, True se va chiuso dal chiamante).
+    """
+    if io_threads is None or isinstance(io_threads, IOExecutor):
+        return io_threads, False
+    if int(io_threads) <= 0:
+        return None, False
+    return IOExecutor(io_threads), True
+
+
+def stat_all(io, entries):
+    """Riempie in parallelo lo stat dei FileEntry (vedi scanner.py) che non lo hanno ancora."""
+    missing = [e for e in entries if not e.has_stat]
+    for _ in io.map(_stat_entry, missing):
+        pass
+
+
+def _stat_entry(entry):
+    try:
+        entry.stat()
+    except OSError:
+        pass  # il file è sparito: lo stat verrà ritentato (e fallirà) dove serve
+
+
+def warm(path, chunk=PREFETCH_CHUNK):
+    """Legge tutto il file scartando i byte; ritorna i byte letti (0 se illeggibile)."""
+    total = 0
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while True:
+                n = len(f.read(chunk))
+                if not n:
+                    break
+                total += n
+    except OSError:
+        return 0
+    return total
+
+
+def rename_batch(io, pairs):
+    """Esegue tutti i rename indipendenti di `pairs` in parallelo.
+
+    Ritorna (rename riusciti, primo errore o None): chi chiama decide se
+    annullare quelli riusciti.
+    """
+    futures = [(src, dst, io.submit(os.rename, src, dst)) for src, dst in pairs]
+    done = []
+    error = None
+    for src, dst, future in futures:
+        try:
+            future.result()
+            done.append((src, dst))
+        except OSError as e:
+            if error is None:
+                error = e
+    return done, error
@@ -0,0 +1,134 @@
+import heapq
+import pickle
+import tempfile
+from itertools import groupby
+from operator import attrgetter
+
+# record tenuti in memoria prima di ordinare il blocco e scriverlo su disco
+GROUP_CHUNK = 200_000
+
+# record per ogni pickle.dump nei file temporanei
+_SPILL_BATCH = 4096
+
+
+class GroupRecord:
+    """Un file in attesa di rinomina: solo nome (str), chiave, vista e sequenza."""
+
+    __slots__ = ("key", "name", "view", "seq", "convert")
+
+    def __init__(self, key, name, view=None, seq=0, convert=False):
+        self.key = key
+        self.name = name
+        self.view = view
+        self.seq = seq
+        self.convert = convert
+
+    def __reduce__(self):
+        return GroupRecord, (self.key, self.name, self.view, self.seq, self.convert)
+
+
+class GroupStats:
+    """Statistiche raccolte mentre i record vengono aggiunti (nessuna passata in più)."""
+
+    def __init__(self):
+        self.files = 0
+        self.convert = 0
+        self.per_key = {}          # chiave → file
+        self.convert_per_key = {}  # chiave → file da convertire
+        self.variants = {}         # variante del nome → file
+
+    @property
+    def keys(self):
+        return len(self.per_key)
+
+    def largest(self):
+        """(chiave, file) della chiave con più immagini, o None."""
+        if not self.per_key:
+            return None
+        return max(self.per_key.items(), key=lambda item: item[1])
+
+
+class StreamGrouper:
+    """Raggruppa i record per chiave senza un dict di liste per tutta la cartella.
+
+    I record arrivano in un ordine qualsiasi; ogni blocco di `chunk_size`
+    viene ordinato per (chiave, ordine) e, se la cartella non ci sta in un
+    blocco solo, scritto su un file temporaneo. `groups()` unisce i blocchi
+    (heapq.merge) e restituisce una chiave alla volta, già ordinata.
+
+    Su disco vanno solo i record di raggruppamento: l'elenco della cartella
+    e i nomi letti restano in memoria nel chiamante (engine._run_folder),
+    quindi il picco si riduce ma non è limitato da `chunk_size`.
+    """
+
+    def __init__(self, order=None, chunk_size=None, tmp_dir=None):
+        self.order = order
+        self.chunk_size = chunk_size or GROUP_CHUNK
+        self.tmp_dir = tmp_dir
+        self.stats = GroupStats()
+        self._chunk = []
+        self._runs = []
+
+    def _sort_key(self, record):
+        if self.order is None:
+            return record.key, record.name
+        return record.key, self.order(record)
+
+    def add(self, record, variant=None):
+        stats = self.stats
+        stats.files += 1
+        stats.per_key[record.key] = stats.per_key.get(record.key, 0) + 1
+        if record.convert:
+            stats.convert += 1
+            stats.convert_per_key[record.key] = stats.convert_per_key.get(record.key, 0) + 1
+        if variant is not None:
+            stats.variants[variant] = stats.variants.get(variant, 0) + 1
+
+        self._chunk.append(record)
+        if len(self._chunk) >= self.chunk_size:
+            self._spill()
+
+    @property
+    def spilled(self):
+        """Numero di blocchi scritti su disco."""
+        return len(self._runs)
+
+    def _spill(self):
+        self._chunk.sort(key=self._sort_key)
+        f = tempfile.TemporaryFile(prefix="renamer-group-", dir=self.tmp_dir)
+        chunk = self._chunk
+        for i in range(0, len(chunk), _SPILL_BATCH):
+            pickle.dump(chunk[i:i + _SPILL_BATCH], f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.seek(0)
+        self._runs.append(f)
+        self._chunk = []
+
+    @staticmethod
+    def _read_run(f):
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+    def groups(self):
+        """Genera (chiave, [record]) in ordine di chiave; ogni lista è già ordinata."""
+        self._chunk.sort(key=self._sort_key)
+        if self._runs:
+            stream = heapq.merge(
+                self._chunk, *(self._read_run(f) for f in self._runs), key=self._sort_key
+            )
+        else:
+            stream = iter(self._chunk)
+        try:
+            for key, records in groupby(stream, key=attrgetter("key")):
+                yield key, list(records)
+        finally:
+            self.close()
+
+    def close(self):
+        for f in self._runs:
+            f.close()
+        self._runs = []
+        self._chunk = []
@@ -0,0 +1,223 @@
+"""Entry point da riga di comando, senza GUI.
+
+    python main.py nike /path/to/assets --workers 8 --dry-run
+    python main.py adidas /path/to/shoot --recursive
+    python main.py rollback /path/to/audit.csv
+
+Su stdout scrive uno stream JSON-lines di eventi (log, progress, article)
+chiuso da un evento "stats" con i riepiloghi. Non importa tkinter.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+from dedup import DEDUP_MODES, DEFAULT_DEDUP
+from fsio import DEFAULT_IO_THREADS
+from manifest import DEFAULT_USE_MANIFEST
+from profiles import PROFILES
+from recursive import DEFAULT_PARALLEL_DIRS
+
+# livello dell'evento in base al prefisso del messaggio di log
+LEVELS = (
+    ("[ERROR]", "error"),
+    ("❌", "error"),
+    ("[WARN]", "warning"),
+    ("⚠️", "warning"),
+    ("[SKIP]", "skip"),
+    ("[DUP]", "skip"),
+)
+
+# intervallo minimo tra due eventi "progress"
+PROGRESS_INTERVAL_S = 0.5
+
+
+class EventWriter:
+    """Scrive un evento JSON per riga; thread-safe."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+        self._last_progress = 0.0
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def log(self, message):
+        text = message.strip()
+        if not text:
+            return
+        level = "info"
+        for prefix, name in LEVELS:
+            if text.startswith(prefix):
+                level = name
+                break
+        self.emit("log", level=level, message=text)
+
+    def progress(self, done, total):
+        now = time.monotonic()
+        if done < total and now - self._last_progress < PROGRESS_INTERVAL_S:
+            return
+        self._last_progress = now
+        self.emit("progress", done=done, total=total)
+
+    def article(self, article_code):
+        if article_code:
+            self.emit("article", article=article_code)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="images-renamer",
+        description="Converte e rinomina le immagini di prodotto (output JSON-lines).",
+    )
+    parser.add_argument("brand", choices=sorted(PROFILES), help="profilo brand")
+    parser.add_argument("folder", help="cartella con le immagini")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processi per la conversione (default: tutti i core)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="pianifica conversioni e rinomine senza toccare il disco")
+    parser.add_argument("--recursive", action="store_true",
+                        help="elabora anche tutte le sottocartelle")
+    parser.add_argument("--parallel-dirs", type=int, default=DEFAULT_PARALLEL_DIRS,
+                        help="cartelle elaborate in parallelo con --recursive")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="memoria stimata massima per le conversioni contemporanee")
+    parser.add_argument("--derivatives", default=None, metavar="SPEC",
+                        help='formati web da generare, es. "2000,1000,thumb=300"')
+    parser.add_argument("--calibrate", action="store_true",
+                        help="con --dry-run misura la velocità di conversione su alcuni file")
+    parser.add_argument("--audit", default=None, metavar="PATH",
+                        help="registro di conversioni e rinomine (.csv o .jsonl)")
+    parser.add_argument("--keep-originals", action="store_true",
+                        help="conserva gli originali convertiti (per poter annullare con rollback)")
+    parser.add_argument("--io-threads", type=int, default=DEFAULT_IO_THREADS, metavar="N",
+                        help="thread per stat, rinomine e letture anticipate in parallelo "
+                             "(cartelle di rete SMB / NFS; 0 = sincrono)")
+    parser.add_argument("--staged", action="store_true",
+                        help="scrive conversioni e rinomine in un'area di staging e le pubblica "
+                             "a fine cartella con rename atomici (sorgenti eliminati solo dopo)")
+    parser.add_argument("--output-dir", default=None, metavar="PATH",
+                        help="pubblica i file finali in questa cartella invece che in quella "
+                             "elaborata (implica --staged)")
+    parser.add_argument("--dedup", choices=DEDUP_MODES, default=DEFAULT_DEDUP,
+                        help="doppioni esclusi dalla numerazione: per contenuto (exact) o anche "
+                             "per somiglianza su una decodifica ridotta (perceptual); default: off")
+    parser.add_argument("--manifest", dest="manifest", action="store_true", default=DEFAULT_USE_MANIFEST,
+                        help="tiene un manifest per cartella e ai run successivi salta i file già "
+                             "elaborati (scrive .renamer_manifest.jsonl nella cartella)")
+    parser.add_argument("--no-manifest", dest="manifest", action="store_false",
+                        help="non usa né aggiorna il manifest (default)")
+    parser.add_argument("--profile", nargs="?", const="1", default=None, metavar="MODES",
+                        help='tempi per fase a fine run; MODES: "cprofile", "tracemalloc" '
+                             "(default: variabile RENAMER_PROFILE)")
+    parser.add_argument("--profile-out", default=None, metavar="PATH",
+                        help="salva le statistiche cProfile (con --profile cprofile)")
+    return parser
+
+
+def run(args, out=sys.stdout):
+    writer = EventWriter(out)
+    if args.memory_budget:
+        import converter
+        converter.shared_budget.limit = args.memory_budget * 1024 ** 2
+    from engine import run_profile
+    from profiling import Profiler
+
+    profiler = Profiler.from_env(args.profile)
+    kwargs = {
+        "workers": args.workers,
+        "recursive": args.recursive,
+        "parallel_dirs": args.parallel_dirs,
+        "use_manifest": args.manifest,
+        "dry_run": args.dry_run,
+        "log_callback": writer.log,
+        "progress_callback": writer.progress,
+        "group_callback": writer.article,
+        "audit": args.audit,
+        "keep_originals": args.keep_originals,
+        "dedup": args.dedup,
+        "io_threads": args.io_threads,
+        "staged": args.staged,
+        "output_dir": args.output_dir,
+        "profiling": profiler,
+    }
+    if args.dry_run and args.calibrate:
+        from costmodel import CostModel, sample_paths
+        profile = PROFILES[args.brand]
+        kwargs["cost_model"] = CostModel.calibrate(
+            sample_paths(args.folder, profile.extensions, recursive=args.recursive)
+        )
+    if args.derivatives:
+        from converter import parse_derivative_specs
+        kwargs["derivatives"] = parse_derivative_specs(args.derivatives)
+
+    writer.emit("start", brand=args.brand, folder=args.folder, dry_run=args.dry_run)
+    started = time.perf_counter()
+    try:
+        result = run_profile(PROFILES[args.brand], args.folder, **kwargs)
+    except Exception as e:
+        writer.emit("error", message=str(e))
+        return 1
+
+    if args.profile_out:
+        profiler.dump_cprofile(args.profile_out)
+
+    summaries = result if isinstance(result, list) else [result]
+    totals = {}
+    for s in summaries:
+        for key, value in s.items():
+            if isinstance(value, int):
+                totals[key] = totals.get(key, 0) + value
+    extra = {"profile": profiler.as_dict()} if profiler.enabled else {}
+    writer.emit(
+        "stats",
+        elapsed_s=round(time.perf_counter() - started, 3),
+        totals=totals,
+        folders=summaries,
+        **extra,
+    )
+    return 1 if totals.get("errors") else 0
+
+
+def build_rollback_parser():
+    parser = argparse.ArgumentParser(
+        prog="images-renamer rollback",
+        description="Annulla un run a partire dal registro scritto con --audit.",
+    )
+    parser.add_argument("audit", help="registro .csv o .jsonl")
+    parser.add_argument("--run", default=None, help="id del run (default: l'ultimo)")
+    parser.add_argument("--dry-run", action="store_true", help="mostra cosa verrebbe annullato")
+    return parser
+
+
+def run_rollback(args, out=sys.stdout):
+    from rollback import rollback_run
+
+    writer = EventWriter(out)
+    writer.emit("start", command="rollback", audit=args.audit, dry_run=args.dry_run)
+    started = time.perf_counter()
+    try:
+        summaries = rollback_run(args.audit, run=args.run, log_callback=writer.log,
+                                 dry_run=args.dry_run)
+    except Exception as e:
+        writer.emit("error", message=str(e))
+        return 1
+    writer.emit("stats", elapsed_s=round(time.perf_counter() - started, 3), folders=summaries)
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "rollback":
+        return run_rollback(build_rollback_parser().parse_args(argv[1:]))
+    args = build_parser().parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
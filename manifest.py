@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# file (nascosto) salvato in ogni cartella elaborata
+MANIFEST_NAME = ".renamer_manifest.jsonl"
+
+# il manifest è su richiesta (--manifest / USE_MANIFEST nei brand): senza,
+# nessun file viene scritto nelle cartelle e ogni run rinumera da capo
+DEFAULT_USE_MANIFEST = False
+
+# dimensione dei blocchi letti per l'hash
+HASH_CHUNK = 1024 * 1024
+
+
+def file_hash(path) -> str:
+    """Hash BLAKE2b del contenuto, letto a blocchi."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stat_and_hash(path):
+    return os.stat(path), file_hash(path)
+
+
+class Manifest:
+    """Registro JSON-lines dei file già elaborati in una cartella.
+
+    Una riga per file con nome finale, nome originale, dimensione, mtime,
+    hash del contenuto, chiave (prefisso / articolo) e indice. Le nuove
+    righe vengono aggiunte in coda; a parità di nome vale l'ultima.
+    """
+
+    def __init__(self, folder):
+        self.folder = Path(folder)
+        self.path = self.folder / MANIFEST_NAME
+        self.records = {}
+        self._pending = []
+        self._lines = 0
+        self._rewrite = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._lines += 1
+                    self.records[record["name"]] = record
+        except FileNotFoundError:
+            pass
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def check(self, entry):
+        """Controlla un file dell'inventario contro il manifest.
+
+        Ritorna None se il file non è mai stato elaborato, "unchanged" se
+        dimensione e mtime coincidono, "updated" se il file noto è cambiato
+        (il record viene aggiornato, il nome resta quello finale).
+        """
+        record = self.records.get(entry.name)
+        if record is None:
+            return None
+        if record["size"] == entry.size and record["mtime_ns"] == entry.mtime_ns:
+            return "unchanged"
+
+        # dimensione o mtime diversi: decide l'hash
+        digest = file_hash(entry.path)
+        self._store(dict(record, size=entry.size, mtime_ns=entry.mtime_ns, hash=digest))
+        return "unchanged" if digest == record["hash"] else "updated"
+
+    def next_index(self, key) -> int:
+        """Primo indice libero per un prefisso / articolo già elaborato."""
+        indexes = [r["index"] for r in self.records.values() if r.get("key") == key]
+        return max(indexes) + 1 if indexes else 0
+
+    def record(self, path, source, key, index, stat=None, digest=None):
+        """Registra un file arrivato al suo nome finale."""
+        path = Path(path)
+        if stat is None:
+            stat = os.stat(path)
+        self._store({
+            "name": path.name,
+            "source": source,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest or file_hash(path),
+            "key": key,
+            "index": index,
+        })
+
+    def record_many(self, items, io=None):
+        """Registra più file: items = [(path, source, key, index), ...].
+
+        Con un `io` (fsio.IOExecutor) stat e hash vengono letti in parallelo.
+        """
+        if io is None:
+            for path, source, key, index in items:
+                self.record(path, source, key, index)
+            return
+        infos = io.map(_stat_and_hash, [path for path, _, _, _ in items])
+        for (path, source, key, index), (stat, digest) in zip(items, infos):
+            self.record(path, source, key, index, stat, digest)
+
+    def _store(self, record):
+        self.records[record["name"]] = record
+        self._pending.append(record)
+
+    def prune(self, names):
+        """Dimentica i file che non sono più nella cartella."""
+        names = set(names)
+        for name in [n for n in self.records if n not in names]:
+            del self.records[name]
+            self._rewrite = True
+
+    def save(self, sync=False):
+        """Aggiunge le righe nuove; se le righe superate sono troppe, compatta.
+
+        Con sync=True il file viene portato su disco (fsync) prima di tornare.
+        """
+        if not self._pending and not self._rewrite:
+            return
+        stale = self._lines + len(self._pending) - len(self.records)
+        if self._rewrite or stale > len(self.records) or not self._lines:
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in self.records.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._lines = len(self.records)
+            self._rewrite = False
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in self._pending:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._lines += len(self._pending)
+        self._pending = []
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+from PIL import Image
+
+from converter import JPEG_QUALITY, flatten_to_rgb, master_pixel_limit
+from dedup import DEFAULT_DEDUP
+from engine import run_profile
+from fsio import DEFAULT_IO_THREADS
+from manifest import DEFAULT_USE_MANIFEST
+from profiles import NIKE, NIKE_EXTS, VIEW_ORDER, parse_filename  # noqa: F401 (API storica)
+from recursive import DEFAULT_PARALLEL_DIRS
+
+# ---------- LOGICA FILE ----------
+#
+# Parsing dei nomi e ordine delle viste sono nel profilo NIKE (profiles.py);
+# la pipeline è quella comune in engine.py.
+
+def convert_png_to_jpg(img_path: Path, log_callback=None) -> Path:
+    """Converte PNG in JPG con sfondo bianco e ritorna il nuovo path."""
+    new_path = img_path.with_suffix(".jpg")
+
+    if log_callback:
+        log_callback(f"PNG → JPG: {img_path.name}")
+
+    with master_pixel_limit(), Image.open(img_path) as img:
+        rgb = flatten_to_rgb(img)
+        img.close()
+    rgb.save(new_path, "JPEG", quality=JPEG_QUALITY)
+
+    img_path.unlink()
+    return new_path
+
+
+def rename_nike_images(folder, log_callback=None, progress_callback=None, article_callback=None,
+                       workers=None, recursive=False, parallel_dirs=DEFAULT_PARALLEL_DIRS,
+                       use_manifest=DEFAULT_USE_MANIFEST, dry_run=False, derivatives=None, cost_model=None,
+                       audit=None, keep_originals=False, dedup=DEFAULT_DEDUP,
+                       io_threads=DEFAULT_IO_THREADS, staged=False, output_dir=None):
+    """
+    Converte e rinomina le immagini Nike di `folder` (vedi engine.run_profile).
+
+    progress_callback(done, total)   – total = conversioni + rinomine
+    article_callback(article_code)   – chiamato quando un articolo viene completato
+
+    Con dry_run=True pianifica senza toccare il disco e stima i costi
+    (`cost_model`: vedi costmodel.CostModel). `audit` (path .csv / .jsonl
+    o AuditSink) registra conversioni e rinomine; con keep_originals=True
+    gli originali convertiti vengono conservati. `dedup` esclude i doppioni
+    dalla numerazione (vedi dedup.py); `io_threads` sovrappone le
+    operazioni sul filesystem per le cartelle di rete (vedi fsio.py).
+    Con staged=True (o un `output_dir`) i file finali vengono pubblicati
+    tutti insieme a fine cartella (vedi staging.py).
+
+    Ritorna il riepilogo della cartella (dict); con recursive=True elabora
+    tutte le sottocartelle e ritorna la lista dei riepiloghi.
+    """
+    return run_profile(
+        NIKE,
+        folder,
+        log_callback=log_callback,
+        progress_callback=progress_callback,
+        group_callback=article_callback,
+        workers=workers,
+        recursive=recursive,
+        parallel_dirs=parallel_dirs,
+        use_manifest=use_manifest,
+        dry_run=dry_run,
+        derivatives=derivatives,
+        cost_model=cost_model,
+        audit=audit,
+        keep_originals=keep_originals,
+        dedup=dedup,
+        io_threads=io_threads,
+        staged=staged,
+        output_dir=output_dir,
+    )
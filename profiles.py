@@ -0,0 +1,237 @@
+import re
+from pathlib import Path
+
+# ---------- PROFILI BRAND ----------
+#
+# Un brand è solo una dichiarazione: come si estrae la chiave (prefisso /
+# articolo) dal nome, in che ordine vanno le viste e come si chiama il file
+# finale. Scan, conversione, rinomina, manifest e derivati sono in engine.py
+# e sono gli stessi per tutti.
+
+# ordine delle viste Nike
+VIEW_ORDER = {
+    "PHCFH": 0,  # FRONT
+    "PHSLH": 1,  # LEFT
+    "PHSRH": 2,  # RIGHT
+    "PHCBH": 3,  # BACK
+    "PHSTH": 4,  # TOP
+    "PHSUH": 5,  # SOLE
+    "PHSYD": 6,  # DETAILS / ZOOM
+}
+
+# estensioni gestite dalla pipeline Nike
+NIKE_EXTS = {".jpg", ".jpeg", ".png"}
+
+# estensioni gestite da adidas / New Balance (convertite tutte in JPG)
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp"}
+
+# nome finale di default: ABC123-00.jpg, ABC123-01.jpg, ...
+DEFAULT_TEMPLATE = "{key}-{index:02d}.jpg"
+
+_DIGITS = re.compile(r"\d")
+
+
+def _seq_number(seq):
+    """Numero di sequenza: le cifre prima del primo "-" (gli altri caratteri sono ignorati)."""
+    if not seq:
+        return 0
+    if seq.isdigit():
+        return int(seq)
+    digits = "".join(_DIGITS.findall(seq.split("-", 1)[0]))
+    return int(digits) if digits else 0
+
+
+_GROUP_NAME = re.compile(r"\(\?P([<=])(\w+)")
+
+
+def _combine(patterns):
+    """Unisce le varianti in una sola regex alternata (una passata per nome).
+
+    Ogni variante diventa un gruppo `_vN` con i suoi gruppi rinominati
+    `nome_N`; la variante che ha combaciato è `m.lastgroup`. Ritorna la
+    regex e {"_vN": (variante, idx key, idx view, idx seq)}.
+    """
+    branches = []
+    for i, (_, regex) in enumerate(patterns):
+        body = _GROUP_NAME.sub(lambda m: f"(?P{m.group(1)}{m.group(2)}_{i}", regex.pattern)
+        branches.append(f"(?P<_v{i}>{body})")
+    combined = re.compile("|".join(branches))
+
+    index = combined.groupindex
+    variants = {}
+    for i, (variant, regex) in enumerate(patterns):
+        if "key" not in regex.groupindex:
+            raise ValueError(f"la variante {variant!r} non ha il gruppo 'key'")
+        variants[f"_v{i}"] = (
+            variant, index[f"key_{i}"], index.get(f"view_{i}", 0), index.get(f"seq_{i}", 0)
+        )
+    return combined, variants
+
+
+class BrandProfile:
+    """Descrizione dichiarativa di un brand.
+
+    - `pattern`: regex applicata allo stem del file; il gruppo `key` è
+      obbligatorio, `view` e `seq` sono opzionali. Al posto di una sola
+      regex si può passare una lista di varianti [(nome, regex), ...]:
+      vengono provate in ordine e vince la prima. Le regex sono compilate
+      una volta sola e ancorate all'inizio del nome.
+      In alternativa `parser(path)` → (key, view, seq) o None.
+    - `key_transform`: funzione applicata alla chiave (es. str.upper).
+    - `view_order`: {view: posizione}; senza, i file di una chiave vengono
+      ordinati per nome.
+    - `template`: nome finale, con i campi {key} e {index}.
+    - `extensions`: estensioni lette; tutto ciò che non è .jpg viene
+      convertito (o rinominato, se è già un JPEG).
+    """
+
+    def __init__(self, name, pattern=None, parser=None, key_transform=None, view_order=None,
+                 template=DEFAULT_TEMPLATE, extensions=IMAGE_EXTS, label=None):
+        if (pattern is None) == (parser is None):
+            raise ValueError("serve esattamente uno tra pattern e parser")
+        if isinstance(pattern, str):
+            pattern = [("default", pattern)]
+        self.name = name
+        self.label = label or name
+        self.patterns = [(variant, re.compile(regex)) for variant, regex in pattern or ()]
+        self._regex, self._variants = _combine(self.patterns) if self.patterns else (None, {})
+        self.parser = parser
+        self.key_transform = key_transform
+        self.view_order = view_order
+        self.template = template
+        self.extensions = frozenset(extensions)
+
+    def __repr__(self):
+        return f"BrandProfile({self.name!r})"
+
+    def match(self, stem):
+        """Ritorna (variante, key, view, seq) oppure None se il nome non è riconosciuto."""
+        m = self._regex.match(stem)
+        if m is None:
+            return None
+        variant, key_idx, view_idx, seq_idx = self._variants[m.lastgroup]
+        key = m.group(key_idx)
+        if self.key_transform is not None:
+            key = self.key_transform(key)
+        if not key:
+            return None
+        view = m.group(view_idx) if view_idx else None
+        seq = m.group(seq_idx) if seq_idx else None
+        return variant, key, view, _seq_number(seq)
+
+    def identify(self, path: Path):
+        """Come match() ma su un path; con un `parser` la variante è "parser"."""
+        if self.parser is None:
+            return self.match(path.stem)
+        found = self.parser(path)
+        return ("parser", *found) if found else None
+
+    def parse(self, path: Path):
+        """Ritorna (key, view, seq) oppure None se il nome non è riconosciuto."""
+        found = self.identify(path)
+        return found[1:] if found else None
+
+    def classify(self, names):
+        """Classifica molti nomi di file in una sola chiamata.
+
+        Ritorna una lista allineata a `names` con (variante, key, view, seq)
+        o None.
+        """
+        if self.parser is not None:
+            return [self.identify(Path(name)) for name in names]
+
+        # stesso lavoro di match(), con tutto in variabili locali
+        regex_match = self._regex.match
+        variants = self._variants
+        transform = self.key_transform
+        results = []
+        append = results.append
+        for name in names:
+            dot = name.rfind(".")
+            m = regex_match(name[:dot] if dot > 0 else name)
+            if m is None:
+                append(None)
+                continue
+            variant, key_idx, view_idx, seq_idx = variants[m.lastgroup]
+            key = m.group(key_idx)
+            if transform is not None:
+                key = transform(key)
+                if not key:
+                    append(None)
+                    continue
+            seq = m.group(seq_idx) if seq_idx else ""
+            append((
+                variant,
+                key,
+                m.group(view_idx) if view_idx else None,
+                int(seq) if seq.isdigit() else _seq_number(seq),
+            ))
+        return results
+
+    def sort_key(self, record):
+        """Ordine dei file dentro una chiave."""
+        if self.view_order is None:
+            return (0, 0, record.name)
+        return (self.view_order.get(record.view, 99), record.seq, record.name)
+
+    def output_name(self, key, index):
+        return self.template.format(key=key, index=index)
+
+
+# ---------- NIKE ----------
+#
+# Varianti dei nomi Nike, provate in ordine (la prima che combacia vince):
+#   asset    AURORA_415445-101_PHCFH001-2000    prefisso asset qualsiasi, taglia opzionale
+#   detail   AURORA_415445-101_PHSYD_002-2000   dettagli con sequenza separata
+#   bare     415445-101_PHCFH001-2000           senza prefisso asset
+#   loose    X_ARTICOLO_PH...                   regola storica: 3° campo che inizia per PH,
+#                                               cifre della sequenza prima del primo "-"
+NIKE_PATTERNS = [
+    ("asset", r"(?P<prefix>[^_]*)_(?P<key>[^_]+)_(?P<view>PH[A-Z]{3})(?P<seq>\d+)(?:[-_](?P<size>\d+))?$"),
+    ("detail", r"(?P<prefix>[^_]*)_(?P<key>[^_]+)_(?P<view>PHSYD)[-_](?P<seq>\d+)(?:-(?P<size>\d+))?$"),
+    ("bare", r"(?P<key>[A-Z0-9]{6}-\d{3})_(?P<view>PH[A-Z]{3})(?P<seq>\d*)(?:[-_](?P<size>\d+))?$"),
+    ("loose", r"[^_]*_(?P<key>[^_]+)_(?P<view>PH[^_]{0,3})(?P<seq>[^_]*)"),
+]
+
+NIKE = BrandProfile(
+    "nike",
+    pattern=NIKE_PATTERNS,
+    view_order=VIEW_ORDER,
+    extensions=NIKE_EXTS,
+    label="Nike",
+)
+
+
+def parse_filename(path: Path):
+    """
+    AURORA_415445-101_PHCFH001-2000.png
+             ^^^^^^^^ articolo
+                       ^^^^^ view_code
+    Ritorna (articolo, view_code, seq) oppure None (vedi NIKE_PATTERNS).
+    """
+    return NIKE.parse(path)
+
+
+# ---------- ADIDAS / NEW BALANCE ----------
+
+ADIDAS = BrandProfile(
+    "adidas",
+    pattern=r"(?P<key>.{1,6})",
+    label="adidas",
+)
+
+NEW_BALANCE = BrandProfile(
+    "newbalance",
+    pattern=r"(?P<key>.{1,7})",
+    key_transform=str.upper,  # <<< NEW BALANCE + CAPS
+    label="New Balance",
+)
+
+PROFILES = {p.name: p for p in (NIKE, ADIDAS, NEW_BALANCE)}
+
+
+def get_profile(name) -> BrandProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"profilo sconosciuto: {name} (disponibili: {', '.join(sorted(PROFILES))})")
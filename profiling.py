@@ -0,0 +1,294 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+# ---------- STRUMENTAZIONE PER STADIO ----------
+#
+# Tempi e contatori delle fasi di un run (scan, parsing, decode, alpha,
+# encode, rinomine, log, ...), con un istogramma delle latenze per fase.
+# Si attiva con run_profile(profiling=...) / `main.py --profile` oppure con
+# la variabile d'ambiente RENAMER_PROFILE:
+#
+#   RENAMER_PROFILE=1                      tempi e contatori
+#   RENAMER_PROFILE=cprofile               + cProfile (thread principale)
+#   RENAMER_PROFILE=tracemalloc            + picco e siti di allocazione
+#   RENAMER_PROFILE=cprofile,tracemalloc   entrambi
+#
+# Da spento il profiler è DISABLED: stage() ritorna sempre lo stesso
+# context manager vuoto e add()/count() non fanno nulla; i punti per file
+# controllano `enabled` prima di misurare.
+#
+# decode / flatten / encode sono misurati nei processi di conversione e
+# sommati qui; cProfile e tracemalloc vedono solo il processo principale.
+
+PROFILE_ENV = "RENAMER_PROFILE"
+
+MODES = ("stats", "cprofile", "tracemalloc")
+
+# righe di cProfile / tracemalloc riportate nel riepilogo
+PROFILE_TOP = 15
+TRACEMALLOC_TOP = 10
+
+# ordine delle fasi nella tabella (le altre seguono in ordine di arrivo)
+STAGE_ORDER = (
+    "recover", "scan", "stat", "manifest", "group", "dedup", "convert", "decode", "flatten", "encode",
+    "finalize", "rename", "audit", "sync", "publish", "derivatives", "log",
+)
+
+
+def parse_modes(value):
+    """ "1" / "cprofile,tracemalloc" / True → insieme di modalità (vuoto = spento)."""
+    if value is None or value is False:
+        return set()
+    if value is True:
+        return {"stats"}
+    modes = {"stats"}
+    for part in filter(None, (p.strip().lower() for p in str(value).split(","))):
+        if part in ("0", "off", "no", "false"):
+            return set()
+        if part in MODES:
+            modes.add(part)
+        elif part not in ("1", "on", "yes", "true"):
+            raise ValueError(f"modalità di profiling sconosciuta: {part}")
+    return modes
+
+
+class StageStats:
+    """Tempi di una fase: osservazioni, elementi, totale e istogramma log2 in µs."""
+
+    __slots__ = ("calls", "items", "total", "max", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.items = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = {}
+
+    def add(self, seconds, items=1):
+        self.calls += 1
+        self.items += items
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        # bucket b contiene le durate in [2^(b-1), 2^b) µs
+        bucket = int(seconds * 1_000_000).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q):
+        """Limite superiore (in secondi) del bucket che contiene il quantile q."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min((1 << bucket) / 1_000_000, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "items": self.items,
+            "total_s": round(self.total, 6),
+            "max_ms": round(self.max * 1000, 3),
+            "p50_ms": round(self.percentile(0.5) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "histogram_us": {str(1 << b): n for b, n in sorted(self.buckets.items())},
+        }
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "items", "t0")
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.t0, self.items)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profiler:
+    """Raccoglie tempi per fase e contatori di un run; thread-safe.
+
+    with profiler.stage("scan"): ...         misura un blocco
+    profiler.add("encode", secondi)          durata misurata altrove (worker)
+    profiler.count("passthrough")            contatore
+    profiler.wrap("log", log_callback)       misura ogni chiamata di una funzione
+    """
+
+    def __init__(self, modes=("stats",)):
+        self.modes = set(modes)
+        self.enabled = bool(self.modes)
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._started = None
+        self._elapsed = 0.0
+        self._cprofile = None
+        self._tracemalloc = False
+        self._peak = None
+        self._allocations = []
+        self._hotspots = []
+
+    @classmethod
+    def from_env(cls, value=None):
+        """Profiler dalle modalità indicate o da RENAMER_PROFILE; DISABLED se spento."""
+        modes = parse_modes(os.environ.get(PROFILE_ENV) if value is None else value)
+        return cls(modes) if modes else DISABLED
+
+    # ---- misure ----
+
+    def stage(self, name, items=1):
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name, items)
+
+    def add(self, name, seconds, items=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add(seconds, items)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def wrap(self, name, func):
+        """`func` che registra la sua durata sotto `name` (func stessa se spento)."""
+        if not self.enabled or func is None:
+            return func
+
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - t0)
+        return timed
+
+    # ---- ciclo di vita ----
+
+    @property
+    def running(self):
+        return self._started is not None
+
+    def start(self):
+        if not self.enabled or self._started is not None:
+            return
+        if "tracemalloc" in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc = True
+        if "cprofile" in self.modes:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._started is None:
+            return
+        self._elapsed += time.perf_counter() - self._started
+        self._started = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._tracemalloc:
+            # prima di formattare cProfile, che allocherebbe a sua volta
+            self._peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ))
+            self._allocations = [
+                (str(stat.traceback[0]), stat.size, stat.count)
+                for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+            ]
+            tracemalloc.stop()
+            self._tracemalloc = False
+        if self._cprofile is not None:
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            self._hotspots = [line for line in out.getvalue().splitlines() if line.strip()]
+
+    def dump_cprofile(self, path):
+        """Salva le statistiche cProfile (per snakeviz / pstats)."""
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(str(path))
+
+    # ---- riepilogo ----
+
+    def _ordered(self):
+        known = [name for name in STAGE_ORDER if name in self.stages]
+        return known + [name for name in self.stages if name not in STAGE_ORDER]
+
+    def as_dict(self):
+        return {
+            "elapsed_s": round(self._elapsed, 6),
+            "stages": {name: self.stages[name].as_dict() for name in self._ordered()},
+            "counters": dict(self.counters),
+            "peak_traced_bytes": self._peak,
+        }
+
+    def report(self):
+        """Righe della tabella riassuntiva (vuota se spento)."""
+        if not self.enabled:
+            return []
+        lines = [
+            "[PROFILE] " + f"{'FASE':<12} {'N':>7} {'FILE':>7} {'TOTALE s':>9} {'%':>6} "
+            f"{'MEDIA ms':>9} {'P50 ms':>8} {'P95 ms':>8} {'MAX ms':>8}"
+        ]
+        elapsed = self._elapsed or sum(s.total for s in self.stages.values()) or 1.0
+        for name in self._ordered():
+            s = self.stages[name]
+            lines.append(
+                "[PROFILE] " + f"{name:<12} {s.calls:>7} {s.items:>7} {s.total:>9.3f} "
+                f"{s.total / elapsed:>6.1%} {s.total * 1000 / max(s.items, 1):>9.2f} "
+                f"{s.percentile(0.5) * 1000:>8.2f} {s.percentile(0.95) * 1000:>8.2f} "
+                f"{s.max * 1000:>8.2f}"
+            )
+        if self._elapsed:
+            lines.append(f"[PROFILE] Durata del run: {self._elapsed:.3f}s "
+                         "(decode/flatten/encode sommati su tutti i processi)")
+        if self.counters:
+            lines.append("[PROFILE] Contatori: " + " · ".join(
+                f"{name} {value}" for name, value in sorted(self.counters.items())))
+        if self._peak is not None:
+            lines.append(f"[PROFILE] Picco memoria Python (tracemalloc): {self._peak / 1024 ** 2:.1f} MB")
+            for where, size, count in self._allocations:
+                lines.append(f"[PROFILE]    {size / 1024:>9.1f} KB  {count:>7}  {where}")
+        for line in self._hotspots:
+            lines.append(f"[PROFILE] {line}")
+        return lines
+
+
+# profiler spento condiviso: tutte le chiamate sono no-op
+DISABLED = Profiler(modes=())
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import deque
+
+# finestra (secondi) su cui si calcola la velocità
+RATE_WINDOW_S = 5.0
+
+
+class ProgressState:
+    """Ultimo stato di avanzamento (done, total, articolo), thread-safe.
+
+    Il thread di lavoro sovrascrive lo stato a ogni file senza costi per la
+    UI; chi lo mostra lo legge con `snapshot()` alla frequenza che vuole.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = deque()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._done = 0
+            self._total = 0
+            self._article = ""
+            self._version = 0
+            self._samples.clear()
+
+    def update(self, done, total):
+        """Compatibile con progress_callback(done, total)."""
+        with self._lock:
+            self._done = done
+            self._total = total
+            self._version += 1
+
+    def set_article(self, article_code):
+        """Compatibile con article_callback(article_code)."""
+        with self._lock:
+            self._article = article_code or ""
+            self._version += 1
+
+    def snapshot(self):
+        """Ritorna un dict con done, total, article, rate (img/s), eta (s) e version."""
+        now = time.monotonic()
+        with self._lock:
+            done, total, article, version = self._done, self._total, self._article, self._version
+
+            samples = self._samples
+            if samples and done < samples[-1][1]:
+                samples.clear()  # nuovo run
+            samples.append((now, done))
+            while len(samples) > 2 and now - samples[0][0] > RATE_WINDOW_S:
+                samples.popleft()
+            t0, d0 = samples[0]
+
+        rate = (done - d0) / (now - t0) if now > t0 else 0.0
+        eta = (total - done) / rate if rate > 0 and total > done else None
+        return {
+            "done": done,
+            "total": total,
+            "article": article,
+            "rate": rate,
+            "eta": eta,
+            "version": version,
+        }
+
+
+def format_eta(seconds):
+    """Secondi → "mm:ss" (o "h:mm:ss")."""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
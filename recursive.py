@@ -0,0 +1,59 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scanner import walk_image_dirs
+
+# cartelle elaborate in parallelo in modalità ricorsiva
+DEFAULT_PARALLEL_DIRS = 4
+
+
+def _run_one(handler, folder):
+    try:
+        summary = handler(folder) or {}
+    except Exception as e:
+        summary = {"error": str(e)}
+    summary.setdefault("folder", str(folder))
+    return summary
+
+
+def process_tree(root, handler, exts, parallel_dirs=DEFAULT_PARALLEL_DIRS):
+    """Applica handler(folder) a ogni cartella dell'albero che contiene immagini.
+
+    Ogni cartella è un'unità indipendente: le cartelle vengono lette dal
+    generatore man mano e al massimo `parallel_dirs` sono in lavorazione
+    insieme, quindi la memoria dipende dalla cartella più grande e non
+    dall'albero intero. Ritorna la lista dei riepiloghi (uno per cartella).
+    """
+    parallel_dirs = max(1, int(parallel_dirs))
+    summaries = []
+    with ThreadPoolExecutor(max_workers=parallel_dirs) as pool:
+        in_flight = set()
+        for folder in walk_image_dirs(root, exts):
+            if len(in_flight) >= parallel_dirs:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                summaries.extend(f.result() for f in finished)
+            in_flight.add(pool.submit(_run_one, handler, folder))
+        summaries.extend(f.result() for f in in_flight)
+
+    summaries.sort(key=lambda s: s["folder"])
+    return summaries
+
+
+def format_summary(summaries):
+    """Righe di testo con il riepilogo per cartella."""
+    lines = [f"{'CARTELLA':<50} {'CONV':>6} {'PASS':>6} {'RINOM':>6} {'DUP':>6} {'SALT':>6} {'ERR':>6}"]
+    totals = {"converted": 0, "passthrough": 0, "renamed": 0, "duplicates": 0, "skipped": 0, "errors": 0}
+    for s in summaries:
+        for key in totals:
+            totals[key] += s.get(key, 0)
+        errors = s.get("errors", 0) + (1 if "error" in s else 0)
+        totals["errors"] += 1 if "error" in s else 0
+        lines.append(
+            f"{s['folder'][-50:]:<50} {s.get('converted', 0):>6} {s.get('passthrough', 0):>6} "
+            f"{s.get('renamed', 0):>6} {s.get('duplicates', 0):>6} {s.get('skipped', 0):>6} {errors:>6}"
+        )
+    lines.append(
+        f"{'TOTALE (' + str(len(summaries)) + ' cartelle)':<50} {totals['converted']:>6} "
+        f"{totals['passthrough']:>6} {totals['renamed']:>6} {totals['duplicates']:>6} "
+        f"{totals['skipped']:>6} {totals['errors']:>6}"
+    )
+    return lines
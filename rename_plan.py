@@ -0,0 +1,222 @@
+import json
+import os
+from pathlib import Path
+
+from fsio import rename_batch
+
+# prefisso dei nomi temporanei usati nella prima passata
+TEMP_PREFIX = ".renamer-tmp-"
+
+# file (nascosto) con gli spostamenti su nomi temporanei in corso, per
+# riprendere dopo un'interruzione (vedi recover_intents)
+INTENT_NAME = ".renamer_intent.jsonl"
+
+
+class RenamePlan:
+    """Mappa vecchio → nuovo nome di una cartella, verificata in memoria.
+
+    - moves:      lista di (src, dst) da applicare
+    - collisions: lista di (src, dst, motivo) scartati
+    - cycles:     numero di cicli trovati (es. A → B, B → A)
+    - accepted:   lista di (src, dst) accettati, compresi quelli già al nome giusto
+    """
+
+    def __init__(self, folder, moves, collisions, cycles, existing, accepted=None):
+        self.folder = Path(folder)
+        self.moves = moves
+        self.collisions = collisions
+        self.cycles = cycles
+        self.existing = existing
+        self.accepted = accepted if accepted is not None else list(moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def build_plan(folder, mapping, existing_names, external=False):
+    """Costruisce il piano di rinomina senza toccare il disco.
+
+    mapping:        lista ordinata di (src: Path, new_name: str)
+    existing_names: nomi presenti nella cartella (dallo scan già fatto)
+
+    A parità di destinazione vince il primo src della lista; un nome
+    occupato da un file che resta al suo posto è una collisione.
+    Con external=True i src stanno in un'altra cartella (output_dir):
+    ogni voce è uno spostamento e i nomi dei src non occupano `folder`.
+    """
+    folder = Path(folder)
+    existing = set(existing_names)
+
+    moves = []
+    collisions = []
+    targets = set()
+    resolved = []
+    for src, new_name in mapping:
+        if not external:
+            existing.add(src.name)
+        dst = folder / new_name
+        resolved.append((src, dst))
+        if new_name in targets:
+            collisions.append((src, dst, "destinazione duplicata"))
+            continue
+        targets.add(new_name)
+        if external or src.name != new_name:
+            moves.append((src, dst))
+
+    # scarta chi punta a un file che non si sposta; ogni scarto lascia
+    # un altro file al suo posto, quindi si ripete fino a stabilità
+    while True:
+        staying = existing if external else existing - {src.name for src, _ in moves}
+        blocked = [(src, dst) for src, dst in moves if dst.name in staying]
+        if not blocked:
+            break
+        moves = [(src, dst) for src, dst in moves if dst.name not in staying]
+        collisions.extend((src, dst, "esiste già") for src, dst in blocked)
+
+    rejected = {src.name for src, _, _ in collisions}
+    accepted = [(src, dst) for src, dst in resolved if src.name not in rejected]
+    cycles = 0 if external else _count_cycles(moves)
+    return RenamePlan(folder, moves, collisions, cycles, existing, accepted)
+
+
+def _count_cycles(moves):
+    """Conta i cicli nel grafo src → dst (servono i nomi temporanei)."""
+    next_name = {src.name: dst.name for src, dst in moves}
+    seen = set()
+    cycles = 0
+    for start in next_name:
+        if start in seen:
+            continue
+        path = set()
+        name = start
+        while name in next_name and name not in seen:
+            seen.add(name)
+            path.add(name)
+            name = next_name[name]
+        if name in path:
+            cycles += 1
+    return cycles
+
+
+def _temp_names(existing, count):
+    """Genera `count` nomi temporanei che non collidono con `existing`."""
+    token = f"{TEMP_PREFIX}{os.getpid()}-"
+    i = 0
+    while count:
+        name = f"{token}{i}"
+        i += 1
+        if name not in existing:
+            count -= 1
+            yield name
+
+
+def _write_intents(path, plan, dependent, temps):
+    """Scrive (con un solo fsync) gli spostamenti su nomi temporanei prima di farli."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, temp_name in zip(dependent, temps):
+            src, dst = plan.moves[i]
+            f.write(json.dumps({"temp": temp_name, "src": src.name, "dst": dst.name}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def recover_intents(folder):
+    """Completa gli spostamenti rimasti su un nome temporaneo dopo un'interruzione.
+
+    Ogni file temporaneo va al nome finale se è libero, altrimenti torna al
+    nome originale. Ritorna il numero di file recuperati.
+    """
+    folder = Path(folder)
+    path = folder / INTENT_NAME
+    try:
+        with open(path, encoding="utf-8") as f:
+            intents = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return 0
+    except ValueError:
+        intents = []  # intent scritto a metà: nessun rename era ancora partito
+
+    recovered = left = 0
+    for intent in intents:
+        temp = folder / intent["temp"]
+        if not temp.exists():
+            continue
+        for target in (folder / intent["dst"], folder / intent["src"]):
+            if not target.exists():
+                os.rename(temp, target)
+                recovered += 1
+                break
+        else:
+            left += 1  # entrambi i nomi occupati: riprovato al prossimo avvio
+    if not left:
+        path.unlink()
+    return recovered
+
+
+def _rename_all(pairs, journal, io=None):
+    """Rinomina `pairs` (indipendenti tra loro) annotando nel journal quelli riusciti."""
+    if io is None:
+        for src, dst in pairs:
+            os.rename(src, dst)
+            journal.append((src, dst))
+        return
+    done, error = rename_batch(io, pairs)
+    journal.extend(done)
+    if error is not None:
+        raise error
+
+
+def apply_plan(plan: RenamePlan, intents=False, io=None):
+    """Applica il piano in due passate con nomi temporanei.
+
+    Gli spostamenti indipendenti (né src né dst coinvolti in altri
+    spostamenti) vanno direttamente al nome finale; gli altri passano
+    per un nome temporaneo. Al massimo 2n rename, nessun exists().
+    Se un rename fallisce, quelli già fatti vengono annullati e
+    l'eccezione viene rilanciata.
+    Con intents=True gli spostamenti su nomi temporanei vengono prima
+    scritti in INTENT_NAME, così un processo interrotto può essere
+    recuperato con recover_intents(). Il file viene eliminato solo se il
+    piano è completo o annullato del tutto: se anche un solo rename
+    dell'annullamento fallisce (o il run si interrompe) resta su disco.
+    Con un `io` (fsio.IOExecutor) i rename di ogni passata partono
+    insieme: dentro una passata nessun rename dipende da un altro.
+    """
+    sources = {src.name for src, _ in plan.moves}
+    targets = {dst.name for _, dst in plan.moves}
+
+    journal = []
+    intent_path = None
+    clean = False  # nessun file rimasto su un nome temporaneo
+    try:
+        # ---- PASSATA 1: sposta su nomi temporanei ----
+        dependent = [
+            i for i, (src, dst) in enumerate(plan.moves)
+            if src.name in targets or dst.name in sources
+        ]
+        temps = list(_temp_names(plan.existing | sources | targets, len(dependent)))
+        if intents and dependent:
+            intent_path = plan.folder / INTENT_NAME
+            _write_intents(intent_path, plan, dependent, temps)
+        staged = {i: plan.folder / temp_name for i, temp_name in zip(dependent, temps)}
+        _rename_all([(plan.moves[i][0], temp) for i, temp in staged.items()], journal, io)
+
+        # ---- PASSATA 2: nomi finali ----
+        _rename_all([(staged.get(i, src), dst) for i, (src, dst) in enumerate(plan.moves)], journal, io)
+        clean = True
+    except OSError:
+        clean = True
+        for src, dst in reversed(journal):
+            try:
+                os.rename(dst, src)
+            except OSError:
+                clean = False
+        raise
+    finally:
+        if intent_path is not None and clean:
+            try:
+                os.remove(intent_path)
+            except OSError:
+                pass
+
+    return plan.moves
@@ -1,104 +1,100 @@
-import os
-from pathlib import Path
-from PIL import Image
+from dedup import DEFAULT_DEDUP
+from engine import convert_folder, legacy_report, run_profile
+from fsio import DEFAULT_IO_THREADS
+from manifest import DEFAULT_USE_MANIFEST
+from profiles import IMAGE_EXTS, NEW_BALANCE  # noqa: F401 (API storica)
+from recursive import DEFAULT_PARALLEL_DIRS
+
+# prefisso, estensioni e nome finale sono nel profilo NEW_BALANCE (profiles.py)
 
 # cartella dove si trovano le immagini
 FOLDER = "/Users/nicolo.morando/Downloads/nb"
 
-# estensioni immagini da convertire
-IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".tif", ".tiff", ".bmp"}
-
-
-def convert_all_to_jpg(folder: Path):
-    """Converte tutte le immagini della cartella in JPG.
-       I file non-JPG vengono convertiti in JPG e poi eliminati."""
-    files = [f for f in folder.iterdir() if f.is_file()]
-
-    for f in files:
-        ext = f.suffix.lower()
-        if ext not in IMAGE_EXTS:
-            continue
-
-        # se è già jpg, non facciamo nulla
-        if ext == ".jpg":
-            continue
-
-        new_path = f.with_suffix(".jpg")
-
-        # se esiste già un jpg con quel nome, salta per sicurezza
-        if new_path.exists():
-            print(f"⚠️ Esiste già {new_path.name}, salto conversione di {f.name}")
-            continue
-
-        try:
-            with Image.open(f) as img:
-                # gestiamo trasparenza con sfondo bianco
-                if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-                    img = img.convert("RGBA")
-                    background = Image.new("RGB", img.size, (255, 255, 255))
-                    alpha = img.split()[3]
-                    background.paste(img, mask=alpha)
-                    background.save(new_path, "JPEG", quality=95)
-                else:
-                    rgb = img.convert("RGB")
-                    rgb.save(new_path, "JPEG", quality=95)
-            print(f"🔄 Convertito {f.name} → {new_path.name}")
-            # elimina l'originale dopo conversione
-            f.unlink()
-        except Exception as e:
-            print(f"❌ Errore convertendo {f.name}: {e}")
-
-
-def rename_images(folder):
-    folder = Path(folder)
-
-    # 1) converte tutto in JPG prima di qualsiasi cosa
-    convert_all_to_jpg(folder)
-
-    # 2) prendi solo file .jpg
-    files = sorted([
-        f for f in folder.iterdir()
-        if f.is_file() and f.suffix.lower() == ".jpg"
-    ])
-
-    # ---- CONTEGGIO PREFISSI ----
-    prefixes = set()
-
-    for f in files:
-        name = f.stem
-        prefix = name[:7].upper()  # <<< NEW BALANCE + CAPS
-        prefixes.add(prefix)
-
-    print(f"📦 Trovati {len(prefixes)} codici diversi")
-    print(f"Prefissi identificati: {sorted(prefixes)}\n")
-
-    # ---- PROCESSO DI RINOMINA ----
-    current_prefix = None
-    counter = 0
-
-    for f in files:
-        name = f.stem
-        ext = ".jpg"
-
-        prefix = name[:7].upper()  # <<< NEW BALANCE + CAPS
-
-        # reset contatore se cambia prefisso
-        if prefix != current_prefix:
-            current_prefix = prefix
-            counter = 0
-
-        new_name = f"{prefix}-{counter:02d}{ext}"
-        counter += 1
-
-        new_path = folder / new_name
-
-        if new_path.exists():
-            print(f"⚠️ WARNING: {new_name} esiste già, salto.")
-            continue
-
-        f.rename(new_path)
-        print(f"Renamed: {f.name} → {new_name}")
+# processi usati per la conversione (None = tutti i core)
+WORKERS = None
+
+# True = elabora anche tutte le sottocartelle (season/shoot/article/...)
+RECURSIVE = False
+
+# True = tiene un manifest per cartella (.renamer_manifest.jsonl) e ai run successivi
+# salta i file già elaborati e continua la numerazione; False (default) = nessun file
+# scritto in cartella, ogni run rinumera da capo
+USE_MANIFEST = DEFAULT_USE_MANIFEST
+
+# formati web generati accanto a ogni master rinominato (None = disattivato),
+# es. {"2000": 2000, "1000": 1000, "thumb": 300} → ABC123-00@2000.jpg, ...
+DERIVATIVES = None
+
+# registro CSV / JSON-lines di conversioni e rinomine (None = disattivato),
+# es. "/Users/nicolo.morando/Downloads/nb/renamer_audit.csv"
+AUDIT_LOG = None
+
+# True = gli originali convertiti vanno in .renamer_originals/ invece di essere
+# eliminati, così `python main.py rollback` può annullare anche le conversioni
+KEEP_ORIGINALS = False
+
+# doppioni esclusi dalla numerazione: "exact" (stesso contenuto), "perceptual"
+# (anche lo stesso scatto in formati diversi, es. PNG + JPG) oppure "off" (default)
+DEDUP = DEFAULT_DEDUP
+
+# thread per le operazioni sul filesystem in parallelo: utile se FOLDER è su
+# una share di rete (SMB / NFS), es. 16; 0 = tutto sincrono
+IO_THREADS = DEFAULT_IO_THREADS
+
+# True = conversioni e rinomine passano per un'area di staging e compaiono in
+# cartella tutte insieme a fine run; i sorgenti si eliminano solo dopo
+STAGED = False
+
+# cartella dove pubblicare i file finali (None = la cartella stessa), es.
+# "/Users/nicolo.morando/Downloads/renamed"; implica STAGED
+OUTPUT_DIR = None
+
+
+def convert_all_to_jpg(folder, workers=WORKERS, log_callback=print):
+    """Converte tutte le immagini della cartella in JPG (vedi engine.convert_folder).
+       I file non-JPG vengono convertiti in JPG e poi eliminati; ritorna il riepilogo."""
+    return convert_folder(NEW_BALANCE, folder, workers=workers, log_callback=legacy_report(log_callback))
+
+
+def rename_images(folder, workers=WORKERS, recursive=False, parallel_dirs=DEFAULT_PARALLEL_DIRS,
+                  use_manifest=USE_MANIFEST, log_callback=print, dry_run=False,
+                  derivatives=DERIVATIVES, cost_model=None, audit=AUDIT_LOG,
+                  keep_originals=KEEP_ORIGINALS, dedup=DEDUP, io_threads=IO_THREADS,
+                  staged=STAGED, output_dir=OUTPUT_DIR):
+    """Converte e rinomina le immagini di `folder` (vedi engine.run_profile).
+
+    Con dry_run=True calcola conversioni e rinomine senza toccare il disco
+    e stima i costi (`cost_model`: vedi costmodel.CostModel).
+    `audit` (path .csv / .jsonl o AuditSink) registra conversioni e rinomine;
+    con keep_originals=True gli originali convertiti vengono conservati.
+    `dedup` esclude i doppioni dalla numerazione (vedi dedup.py);
+    `io_threads` sovrappone le operazioni sul filesystem (vedi fsio.py).
+    Con staged=True o un `output_dir` i file finali vengono pubblicati
+    tutti insieme a fine cartella (vedi staging.py).
+    Il log usa le righe storiche dello script (🔄 / ❌ / Renamed, vedi
+    engine.legacy_report). Ritorna un riepilogo (dict) della cartella; con recursive=True elabora
+    ogni cartella dell'albero in modo indipendente e ritorna la lista dei
+    riepiloghi.
+    """
+    return run_profile(
+        NEW_BALANCE,
+        folder,
+        log_callback=legacy_report(log_callback),
+        workers=workers,
+        recursive=recursive,
+        parallel_dirs=parallel_dirs,
+        use_manifest=use_manifest,
+        dry_run=dry_run,
+        derivatives=derivatives,
+        cost_model=cost_model,
+        audit=audit,
+        keep_originals=keep_originals,
+        dedup=dedup,
+        io_threads=io_threads,
+        staged=staged,
+        output_dir=output_dir,
+    )
 
 
 if __name__ == "__main__":
-    rename_images(FOLDER)
+    rename_images(FOLDER, recursive=RECURSIVE)
@@ -1,191 +1,100 @@
+import time
+
+_IMPORT_T0 = time.perf_counter()
+
+import collections
 import os
-import queue
+import sys
 import threading
-import urllib.request
 from pathlib import Path
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
-from PIL import Image, ImageTk, ImageDraw
-
-# ---------- CONFIG ----------
-
-BACKGROUND_IMAGE_PATH = "nike_bg.jpg"   # metti qui una foto dell'HQ Nike
-NIKE_LOGO_FILE = "nike_logo.png"
-NIKE_LOGO_URL = "https://static.nike.com/a/images/f_auto/w_200/jo8m1sx7dxvdmwfefk6x/nike-logo.png"
-
-VIEW_ORDER = {
-    "PHCFH": 0,  # FRONT
-    "PHSLH": 1,  # LEFT
-    "PHSRH": 2,  # RIGHT
-    "PHCBH": 3,  # BACK
-    "PHSTH": 4,  # TOP
-    "PHSUH": 5,  # SOLE
-    "PHSYD": 6,  # DETAILS / ZOOM
-}
-
-# ---------- LOGICA FILE ----------
+from progress import ProgressState, format_eta
 
-def parse_filename(path: Path):
-    """
-    AURORA_415445-101_PHCFH001-2000.png
-             ^^^^^^^^ articolo
-                       ^^^^^ view_code
-    """
-    name = path.stem
-    parts = name.split("_")
-    if len(parts) < 3:
-        return None
+# PIL, urllib e la logica sui file (nike_logic → converter, pool di processi...)
+# vengono importati solo quando servono, per mostrare la finestra subito.
 
-    article_code = parts[1]
-    ph_part = parts[2]
+_NIKE_LOGIC_NAMES = {"VIEW_ORDER", "convert_png_to_jpg", "parse_filename", "rename_nike_images"}
 
-    if not article_code or not ph_part.startswith("PH"):
-        return None
 
-    view_code = ph_part[:5]
-    rest = ph_part[5:]
+def __getattr__(name):
+    # compatibilità: `from renamer_nike import rename_nike_images` continua a funzionare
+    if name in _NIKE_LOGIC_NAMES:
+        import nike_logic
+        return getattr(nike_logic, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    seq_digits = ""
-    for ch in rest:
-        if ch.isdigit():
-            seq_digits += ch
-        elif ch == "-":
-            break
 
-    seq_num = int(seq_digits) if seq_digits.isdigit() else 0
-    return article_code, view_code, seq_num
+# ---------- CONFIG ----------
 
+BACKGROUND_IMAGE_PATH = "nike_bg.jpg"   # metti qui una foto dell'HQ Nike
+NIKE_LOGO_FILE = "nike_logo.png"
+NIKE_LOGO_URL = "https://static.nike.com/a/images/f_auto/w_200/jo8m1sx7dxvdmwfefk6x/nike-logo.png"
+LOGO_NETWORK_TIMEOUT_S = 2.0   # il download gira in background; offline viene saltato
+ASSET_POLL_MS = 50             # controllo degli asset caricati in background
+RESIZE_DEBOUNCE_MS = 120       # lo sfondo si ridisegna solo a resize finito
+BG_CACHE_SIZE = 6              # dimensioni di sfondo già renderizzate tenute in memoria
+
+# log: un tick ogni LOG_FRAME_MS, al massimo LOG_BATCH_MAX righe per tick
+LOG_FRAME_MS = 40
+LOG_BATCH_MAX = 500
+LOG_MAX_LINES = 2000          # righe visibili nello storico
+LOG_QUEUE_MAX = 20000         # oltre questo le righe più vecchie vengono scartate
+LOG_TYPEWRITER = True         # effetto macchina da scrivere...
+LOG_TYPEWRITER_MAX_QUEUE = 2  # ...solo se in coda ci sono al massimo N messaggi
+LOG_TYPEWRITER_CHARS = 4      # caratteri scritti per tick
+
+# frequenza di aggiornamento di barra, articolo e velocità (50 ms = 20 Hz)
+PROGRESS_POLL_MS = 50
 
-def convert_png_to_jpg(img_path: Path, log_callback=None) -> Path:
-    """Converte PNG in JPG con sfondo bianco e ritorna il nuovo path."""
-    new_path = img_path.with_suffix(".jpg")
+# ---------- FUNZIONI GRAFICHE ----------
 
-    if log_callback:
-        log_callback(f"PNG → JPG: {img_path.name}")
+def _network_available(url, timeout=LOGO_NETWORK_TIMEOUT_S) -> bool:
+    """Prova veloce: apre (e chiude) una connessione TCP verso l'host."""
+    import socket
+    from urllib.parse import urlsplit
 
-    with Image.open(img_path) as img:
-        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
-            img = img.convert("RGBA")
-            background = Image.new("RGB", img.size, (255, 255, 255))
-            alpha = img.split()[3]
-            background.paste(img, mask=alpha)
-            background.save(new_path, "JPEG", quality=95)
-        else:
-            rgb = img.convert("RGB")
-            rgb.save(new_path, "JPEG", quality=95)
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        with socket.create_connection((parts.hostname, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
 
-    img_path.unlink()
-    return new_path
 
+def ensure_nike_logo():
+    """Scarica il logo Nike dal web se non esiste già.
 
-def rename_nike_images(folder, log_callback=None, progress_callback=None, article_callback=None):
+    Pensata per girare in un thread: se la rete non risponde entro
+    LOGO_NETWORK_TIMEOUT_S il download viene saltato.
     """
-    progress_callback(done, total)
-    article_callback(article_code)
-    """
-    folder = Path(folder)
-
-    if log_callback:
-        log_callback(f"[INFO] Cartella: {folder}")
-
-    files = [
-        f for f in folder.iterdir()
-        if f.is_file() and f.suffix.lower() in [".jpg", ".jpeg", ".png"]
-    ]
-
-    if log_callback:
-        log_callback(f"[INFO] Immagini trovate: {len(files)} (JPG + PNG)")
-
-    if not files:
-        if log_callback:
-            log_callback("[WARN] Nessuna immagine trovata.")
-        if progress_callback:
-            progress_callback(0, 0)
-        return
-
-    converted_files = []
-    for f in files:
-        if f.suffix.lower() == ".png":
-            f = convert_png_to_jpg(f, log_callback=log_callback)
-        converted_files.append(f)
-
-    files = converted_files
-
-    images_by_article = {}
-    for f in files:
-        parsed = parse_filename(f)
-        if not parsed:
-            if log_callback:
-                log_callback(f"[SKIP] Nome non riconosciuto: {f.name}")
-            continue
-
-        article_code, view_code, seq_num = parsed
-        images_by_article.setdefault(article_code, []).append(
-            (f, view_code, seq_num)
-        )
-
-    if log_callback:
-        log_callback(f"[INFO] Codici articolo: {len(images_by_article)}")
-
-    total_to_process = sum(len(v) for v in images_by_article.values())
-    done = 0
-    if progress_callback:
-        progress_callback(done, total_to_process)
-
-    for article_code, entries in images_by_article.items():
-        if log_callback:
-            log_callback(f"[ARTICLE] {article_code} – immagini: {len(entries)}")
-
-        if article_callback:
-            article_callback(article_code)
-
-        def sort_key(item):
-            _, view_code, seq_num = item
-            return (VIEW_ORDER.get(view_code, 99), seq_num)
-
-        entries.sort(key=sort_key)
-
-        for idx, (f, view_code, seq_num) in enumerate(entries):
-            new_name = f"{article_code}-{idx:02d}.jpg"
-            new_path = folder / new_name
-
-            if new_path.exists():
-                if log_callback:
-                    log_callback(f"[WARN] Esiste già {new_name}, salto.")
-            else:
-                old_name = f.name
-                f.rename(new_path)
-                if log_callback:
-                    log_callback(f"   {old_name}  →  {new_name}")
-
-            done += 1
-            if progress_callback:
-                progress_callback(done, total_to_process)
-
-    if article_callback:
-        article_callback("")  # reset
-
-    if log_callback:
-        log_callback("[OK] Rinomina completata.")
-
-
-# ---------- FUNZIONI GRAFICHE ----------
-
-def ensure_nike_logo():
-    """Scarica il logo Nike dal web se non esiste già."""
     logo_path = Path(NIKE_LOGO_FILE)
     if logo_path.exists():
         return logo_path
+    if not _network_available(NIKE_LOGO_URL):
+        return None
+
+    import urllib.request
+    tmp_path = logo_path.with_name(logo_path.name + ".part")
     try:
-        urllib.request.urlretrieve(NIKE_LOGO_URL, NIKE_LOGO_FILE)
+        with urllib.request.urlopen(NIKE_LOGO_URL, timeout=LOGO_NETWORK_TIMEOUT_S) as resp:
+            tmp_path.write_bytes(resp.read())
+        os.replace(tmp_path, logo_path)
     except Exception:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
         return None
     return logo_path
 
 
 def create_round_rect_image(width, height, radius, fill_color, border_color=None, border_width=0):
+    from PIL import Image, ImageDraw
+
     img = Image.new("RGBA", (width, height), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     draw.rounded_rectangle(
@@ -200,6 +109,17 @@ def create_round_rect_image(width, height, radius, fill_color, border_color=None
 
 # ---------- APP ----------
 
+# card e pulsanti arrotondati, disegnati con PIL dopo la prima finestra:
+# chiave → (larghezza, altezza, argomenti di create_round_rect_image)
+CHROME = {
+    "card": (900, 440, {"radius": 25, "fill_color": (0, 0, 0, 210)}),
+    "browse": (120, 32, {"radius": 16, "fill_color": (255, 255, 255, 255),
+                         "border_color": (255, 255, 255, 255), "border_width": 0}),
+    "run": (150, 38, {"radius": 19, "fill_color": (0, 0, 0, 0),
+                      "border_color": (255, 255, 255, 255), "border_width": 2}),
+}
+
+
 class NikeRenamerApp:
     def __init__(self, root):
         self.root = root
@@ -214,28 +134,47 @@ class NikeRenamerApp:
         self.text_muted = "#e6e6e6"
 
         self.folder_path = tk.StringVar()
+        self.recursive_var = tk.BooleanVar(value=False)
 
-        self.log_queue = queue.Queue()
-        self.is_animating = False
+        self.log_queue = collections.deque(maxlen=LOG_QUEUE_MAX)
+        self.log_lock = threading.Lock()
+        self.log_dropped = 0
+        self.typing = None
 
         self.bg_image_raw = None
         self.bg_image_tk = None
         self.bg_label = None
-        self._load_background()
+        self.bg_cache = collections.OrderedDict()
+        self.bg_size = None
+        self._resize_job = None
+        self.screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        self.root.configure(bg=self.bg_color)
 
         self.logo_img_tk = None
-        self._load_logo()
+        self.logo_label = None
 
         self.round_button_images = {}
 
         # progress state
         self.progress_var = tk.DoubleVar(value=0.0)
         self.current_article_var = tk.StringVar(value="–")
+        self.stats_var = tk.StringVar(value="")
+        self.progress_state = ProgressState()
+        self._progress_version = -1
 
         self.build_ui()
+        self.root.after(LOG_FRAME_MS, self._drain_log)
+        self.root.after(PROGRESS_POLL_MS, self._poll_progress)
 
         self.root.bind("<Configure>", self._on_resize)
 
+        # chrome, sfondo e logo arrivano dopo, senza bloccare la prima finestra
+        self.startup_times = {}
+        self.ready_assets = collections.deque()
+        self.root.after_idle(self._on_ui_ready)
+        self.root.after(ASSET_POLL_MS, self._poll_assets)
+        threading.Thread(target=self._load_assets_thread, daemon=True).start()
+
     # ---------- ICONA & BACKGROUND ----------
 
     def _set_icon(self):
@@ -256,76 +195,171 @@ class NikeRenamerApp:
         except Exception:
             pass
 
-    def _load_background(self):
+    def _load_assets_thread(self):
+        """Thread: disegna la chrome, decodifica e ridimensiona sfondo e logo (solo PIL, niente Tk).
+
+        I risultati finiscono in `ready_assets`, che il thread Tk legge con
+        _poll_assets: dal thread non si chiama nessun metodo di Tk.
+        """
+        from PIL import Image
+
+        try:
+            chrome = {
+                key: create_round_rect_image(width, height, **kwargs)
+                for key, (width, height, kwargs) in CHROME.items()
+            }
+        except Exception:
+            chrome = None  # restano i pulsanti piatti
+        self.ready_assets.append((self._apply_chrome, chrome))
+
+        background = None
         try:
             img_path = Path(BACKGROUND_IMAGE_PATH)
-            if not img_path.exists():
-                self.root.configure(bg=self.bg_color)
-                return
+            if img_path.exists():
+                with Image.open(img_path) as img:
+                    # copia già ridotta alla risoluzione dello schermo: i resize
+                    # successivi partono da qui e non dall'originale
+                    img.draft("RGB", self.screen_size)
+                    raw = img.convert("RGB")
+                if raw.width > self.screen_size[0] or raw.height > self.screen_size[1]:
+                    raw.thumbnail(self.screen_size, Image.LANCZOS)
+                # dimensione iniziale della finestra; se nel frattempo è cambiata,
+                # _apply_background la rifà alla dimensione corrente
+                background = (raw, raw.resize((1100, 650), Image.LANCZOS))
+        except Exception:
+            background = None
+        self.ready_assets.append((self._apply_background, background))
 
-            self.bg_image_raw = Image.open(img_path).convert("RGB")
-            w, h = self.root.winfo_width() or 1100, self.root.winfo_height() or 650
-            resized = self.bg_image_raw.resize((w, h), Image.LANCZOS)
+        logo = None
+        logo_path = ensure_nike_logo()
+        if logo_path and logo_path.exists():
+            try:
+                img = Image.open(logo_path).convert("RGBA")
+                base_h = 50
+                w, h = img.size
+                ratio = base_h / h
+                new_size = (int(w * ratio), int(h * ratio))
+                logo = img.resize(new_size, Image.LANCZOS)
+            except Exception:
+                logo = None
+        self.ready_assets.append((self._apply_logo, logo))
+
+    def _poll_assets(self):
+        # niente PhotoImage prima che la finestra sia stata disegnata
+        while self.ready_assets and "ui" in self.startup_times:
+            apply, asset = self.ready_assets.popleft()
+            apply(asset)
+        if "assets" not in self.startup_times:
+            self.root.after(ASSET_POLL_MS, self._poll_assets)
+
+    def _apply_chrome(self, chrome):
+        """Nel thread Tk: mette card e pulsanti arrotondati al posto dei segnaposto."""
+        from PIL import ImageTk
+
+        if chrome is not None:
+            for key, img in chrome.items():
+                self.round_button_images[key] = ImageTk.PhotoImage(img)
+            # le finestre del canvas restano sempre sopra le immagini
+            self.card_canvas.create_image(0, 0, image=self.round_button_images["card"], anchor="nw")
+            self.btn_browse.configure(image=self.round_button_images["browse"], fg="#000000")
+            self.btn_start.configure(image=self.round_button_images["run"])
+        self._mark_startup("chrome")
+
+    def _apply_background(self, background):
+        """Nel thread Tk: mostra lo sfondo preparato dal thread degli asset."""
+        from PIL import ImageTk
+
+        if background is not None:
+            self.bg_image_raw, resized = background
             self.bg_image_tk = ImageTk.PhotoImage(resized)
-
+            self.bg_size = resized.size
+            self.bg_cache[self.bg_size] = self.bg_image_tk
             self.bg_label = tk.Label(self.root, image=self.bg_image_tk, bd=0, bg=self.bg_color)
             self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
             self.bg_label.lower()
-        except Exception:
-            self.root.configure(bg=self.bg_color)
-
-    def _load_logo(self):
-        logo_path = ensure_nike_logo()
-        if not logo_path or not logo_path.exists():
-            return
-        try:
-            img = Image.open(logo_path).convert("RGBA")
-            base_h = 50
-            w, h = img.size
-            ratio = base_h / h
-            new_size = (int(w * ratio), int(h * ratio))
-            img = img.resize(new_size, Image.LANCZOS)
-            self.logo_img_tk = ImageTk.PhotoImage(img)
-        except Exception:
-            self.logo_img_tk = None
+            # la finestra può essere già stata ridimensionata o massimizzata mentre
+            # lo sfondo si caricava: _on_resize non aveva ancora un label da aggiornare
+            size = (self.root.winfo_width(), self.root.winfo_height())
+            if size[0] > 1 and size[1] > 1 and size != self.bg_size:
+                self._render_background(size)
+        self._mark_startup("background")
+
+    def _apply_logo(self, logo):
+        """Nel thread Tk: mostra il logo top-center, se disponibile."""
+        from PIL import ImageTk
+
+        if logo is not None:
+            self.logo_img_tk = ImageTk.PhotoImage(logo)
+            self.logo_label = tk.Label(self.root, image=self.logo_img_tk, bg=self.bg_color, bd=0)
+            self.logo_label.place(relx=0.5, rely=0.12, anchor="center")
+        self._mark_startup("assets")
+
+    # ---------- STARTUP TIME ----------
+
+    def _on_ui_ready(self):
+        self._mark_startup("ui")
+
+    def _mark_startup(self, stage):
+        """Registra i ms dall'import del modulo; a fine caricamento li riporta."""
+        self.startup_times[stage] = (time.perf_counter() - _IMPORT_T0) * 1000.0
+        if stage == "assets":
+            report = " ".join(f"{k}_ms={v:.0f}" for k, v in self.startup_times.items())
+            self.log(f"[STARTUP] {report}")
+            print(f"[STARTUP] {report}", file=sys.stderr)
 
     def _on_resize(self, event):
-        if not self.bg_image_raw or not self.bg_label:
+        """<Configure>: considera solo la finestra principale e aspetta la fine del resize."""
+        if event.widget is not self.root or not self.bg_image_raw or not self.bg_label:
             return
-        try:
-            resized = self.bg_image_raw.resize((max(event.width, 1), max(event.height, 1)), Image.LANCZOS)
-            self.bg_image_tk = ImageTk.PhotoImage(resized)
-            self.bg_label.configure(image=self.bg_image_tk)
-        except Exception:
-            pass
+        size = (max(event.width, 1), max(event.height, 1))
+        if self._resize_job is not None:
+            self.root.after_cancel(self._resize_job)
+            self._resize_job = None
+        if size == self.bg_size:
+            return
+        self._resize_job = self.root.after(RESIZE_DEBOUNCE_MS, self._render_background, size)
+
+    def _render_background(self, size):
+        """Mostra lo sfondo a `size`, riusando le dimensioni già calcolate (LRU)."""
+        self._resize_job = None
+        tk_img = self.bg_cache.get(size)
+        if tk_img is not None:
+            self.bg_cache.move_to_end(size)
+        else:
+            from PIL import Image, ImageTk
+
+            try:
+                tk_img = ImageTk.PhotoImage(self.bg_image_raw.resize(size, Image.LANCZOS))
+            except Exception:
+                return
+            self.bg_cache[size] = tk_img
+            while len(self.bg_cache) > BG_CACHE_SIZE:
+                self.bg_cache.popitem(last=False)
+
+        self.bg_image_tk = tk_img
+        self.bg_size = size
+        self.bg_label.configure(image=tk_img)
 
-    def _create_button_image(self, key, width, height, radius, fill_color, border_color, border_width):
-        img = create_round_rect_image(width, height, radius, fill_color, border_color, border_width)
-        tk_img = ImageTk.PhotoImage(img)
-        self.round_button_images[key] = tk_img
-        return tk_img
+    def _placeholder(self, key):
+        """PhotoImage vuota (niente PIL) grande quanto l'immagine di CHROME[key]."""
+        width, height, _ = CHROME[key]
+        img = tk.PhotoImage(width=width, height=height)
+        self.round_button_images[key] = img
+        return img
 
     # ---------- UI ----------
 
     def build_ui(self):
+        """Widget della finestra, senza PIL: card e pulsanti arrotondati li
+        disegna il thread degli asset (_apply_chrome) dopo la prima finestra."""
         # card centrale con angoli arrotondati
         canvas = tk.Canvas(self.root, bg=self.bg_color, highlightthickness=0, bd=0)
         canvas.place(relx=0.5, rely=0.55, anchor="center", width=900, height=440)
-
-        card_img = create_round_rect_image(
-            900, 440, radius=25, fill_color=(0, 0, 0, 210)
-        )
-        self.card_img_tk = ImageTk.PhotoImage(card_img)
-        canvas.create_image(0, 0, image=self.card_img_tk, anchor="nw")
+        self.card_canvas = canvas
 
         content = tk.Frame(canvas, bg="#000000")
         canvas.create_window(450, 220, window=content)
 
-        # logo top-center
-        if self.logo_img_tk:
-            logo_lbl = tk.Label(self.root, image=self.logo_img_tk, bg=self.bg_color, bd=0)
-            logo_lbl.place(relx=0.5, rely=0.12, anchor="center")
-
         # header
         header = tk.Frame(content, bg="#000000")
         header.pack(fill="x", padx=40, pady=(25, 10))
@@ -375,37 +409,41 @@ class NikeRenamerApp:
         )
         self.entry_folder.pack(side="left", fill="x", expand=True, ipady=5, padx=(0, 10))
 
-        browse_img = self._create_button_image(
-            "browse", 120, 32, radius=16,
-            fill_color=(255, 255, 255, 255),
-            border_color=(255, 255, 255, 255),
-            border_width=0
-        )
+        # testo bianco finché non arriva lo sfondo bianco del pulsante
         self.btn_browse = tk.Button(
             path_frame,
             text="BROWSE",
-            image=browse_img,
+            image=self._placeholder("browse"),
             compound="center",
             command=self.browse_folder,
             bd=0,
             font=("Helvetica Neue", 9, "bold"),
-            fg="#000000",
+            fg="#ffffff",
             bg="#000000",
             activebackground="#000000",
             cursor="hand2"
         )
         self.btn_browse.pack(side="left")
 
-        run_img = self._create_button_image(
-            "run", 150, 38, radius=19,
-            fill_color=(0, 0, 0, 0),
-            border_color=(255, 255, 255, 255),
-            border_width=2
+        self.chk_recursive = tk.Checkbutton(
+            top,
+            text="INCLUDE SUBFOLDERS",
+            variable=self.recursive_var,
+            fg=self.text_main,
+            bg="#000000",
+            selectcolor="#111111",
+            activebackground="#000000",
+            activeforeground=self.text_main,
+            bd=0,
+            highlightthickness=0,
+            font=("Helvetica Neue", 9, "bold")
         )
+        self.chk_recursive.pack(anchor="w", pady=(8, 0))
+
         self.btn_start = tk.Button(
             top,
             text="RUN RENAME",
-            image=run_img,
+            image=self._placeholder("run"),
             compound="center",
             command=self.start_rename,
             bd=0,
@@ -464,6 +502,15 @@ class NikeRenamerApp:
         )
         self.lbl_article_value.pack(side="left", padx=(4, 0))
 
+        self.lbl_stats = tk.Label(
+            article_container,
+            textvariable=self.stats_var,
+            fg=self.text_muted,
+            bg="#000000",
+            font=("Helvetica Neue", 9)
+        )
+        self.lbl_stats.pack(side="left", padx=(12, 0))
+
         # divider
         divider = tk.Frame(content, bg="#333333", height=1)
         divider.pack(fill="x", padx=30, pady=(10, 6))
@@ -489,52 +536,94 @@ class NikeRenamerApp:
         )
         self.text_log.pack(fill="both", expand=True, padx=40, pady=(0, 25))
 
-    # ---------- LOG ANIMATO ----------
+    # ---------- LOG ----------
 
     def log(self, message: str):
-        self.log_queue.put(message)
-        if not self.is_animating:
-            self.is_animating = True
-            self.root.after(5, self._process_log_queue)
-
-    def _process_log_queue(self):
-        if self.log_queue.empty():
-            self.is_animating = False
-            return
-        msg = self.log_queue.get()
-        self._animate_message(msg, 0)
-
-    def _animate_message(self, message: str, index: int):
-        if index == 0:
-            self.text_log.insert("end", "\n")
-        if index < len(message):
-            self.text_log.insert("end", message[index])
+        """Thread-safe: accoda il messaggio, lo disegna il tick della UI."""
+        with self.log_lock:
+            if len(self.log_queue) == LOG_QUEUE_MAX:
+                self.log_dropped += 1
+            self.log_queue.append(message)
+
+    def _drain_log(self):
+        """Tick a frequenza fissa: svuota la coda a blocchi con un solo insert."""
+        try:
+            if self.typing is not None:
+                self._type_step()
+                return
+
+            with self.log_lock:
+                pending = len(self.log_queue)
+                dropped, self.log_dropped = self.log_dropped, 0
+                batch = [self.log_queue.popleft() for _ in range(min(pending, LOG_BATCH_MAX))]
+
+            if dropped:
+                batch.insert(0, f"[...] {dropped} righe di log omesse")
+
+            if not batch:
+                return
+
+            # effetto macchina da scrivere solo con la coda quasi vuota
+            if LOG_TYPEWRITER and pending <= LOG_TYPEWRITER_MAX_QUEUE and len(batch) == 1:
+                self.text_log.insert("end", "\n")
+                self.typing = [batch[0], 0]
+                self._type_step()
+                return
+
+            self.text_log.insert("end", "\n" + "\n".join(batch))
+            self._trim_log()
             self.text_log.see("end")
-            self.root.update_idletasks()
-            self.root.after(10, self._animate_message, message, index + 1)
+        finally:
+            self.root.after(LOG_FRAME_MS, self._drain_log)
+
+    def _type_step(self):
+        message, index = self.typing
+        # se la coda si allunga, il messaggio in corso viene completato subito
+        if len(self.log_queue) > LOG_TYPEWRITER_MAX_QUEUE:
+            step = len(message) - index
+        else:
+            step = LOG_TYPEWRITER_CHARS
+        self.text_log.insert("end", message[index:index + step])
+        self.text_log.see("end")
+        index += step
+        if index >= len(message):
+            self.typing = None
+            self._trim_log()
         else:
-            self.root.after(25, self._process_log_queue)
+            self.typing[1] = index
+
+    def _trim_log(self):
+        """Tiene solo le ultime LOG_MAX_LINES righe visibili."""
+        lines = int(self.text_log.index("end-1c").split(".")[0])
+        if lines > LOG_MAX_LINES:
+            self.text_log.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
 
     # ---------- UPDATE PROGRESS / ARTICLE (THREAD-SAFE) ----------
 
     def progress_update_from_thread(self, done, total):
-        self.root.after(0, self._update_progress_ui, done, total)
-
-    def _update_progress_ui(self, done, total):
-        if total <= 0:
-            self.progress_var.set(0)
-            return
-        value = (done / total) * 100.0
-        self.progress_var.set(value)
+        self.progress_state.update(done, total)
 
     def article_update_from_thread(self, article_code):
-        self.root.after(0, self._update_article_ui, article_code)
+        self.progress_state.set_article(article_code)
 
-    def _update_article_ui(self, article_code):
-        if article_code:
-            self.current_article_var.set(article_code)
-        else:
-            self.current_article_var.set("–")
+    def _poll_progress(self):
+        """Legge l'ultimo stato a frequenza fissa e aggiorna la UI solo se è cambiato."""
+        try:
+            snap = self.progress_state.snapshot()
+            if snap["version"] != self._progress_version:
+                self._progress_version = snap["version"]
+                total = snap["total"]
+                self.progress_var.set((snap["done"] / total) * 100.0 if total > 0 else 0)
+                self.current_article_var.set(snap["article"] or "–")
+
+            if snap["total"] and snap["done"] < snap["total"]:
+                self.stats_var.set(
+                    f"{snap['rate']:.1f} img/s · ETA {format_eta(snap['eta'])}"
+                )
+            elif snap["total"]:
+                self.stats_var.set(f"{snap['done']}/{snap['total']} img")
+        finally:
+            self.root.after(PROGRESS_POLL_MS, self._poll_progress)
 
     # ---------- EVENTI GUI ----------
 
@@ -559,8 +648,10 @@ class NikeRenamerApp:
             return
 
         # reset progress & articolo
+        self.progress_state.reset()
         self.progress_var.set(0)
         self.current_article_var.set("–")
+        self.stats_var.set("")
 
         self.btn_start.config(state="disabled")
         self.log("====== RUN ======")
@@ -568,17 +659,20 @@ class NikeRenamerApp:
 
         threading.Thread(
             target=self._run_thread,
-            args=(path_obj,),
+            args=(path_obj, self.recursive_var.get()),
             daemon=True
         ).start()
 
-    def _run_thread(self, folder: Path):
+    def _run_thread(self, folder: Path, recursive=False):
         try:
+            from nike_logic import rename_nike_images
+
             rename_nike_images(
                 folder,
                 log_callback=self.log,
                 progress_callback=self.progress_update_from_thread,
-                article_callback=self.article_update_from_thread
+                article_callback=self.article_update_from_thread,
+                recursive=recursive
             )
         except Exception as e:
             self.log(f"[ERROR] {e}")
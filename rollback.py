@@ -0,0 +1,193 @@
+import os
+import shutil
+from pathlib import Path
+
+from audit import read_audit
+from converter import ORIGINALS_DIR
+from manifest import MANIFEST_NAME, Manifest
+from rename_plan import apply_plan, build_plan, recover_intents
+
+# ---------- ANNULLA UN RUN ----------
+#
+# Legge il registro scritto con `audit` (vedi audit.py) e riporta ogni
+# cartella com'era prima del run: prima le rinomine (in blocco, con il
+# piano in due passate) e i file pubblicati in un output_dir, poi le
+# conversioni di cui è stato conservato l'originale. Lo stato viene ricavato dal disco a ogni avvio, quindi un
+# rollback interrotto si riprende rilanciandolo.
+
+
+def _quiet(message):
+    pass
+
+
+def load_run(audit_path, run=None):
+    """Righe di un run del registro (default: l'ultimo), raggruppate per cartella.
+
+    Ritorna (run_id, {cartella: [righe in ordine]}).
+    """
+    folders = {}
+    current = None
+    for row in read_audit(audit_path):
+        row_run = row.get("run")
+        if run is None and row_run != current:
+            # un nuovo run nel registro: conta solo l'ultimo
+            current = row_run
+            folders = {}
+        elif run is not None and row_run != run:
+            continue
+        folders.setdefault(row["folder"], []).append(row)
+    return (run or current), folders
+
+
+def rollback_folder(folder, rows, log=_quiet, dry_run=False):
+    """Annulla le operazioni di un run in una cartella; ritorna un riepilogo (dict)."""
+    folder = Path(folder)
+    summary = {"folder": str(folder), "restored": 0, "unconverted": 0, "already": 0,
+               "missing": 0, "skipped": 0, "irreversible": 0}
+    if not folder.is_dir():
+        log(f"[WARN] Cartella non trovata: {folder}")
+        summary["missing"] = len(rows)
+        return summary
+
+    if not dry_run:
+        recovered = recover_intents(folder)
+        if recovered:
+            log(f"[WARN] Recuperati {recovered} file rimasti su nomi temporanei")
+
+    with os.scandir(folder) as it:
+        names = {e.name for e in it}
+
+    # JPEG di conversioni già annullate (l'originale è tornato al suo posto)
+    unconverted = {
+        row["new"] for row in rows
+        if row["action"] == "convert" and row["old"] in names and row["new"] not in names
+    }
+
+    # ---- RINOMINE: nuovo → vecchio, in un solo piano ----
+    mapping = []
+    for row in rows:
+        if row["action"] != "rename":
+            continue
+        old, new = row["old"], row["new"]
+        if new in names:
+            mapping.append((folder / new, old))
+        elif old in names or old in unconverted:
+            summary["already"] += 1  # già annullata (rollback ripreso)
+        else:
+            summary["missing"] += 1
+            log(f"[WARN] {new} non trovato, salto")
+
+    plan = build_plan(folder, mapping, names)
+    for src, dst, reason in plan.collisions:
+        log(f"[WARN] {dst.name} {reason}, lascio {src.name}.")
+    summary["skipped"] += len(plan.collisions)
+
+    if dry_run:
+        for src, dst in plan.moves:
+            log(f"   [DRY-RUN] {src.name}  →  {dst.name}")
+    else:
+        for src, dst in apply_plan(plan, intents=True):
+            names.discard(src.name)
+            names.add(dst.name)
+    summary["restored"] = len(plan.moves)
+
+    # ---- PUBBLICAZIONI (output_dir): il file torna in cartella col nome di prima ----
+    outputs = set()
+    for row in rows:
+        if row["action"] != "publish":
+            continue
+        old, published = row["old"], Path(row["new"])
+        outputs.add(published.parent)
+        if old in names or old in unconverted:
+            summary["already"] += 1
+            continue
+        if not published.exists():
+            summary["missing"] += 1
+            log(f"[WARN] {published} non trovato, salto")
+            continue
+        if dry_run:
+            log(f"   [DRY-RUN] {published}  →  {old}")
+        else:
+            # stesso filesystem: un rename; altrimenti copia ed eliminazione
+            shutil.move(published, folder / old)
+            names.add(old)
+        summary["restored"] += 1
+
+    # ---- CONVERSIONI: rimette l'originale ed elimina il JPEG ----
+    originals_dir = folder / ORIGINALS_DIR
+    try:
+        kept = {e.name for e in os.scandir(originals_dir)}
+    except OSError:
+        kept = set()
+
+    for row in rows:
+        if row["action"] != "convert":
+            continue
+        old, new = row["old"], row["new"]
+        if old in names and new not in names:
+            summary["already"] += 1
+            continue
+        if old not in kept:
+            summary["irreversible"] += 1
+            continue
+        if old in names:
+            log(f"[WARN] {old} esiste già, lascio l'originale in {ORIGINALS_DIR}")
+            summary["skipped"] += 1
+            continue
+        if dry_run:
+            log(f"   [DRY-RUN] {ORIGINALS_DIR}/{old}  →  {old} (elimina {new})")
+        else:
+            # prima l'originale torna al suo posto, poi si elimina il JPEG
+            os.replace(originals_dir / old, folder / old)
+            try:
+                os.remove(folder / new)
+            except FileNotFoundError:
+                pass
+            names.add(old)
+            names.discard(new)
+        summary["unconverted"] += 1
+
+    if summary["irreversible"]:
+        log(f"[WARN] Conversioni senza originale conservato (restano in JPG): {summary['irreversible']}")
+
+    if not dry_run:
+        try:
+            os.rmdir(originals_dir)
+        except OSError:
+            pass
+        if (folder / MANIFEST_NAME).exists():
+            # i nomi finali non esistono più: il prossimo run li rielabora
+            manifest = Manifest(folder)
+            manifest.prune(names)
+            manifest.save()
+        for output in outputs:
+            if (output / MANIFEST_NAME).exists():
+                with os.scandir(output) as it:
+                    manifest = Manifest(output)
+                    manifest.prune(e.name for e in it)
+                    manifest.save()
+
+    return summary
+
+
+def rollback_run(audit_path, run=None, log_callback=None, dry_run=False):
+    """Annulla un run registrato in `audit_path` (default: l'ultimo).
+
+    Ritorna la lista dei riepiloghi per cartella.
+    """
+    log = log_callback or _quiet
+    run_id, folders = load_run(audit_path, run)
+    if not folders:
+        log(f"[WARN] Nessuna operazione da annullare in {audit_path}")
+        return []
+
+    log(f"[INFO] Rollback del run {run_id}: {sum(len(r) for r in folders.values())} operazioni, "
+        f"{len(folders)} cartelle")
+    summaries = []
+    for folder, rows in folders.items():
+        summary = rollback_folder(folder, rows, log, dry_run)
+        log(f"[INFO] {folder}: ripristinati {summary['restored']} · "
+            f"conversioni annullate {summary['unconverted']} · già fatti {summary['already']}")
+        summaries.append(summary)
+    log("[OK] Rollback completato.")
+    return summaries
@@ -0,0 +1,127 @@
+import os
+from pathlib import Path
+
+
+class FileEntry:
+    """Un file della cartella, con i dati di stat presi dallo scan.
+
+    Se il file arriva da os.scandir, `stat()` riusa la cache del DirEntry
+    (su Windows è già gratis, su POSIX costa al più una chiamata).
+    """
+
+    __slots__ = ("name", "path", "_dirent", "_stat")
+
+    def __init__(self, path, dirent=None, stat=None):
+        self.path = Path(path)
+        self.name = self.path.name
+        self._dirent = dirent
+        self._stat = stat
+
+    @property
+    def suffix(self):
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def stem(self):
+        return os.path.splitext(self.name)[0]
+
+    @property
+    def has_stat(self):
+        return self._stat is not None
+
+    def stat(self):
+        if self._stat is None:
+            if self._dirent is not None:
+                self._stat = self._dirent.stat()
+            else:
+                self._stat = os.stat(self.path)
+        return self._stat
+
+    @property
+    def size(self):
+        return self.stat().st_size
+
+    @property
+    def mtime_ns(self):
+        return self.stat().st_mtime_ns
+
+    def __repr__(self):
+        return f"FileEntry({self.name!r})"
+
+
+class Inventory:
+    """Elenco in memoria dei file di una cartella, costruito con un solo scan.
+
+    È la fotografia della cartella all'inizio del run: i nomi che cambiano
+    durante conversioni e rinomine li tiene l'engine in un set (vedi
+    engine._run_folder), senza rileggere la cartella.
+    """
+
+    def __init__(self, folder, entries=None):
+        self.folder = Path(folder)
+        self._entries = {e.name: e for e in entries or ()}
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def get(self, name):
+        return self._entries.get(name)
+
+    def names(self):
+        return self._entries.keys()
+
+    def files(self, exts=None):
+        """File ordinati per nome, opzionalmente filtrati per estensione."""
+        if isinstance(exts, str):
+            exts = {exts}
+        return sorted(
+            (e for e in self._entries.values() if exts is None or e.suffix in exts),
+            key=lambda e: e.name,
+        )
+
+
+def scan_folder(folder) -> Inventory:
+    """Legge la cartella una sola volta con os.scandir (solo file regolari)."""
+    folder = Path(folder)
+    entries = []
+    with os.scandir(folder) as it:
+        for dirent in it:
+            # is_file() usa il tipo già restituito da readdir, senza stat
+            if dirent.is_file():
+                entries.append(FileEntry(dirent.path, dirent=dirent))
+    return Inventory(folder, entries)
+
+
+def walk_image_dirs(root, exts):
+    """Generatore delle cartelle (root compresa) che contengono immagini.
+
+    Visita l'albero in profondità con os.scandir tenendo in memoria solo
+    la pila delle cartelle da visitare; le cartelle nascoste e i link
+    simbolici vengono ignorati.
+    """
+    stack = [Path(root)]
+    while stack:
+        folder = stack.pop()
+        has_images = False
+        subdirs = []
+        try:
+            with os.scandir(folder) as it:
+                for dirent in it:
+                    if dirent.name.startswith("."):
+                        continue
+                    if dirent.is_dir(follow_symlinks=False):
+                        subdirs.append(dirent.name)
+                    elif not has_images and dirent.is_file():
+                        has_images = os.path.splitext(dirent.name)[1].lower() in exts
+        except OSError:
+            continue
+        if has_images:
+            yield folder
+        # ordine alfabetico: i figli vengono estratti dalla pila al contrario
+        stack.extend(folder / name for name in sorted(subdirs, reverse=True))
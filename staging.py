@@ -0,0 +1,315 @@
+import json
+import os
+import shutil
+import socket
+from pathlib import Path
+
+from converter import dispose_source
+from fsio import IOExecutor
+
+# ---------- STAGING E PUBBLICAZIONE ----------
+#
+# In modalità staged conversioni e rinomine non toccano la cartella finché
+# il lavoro non è completo:
+#
+#   1) i JPG convertiti vengono scritti in STAGING_PREFIX<pid>/CONVERTED_DIR,
+#      i file da rinominare vengono collegati (hard link, o copiati se il
+#      filesystem non lo permette) nell'area col nome finale; i sorgenti
+#      restano al loro posto
+#   2) i file con dati nuovi vanno su disco tutti insieme (un fsync per
+#      file, in parallelo sui thread di I/O), non uno alla volta durante
+#      la conversione
+#   3) un journal con nomi e sorgenti da eliminare viene scritto e portato
+#      su disco, poi ogni file passa al nome finale con un rename atomico
+#   4) solo dopo la pubblicazione i sorgenti vengono eliminati (o spostati
+#      negli originali conservati)
+#
+# Un run interrotto prima del journal lascia solo l'area di staging, che
+# viene scartata al run successivo; dopo il journal la pubblicazione viene
+# completata (vedi recover_staging). Chi guarda la cartella non vede mai
+# JPEG scritti a metà. L'area sta dentro la cartella di destinazione, così
+# i rename finali restano sullo stesso filesystem; il nome porta host e
+# pid del processo, e le aree di un processo ancora vivo non si toccano.
+
+STAGING_PREFIX = ".renamer_staging-"
+
+# sottocartella dell'area dove scrivono i worker di conversione
+CONVERTED_DIR = ".convert"
+
+# journal della pubblicazione in corso
+JOURNAL_NAME = ".publish.json"
+
+# senza thread di I/O, da questo numero di file gli fsync partono su un pool temporaneo
+SYNC_POOL_MIN = 16
+SYNC_THREADS = 8
+
+
+def fsync_dir(path):
+    """Porta su disco le voci di una cartella (dove il sistema lo permette)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Windows: le cartelle non si aprono, i metadati sono già sincroni
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path):
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_files(paths, io=None):
+    """Porta su disco il contenuto di `paths` in un solo passaggio.
+
+    Solo i file dell'area: un sync() di sistema svuoterebbe le cache di
+    tutti i filesystem montati (comprese le share usate da altri). Gli
+    fsync partono insieme sui thread di `io`, o su un pool temporaneo di
+    SYNC_THREADS se i file sono almeno SYNC_POOL_MIN.
+    """
+    if not paths:
+        return
+    if io is None and len(paths) >= SYNC_POOL_MIN:
+        with IOExecutor(SYNC_THREADS) as pool:
+            sync_files(paths, pool)
+        return
+    for _ in (io.map(_fsync_file, paths) if io is not None else map(_fsync_file, paths)):
+        pass
+
+
+def _link_or_copy(src, dst):
+    """Hard link di src in dst; copia se il link non si può fare. True se i dati sono nuovi."""
+    try:
+        os.link(src, dst)
+        return False
+    except OSError:
+        shutil.copy2(src, dst)
+        return True
+
+
+class Stage:
+    """Area di staging di una cartella di destinazione.
+
+    - converted_path(nome): dove scrivere il JPG convertito da un sorgente
+    - add_conversion(src, dst): conversione riuscita, src si elimina dopo
+      la pubblicazione (o va in `keep_dir`)
+    - put_plan(piano, convertiti): porta nell'area i file di un piano
+    - locate(nome): dove si trova ora un file col nome finale
+    - sync() / publish(): dati su disco, poi rename atomici nella destinazione
+    """
+
+    def __init__(self, target, keep_dir=None, io=None):
+        self.target = Path(target)
+        self.dir = self.target / f"{STAGING_PREFIX}{_owner()}"
+        self.converted_dir = self.dir / CONVERTED_DIR
+        self.keep_dir = keep_dir
+        self.io = io
+        self._origins = {}    # nome logico del JPG convertito → sorgente
+        self._staged = set()  # nomi finali presenti nell'area
+        self._written = []    # file con dati nuovi (conversioni, copie)
+        self._dispose = []    # (sorgente, cartella dove conservarlo o None)
+        self._synced = False
+        os.makedirs(self.converted_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._staged)
+
+    def converted_path(self, name):
+        return self.converted_dir / name
+
+    def add_conversion(self, src, dst):
+        self._origins[Path(dst).name] = Path(src)
+
+    def put_plan(self, plan, converted=()):
+        """Porta nell'area i file accettati di un piano.
+
+        Vanno nell'area gli spostamenti e i convertiti (anche se hanno già
+        il nome giusto). Con un `io` i link partono insieme.
+        """
+        jobs = []
+        for src, dst in plan.accepted:
+            if src.name in converted:
+                origin = self._origins.pop(src.name)
+                jobs.append((self.converted_dir / src.name, dst.name, origin, self.keep_dir))
+            elif src != dst:
+                jobs.append((src, dst.name, None, None))
+        placed = self.io.map(self._place, jobs) if self.io is not None else map(self._place, jobs)
+        for (_, name, origin, keep), (source, written) in zip(jobs, placed):
+            self._staged.add(name)
+            self._dispose.append((source, keep))
+            if written:
+                self._written.append(self.dir / name)
+            self._synced = False
+
+    def _place(self, job):
+        src, name, origin, _ = job
+        dst = self.dir / name
+        if origin is not None:
+            os.replace(src, dst)
+            return origin, True
+        return src, _link_or_copy(src, dst)
+
+    def locate(self, name):
+        return self.dir / name if name in self._staged else self.target / name
+
+    def sync(self):
+        """Porta su disco conversioni e copie dell'area (una volta per pubblicazione)."""
+        if self._synced:
+            return
+        sync_files(self._written, self.io)
+        fsync_dir(self.dir)
+        self._synced = True
+
+    def publish(self):
+        """Pubblica l'area nella destinazione ed elimina i sorgenti; ritorna i file pubblicati."""
+        names = sorted(self._staged)
+        if names:
+            self.sync()
+            _write_journal(self.dir / JOURNAL_NAME, names, self._dispose)
+            fsync_dir(self.dir)
+        published = _publish(self.dir, self.target, names, self._dispose, self.io)
+        self.discard()
+        self._staged.clear()
+        self._written = []
+        self._dispose = []
+        return published
+
+    def discard(self):
+        """Elimina l'area (i sorgenti non ancora pubblicati restano dove sono)."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def _write_journal(path, names, dispose):
+    journal = {
+        "names": names,
+        "dispose": [[str(src), str(keep) if keep is not None else None] for src, keep in dispose],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(journal, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _publish(staging, target, names, dispose, io=None):
+    """Rename atomici area → destinazione, poi eliminazione dei sorgenti.
+
+    Ripetibile: i file già pubblicati e i sorgenti già eliminati vengono
+    saltati, così recover_staging può riprendere da qualsiasi punto.
+    """
+    def move(name):
+        try:
+            os.replace(staging / name, target / name)
+        except FileNotFoundError:
+            return 0  # già pubblicato
+        return 1
+
+    def drop(item):
+        src, keep = Path(item[0]), item[1]
+        # un sorgente il cui nome è appena stato pubblicato contiene già il file nuovo
+        if src.parent == target and src.name in published_names:
+            return
+        try:
+            dispose_source(src, keep)
+        except FileNotFoundError:
+            pass
+
+    published_names = set(names)
+    run = io.map if io is not None else map
+    published = sum(run(move, names))
+    fsync_dir(target)
+    for _ in run(drop, dispose):
+        pass
+    return published
+
+
+def _owner():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _pid_alive(pid) -> bool:
+    """True se il processo `pid` di questa macchina esiste ancora."""
+    if os.name == "nt":
+        # os.kill(pid, 0) su Windows terminerebbe il processo
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return kernel32.GetLastError() == 5  # accesso negato: esiste
+        code = ctypes.c_ulong()
+        try:
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(code))) and code.value == 259
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # esiste, di un altro utente
+    except OSError:
+        return False
+    return True
+
+
+def is_abandoned(name) -> bool:
+    """True se l'area `name` (STAGING_PREFIX<host>-<pid>) appartiene a un processo terminato.
+
+    Le aree di un altro host non si possono verificare e restano a lui;
+    quelle col solo pid (versioni precedenti) sono di questa macchina.
+    Un'area di questo processo è sempre abbandonata: l'engine chiama
+    recover_staging prima di aprire il proprio Stage sulla cartella, quindi
+    è il resto di un run precedente finito con un errore (es. nella GUI).
+    """
+    if name == f"{STAGING_PREFIX}{_owner()}":
+        return True
+    owner = name[len(STAGING_PREFIX):]
+    host, _, pid = owner.rpartition("-")
+    if host and host != socket.gethostname():
+        return False
+    try:
+        pid = int(pid)
+    except ValueError:
+        return False
+    return not _pid_alive(pid)
+
+
+def recover_staging(target):
+    """Riprende le aree di staging lasciate da run interrotti in `target`.
+
+    Con il journal la pubblicazione viene completata, senza viene
+    scartata (i sorgenti sono ancora tutti al loro posto). Le aree di
+    processi ancora in esecuzione (o di altri host) non vengono toccate.
+    Ritorna (file pubblicati, aree scartate).
+    """
+    target = Path(target)
+    published = discarded = 0
+    try:
+        with os.scandir(target) as it:
+            areas = [
+                Path(e.path) for e in it
+                if e.name.startswith(STAGING_PREFIX) and e.is_dir() and is_abandoned(e.name)
+            ]
+    except OSError:
+        return 0, 0
+    for area in areas:
+        try:
+            with open(area / JOURNAL_NAME, encoding="utf-8") as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            journal = None  # journal assente o scritto a metà: nessun file era stato pubblicato
+        if journal is None:
+            discarded += 1
+        else:
+            published += _publish(
+                area, target, journal["names"],
+                [(src, Path(keep) if keep else None) for src, keep in journal["dispose"]],
+            )
+        shutil.rmtree(area, ignore_errors=True)
+    return published, discarded
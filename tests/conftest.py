@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# i moduli stanno nella radice del repository
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _touch(folder, *names):
+    """Crea file di testo con il proprio nome come contenuto (contenuti tutti diversi)."""
+    for name in names:
+        (Path(folder) / name).write_text(name, encoding="utf-8")
+
+
+def _image(path, color=(200, 40, 40), mode="RGB", size=(32, 24), fmt=None):
+    """Salva una piccola immagine a tinta unita (formato dall'estensione o da `fmt`)."""
+    from PIL import Image
+
+    path = Path(path)
+    fill = color + (255,) if mode == "RGBA" and len(color) == 3 else color
+    Image.new(mode, size, fill).save(path, fmt)
+    return path
+
+
+def _shoot(folder, image=_image):
+    """Un set fotografico misto: PNG con alfa, due JPEG e un TIFF, su due codici."""
+    image(Path(folder) / "ABC123_front.png", (200, 40, 40), "RGBA")
+    image(Path(folder) / "ABC123_back.jpg", (40, 200, 40))
+    image(Path(folder) / "ABC123_side.jpg", (40, 40, 200))
+    image(Path(folder) / "XYZ999_front.tif", (90, 90, 90))
+
+
+def _contents(folder):
+    """{nome: contenuto} dei file non nascosti di una cartella."""
+    return {
+        p.name: p.read_bytes()
+        for p in sorted(Path(folder).iterdir())
+        if p.is_file() and not p.name.startswith(".")
+    }
+
+
+@pytest.fixture
+def touch():
+    return _touch
+
+
+@pytest.fixture
+def image():
+    return _image
+
+
+@pytest.fixture
+def contents():
+    return _contents
+
+
+@pytest.fixture
+def shoot():
+    return _shoot
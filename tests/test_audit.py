@@ -0,0 +1,62 @@
+import pytest
+
+from audit import AuditSink, DeferredAudit, read_audit
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".jsonl"])
+def test_round_trip(tmp_path, suffix):
+    path = tmp_path / f"audit{suffix}"
+    with AuditSink(path, run_id="r1") as sink:
+        sink.record("convert", tmp_path, "a.png", "a.jpg", bytes_in=10, bytes_out=7, ms=1.23456)
+        sink.record("rename", tmp_path, "a.jpg", "ABC-00.jpg", "ABC", "PHCFH", 0)
+    with AuditSink(path, run_id="r2") as sink:
+        sink.record("rename", tmp_path, "b.jpg", "ABC-01.jpg", "ABC")
+
+    rows = list(read_audit(path))
+    assert [(r["run"], r["action"], r["old"], r["new"]) for r in rows] == [
+        ("r1", "convert", "a.png", "a.jpg"),
+        ("r1", "rename", "a.jpg", "ABC-00.jpg"),
+        ("r2", "rename", "b.jpg", "ABC-01.jpg"),
+    ]
+    assert rows[0]["bytes_in"] == 10 and rows[0]["ms"] == 1.235
+    assert rows[1]["seq"] == 0 and rows[1]["view"] == "PHCFH"
+    assert rows[2]["seq"] is None and rows[2]["bytes_in"] is None
+    if suffix == ".csv":
+        assert path.read_text(encoding="utf-8").count("run,ts,action") == 1  # intestazione una volta
+
+
+def test_rows_buffered_until_threshold(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    sink = AuditSink(path, flush_bytes=10 ** 6, flush_s=3600)
+    sink.record("rename", tmp_path, "a", "b")
+    assert path.read_text(encoding="utf-8") == ""
+    sink.flush_bytes = 1
+    sink.record("rename", tmp_path, "c", "d")
+    assert len(list(read_audit(path))) == 2
+    sink.close()
+    sink.close()  # idempotente
+
+
+def test_truncated_jsonl_line_skipped(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditSink(path) as sink:
+        sink.record("rename", tmp_path, "a", "b")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"run": "x", "act')
+    assert [r["old"] for r in read_audit(path)] == ["a"]
+
+
+def test_deferred_rows_written_on_release(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditSink(path, flush_bytes=1) as sink:
+        deferred = DeferredAudit(sink)
+        deferred.record("publish", tmp_path, "a.jpg", "out/A-00.jpg", "A")
+        assert sink.rows == 0
+        deferred.release()
+        deferred.release()
+    assert [r["action"] for r in read_audit(path)] == ["publish"]
+
+
+def test_default_run_ids_are_distinct(tmp_path):
+    with AuditSink(tmp_path / "a.jsonl") as first, AuditSink(tmp_path / "b.jsonl") as second:
+        assert first.run_id != second.run_id
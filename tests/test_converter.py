@@ -0,0 +1,155 @@
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+import converter
+from converter import (
+    MemoryBudget, convert_file, estimate_memory, finalize_conversion, flatten_to_rgb,
+    is_derivative_name, is_passthrough_jpeg, master_pixel_limit, open_pool,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    """Limite anti decompression bomb minuscolo: 64x64 px sono già "troppi"."""
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    monkeypatch.setattr(converter, "MASTER_MAX_PIXELS", 100_000)
+
+
+def test_import_keeps_pillow_default():
+    # il default di Pillow (circa 89 MP) non viene alzato per chi importa converter
+    assert Image.MAX_IMAGE_PIXELS < converter.MASTER_MAX_PIXELS
+
+
+def test_pixel_limit_only_inside_block(tmp_path, image, small_limit):
+    src = image(tmp_path / "big.png", size=(64, 64))
+    with pytest.raises(Image.DecompressionBombError):
+        Image.open(src)
+
+    _, _, error = convert_file(str(src), str(tmp_path / "big.jpg"))
+    assert error is None
+    assert estimate_memory(src) == 64 * 64 * (3 + 3)
+    assert Image.MAX_IMAGE_PIXELS == 100
+
+
+def test_pixel_limit_overlapping_blocks(small_limit):
+    inside = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with master_pixel_limit():
+            inside.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    inside.wait(5)
+    with master_pixel_limit():
+        assert Image.MAX_IMAGE_PIXELS == 100_000
+    # il blocco dell'altro thread è ancora aperto
+    assert Image.MAX_IMAGE_PIXELS == 100_000
+    release.set()
+    worker.join()
+    assert Image.MAX_IMAGE_PIXELS == 100
+
+
+def test_pixel_limit_never_lowered(monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", None)
+    with master_pixel_limit():
+        assert Image.MAX_IMAGE_PIXELS is None
+    assert Image.MAX_IMAGE_PIXELS is None
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "P", "RGB", "LA"])
+def test_flatten_on_white(mode):
+    img = Image.new("RGBA", (8, 6), (0, 0, 0, 0))
+    if mode == "P":
+        img = img.convert("RGB").convert("P")
+        img.info["transparency"] = 0
+    elif mode != "RGBA":
+        img = img.convert(mode)
+    rgb = flatten_to_rgb(img)
+    assert rgb.mode == "RGB" and rgb.size == (8, 6)
+    expected = (0, 0, 0) if mode == "RGB" else (255, 255, 255)
+    assert rgb.getpixel((0, 0)) == expected
+
+
+def test_flatten_strips_match_single_pass(monkeypatch):
+    img = Image.new("RGBA", (40, 30), (10, 120, 200, 128))
+    whole = flatten_to_rgb(img)
+    monkeypatch.setattr(converter, "STRIP_MIN_PIXELS", 1)
+    monkeypatch.setattr(converter, "STRIP_BYTES", 40 * 4 * 7)
+    assert flatten_to_rgb(img).tobytes() == whole.tobytes()
+
+
+def test_convert_and_finalize(tmp_path, image):
+    src = image(tmp_path / "a.png", mode="RGBA")
+    dst = tmp_path / "a.jpg"
+    _, _, error = convert_file(str(src), str(dst))
+    assert finalize_conversion(src, dst, error, keep_dir=tmp_path / "orig") is None
+    assert not src.exists() and (tmp_path / "orig" / "a.png").exists()
+    assert is_passthrough_jpeg(dst)
+
+
+def test_failed_conversion_keeps_source(tmp_path):
+    src = tmp_path / "broken.png"
+    src.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 40)
+    dst = tmp_path / "broken.jpg"
+    _, _, error = convert_file(str(src), str(dst))
+    assert finalize_conversion(src, dst, error) is not None
+    assert src.exists() and not dst.exists()
+
+
+def test_budget_admits_oversized_job_alone():
+    budget = MemoryBudget(limit=100)
+    assert budget.try_acquire(500)          # nessun altro job: entra comunque
+    assert not budget.try_acquire(1)        # ma finché c'è, nient'altro
+    budget.release(500)
+    assert budget.try_acquire(60) and not budget.try_acquire(60)
+
+
+def test_pool_never_forks():
+    assert converter.pool_context().get_start_method() in ("forkserver", "spawn")
+    with open_pool(2) as pool:
+        assert pool.submit(converter.resolve_workers, 3).result() == 3
+
+
+def test_io_threads_with_pool_do_not_hang(tmp_path, image):
+    # thread di I/O dentro Image.open mentre il pool crea i worker, più un PNG rotto
+    for workers in (1, 2):
+        folder = tmp_path / str(workers)
+        folder.mkdir()
+        for i in range(24):
+            image(folder / f"ABC{i:03d}_front.png", (i * 10, 40, 40), "RGBA", size=(200, 150))
+        (folder / "ABC999_front.png").write_bytes(b"\x89PNG\r\n\x1a\n rotto")
+    script = textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {str(ROOT)!r})
+        from engine import run_profile
+        from profiles import ADIDAS
+        for workers in (1, 2):
+            summary = run_profile(ADIDAS, {str(tmp_path)!r} + "/" + str(workers), workers=workers,
+                                  io_threads=4)
+            print(summary["converted"], summary["errors"])
+    """)
+    done = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120)
+    assert done.returncode == 0, done.stderr
+    assert done.stdout.splitlines() == ["24 1", "24 1"]
+
+
+def test_derivative_names():
+    specs = {"2000": 2000, "thumb": 300}
+    assert is_derivative_name("ABC123-00@thumb.jpg", specs)
+    assert is_derivative_name("ABC123-00@2000.JPG", specs)
+    # misura non configurata: derivato solo se il master è in cartella
+    assert not is_derivative_name("photo@2x.jpg", specs)
+    assert is_derivative_name("ABC123-00@1000.jpg", specs, {"ABC123-00.jpg", "ABC123-00@1000.jpg"})
+    assert not is_derivative_name("ABC123-00@1000.jpg")
+    assert not is_derivative_name("ABC123-00.jpg", specs, {"ABC123-00.jpg"})
@@ -0,0 +1,57 @@
+from dedup import PARTIAL_BYTES, find_duplicates
+from engine import run_profile
+from manifest import file_hash
+from profiles import ADIDAS
+from scanner import scan_folder
+
+
+def entries(folder):
+    return scan_folder(folder).files()
+
+
+def test_exact_keeps_first_by_name(tmp_path):
+    for name, data in [("b.jpg", b"same"), ("a.jpg", b"same"), ("c.jpg", b"diff"), ("d.jpg", b"same")]:
+        (tmp_path / name).write_bytes(data)
+    assert find_duplicates(entries(tmp_path)) == {"b.jpg": ("a.jpg", "exact"), "d.jpg": ("a.jpg", "exact")}
+    assert find_duplicates(entries(tmp_path), mode="off") == {}
+
+
+def test_same_head_different_tail_is_not_duplicate(tmp_path):
+    head = b"x" * (PARTIAL_BYTES + 10)
+    (tmp_path / "a.jpg").write_bytes(head + b"1")
+    (tmp_path / "b.jpg").write_bytes(head + b"2")
+    (tmp_path / "c.jpg").write_bytes(head + b"1")
+    assert find_duplicates(entries(tmp_path), use_mmap=False) == {"c.jpg": ("a.jpg", "exact")}
+
+
+def test_reference_files_stay_original(tmp_path):
+    (tmp_path / "ABC-00.jpg").write_bytes(b"same")
+    (tmp_path / "abc_new.jpg").write_bytes(b"same")
+    scanned = scan_folder(tmp_path)
+    ref = scanned.get("ABC-00.jpg")
+    found = find_duplicates([scanned.get("abc_new.jpg")], reference=[(ref, file_hash(ref.path))])
+    assert found == {"abc_new.jpg": ("ABC-00.jpg", "exact")}
+
+
+def test_perceptual_same_frame_other_format(tmp_path, image):
+    image(tmp_path / "ABC123_front.png", (200, 40, 40), "RGBA", size=(64, 64))
+    image(tmp_path / "ABC123_front.jpg", (200, 40, 40), size=(64, 64))
+    image(tmp_path / "XYZ999_front.jpg", (90, 90, 90), size=(64, 64))  # altra chiave, stesso dHash
+    (tmp_path / "ABC123_broken.png").write_bytes(b"not a png")
+    key_of = lambda name: name[:6]  # noqa: E731
+    prefer = lambda e: (e.suffix != ".jpg", e.name)  # noqa: E731
+
+    assert find_duplicates(entries(tmp_path), key_of=key_of, prefer=prefer) == {}
+    found = find_duplicates(entries(tmp_path), mode="perceptual", key_of=key_of, prefer=prefer, workers=1)
+    assert found == {"ABC123_front.png": ("ABC123_front.jpg", "perceptual")}
+
+
+def test_run_profile_dedup_off_by_default(tmp_path, image, contents):
+    image(tmp_path / "ABC123_front.jpg", (200, 40, 40))
+    image(tmp_path / "ABC123_copy.jpg", (200, 40, 40))
+    summary = run_profile(ADIDAS, tmp_path, workers=1, dry_run=True)
+    assert summary.get("duplicates", 0) == 0
+
+    summary = run_profile(ADIDAS, tmp_path, workers=1, dedup="exact")
+    assert summary["duplicates"] == 1
+    assert set(contents(tmp_path)) == {"ABC123-00.jpg", "ABC123_front.jpg"}
@@ -0,0 +1,58 @@
+import pytest
+
+from engine import run_profile
+from profiles import ADIDAS
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_same_stem_sources_are_not_overwritten(tmp_path, image, contents, workers):
+    image(tmp_path / "ABC123_a.png", (200, 40, 40), "RGBA")
+    image(tmp_path / "ABC123_a.tif", (40, 200, 40))
+    image(tmp_path / "ABC123_b.jpg", (40, 40, 200))
+    logs = []
+
+    summary = run_profile(ADIDAS, tmp_path, log_callback=logs.append, workers=workers)
+
+    assert summary["converted"] == 1 and summary["skipped"] == 1 and summary["errors"] == 0
+    # la seconda sorgente con lo stesso nome resta dov'è, nessuna immagine persa
+    assert set(contents(tmp_path)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123_a.tif"}
+    assert any("Esiste già ABC123_a.jpg" in line for line in logs)
+
+
+def test_convert_all_to_jpg_keeps_legacy_report(tmp_path, image, contents):
+    import renamer_adidas
+
+    image(tmp_path / "ABC123_a.png", (200, 40, 40), "RGBA")
+    image(tmp_path / "ABC123_a.tif", (40, 200, 40))
+    image(tmp_path / "ABC123_b.jpeg", (40, 40, 200), fmt="JPEG")
+    (tmp_path / "ABC123_c.webp").write_bytes(b"rotto")
+    lines = []
+
+    summary = renamer_adidas.convert_all_to_jpg(tmp_path, workers=2, log_callback=lines.append)
+
+    assert (summary["converted"], summary["passthrough"], summary["skipped"], summary["errors"]) == (1, 1, 1, 1)
+    assert set(contents(tmp_path)) == {"ABC123_a.jpg", "ABC123_a.tif", "ABC123_b.jpg", "ABC123_c.webp"}
+    assert "🔄 Convertito ABC123_a.png → ABC123_a.jpg" in lines
+    assert "⚠️ Esiste già ABC123_a.jpg, salto conversione di ABC123_a.tif" in lines
+    assert any(line.startswith("❌ Errore convertendo ABC123_c.webp: ") for line in lines)
+
+    lines.clear()
+    renamer_adidas.rename_images(tmp_path, workers=1, log_callback=lines.append, use_manifest=False)
+    assert "📦 Trovati 1 codici diversi" in lines
+    assert "Renamed: ABC123_a.jpg → ABC123-00.jpg" in lines
+
+
+def test_only_real_derivatives_are_left_out(tmp_path, image, contents):
+    image(tmp_path / "ABC123_front.jpg", (200, 40, 40))
+    image(tmp_path / "ABC123_detail@2x.jpg", (40, 200, 40))
+    logs = []
+    run_profile(ADIDAS, tmp_path, workers=1, derivatives={"thumb": 16})
+    assert set(contents(tmp_path)) == {"ABC123-00.jpg", "ABC123-00@thumb.jpg",
+                                       "ABC123-01.jpg", "ABC123-01@thumb.jpg"}
+
+    # run successivo senza derivati: quelli già scritti restano fuori, con una riga di log
+    image(tmp_path / "ABC123_side.jpg", (40, 40, 200))
+    run_profile(ADIDAS, tmp_path, log_callback=logs.append, workers=1)
+    assert "ABC123-02.jpg" in contents(tmp_path)
+    assert {"ABC123-00@thumb.jpg", "ABC123-01@thumb.jpg"} <= set(contents(tmp_path))
+    assert any(line.startswith("[INFO] Derivati esclusi dalla rinomina: 2") for line in logs)
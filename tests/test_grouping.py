@@ -0,0 +1,37 @@
+from grouping import GroupRecord, StreamGrouper
+
+
+def records():
+    # chiavi e sequenze in ordine sparso, una conversione per K2
+    data = [("K2", "b", 3), ("K1", "x", 2), ("K2", "a", 1), ("K3", "z", 1), ("K1", "y", 1), ("K2", "c", 2)]
+    return [GroupRecord(k, n, "PHCFH", s, convert=(n == "c")) for k, n, s in data]
+
+
+def grouped(chunk_size):
+    grouper = StreamGrouper(order=lambda r: r.seq, chunk_size=chunk_size)
+    for r in records():
+        grouper.add(r, variant="asset")
+    spilled = grouper.spilled
+    return grouper, spilled, [(key, [r.name for r in recs]) for key, recs in grouper.groups()]
+
+
+def test_groups_sorted_in_memory():
+    _, spilled, groups = grouped(chunk_size=100)
+    assert spilled == 0
+    assert groups == [("K1", ["y", "x"]), ("K2", ["a", "c", "b"]), ("K3", ["z"])]
+
+
+def test_spilled_runs_give_same_groups():
+    grouper, spilled, groups = grouped(chunk_size=2)
+    assert spilled == 3
+    assert groups == grouped(chunk_size=100)[2]
+    assert grouper.spilled == 0  # file temporanei chiusi
+
+
+def test_stats_collected_while_adding():
+    grouper, _, _ = grouped(chunk_size=100)
+    stats = grouper.stats
+    assert (stats.files, stats.convert, stats.keys) == (6, 1, 3)
+    assert stats.convert_per_key == {"K2": 1}
+    assert stats.variants == {"asset": 6}
+    assert stats.largest() == ("K2", 3)
@@ -0,0 +1,77 @@
+import os
+
+from engine import run_profile
+from manifest import MANIFEST_NAME, Manifest, file_hash
+from profiles import ADIDAS
+from scanner import scan_folder
+
+
+def _entry(folder, name):
+    return scan_folder(folder).get(name)
+
+
+def test_record_and_check(tmp_path, touch):
+    touch(tmp_path, "ABC123-00.jpg")
+    manifest = Manifest(tmp_path)
+    manifest.record(tmp_path / "ABC123-00.jpg", "abc123_front.png", "ABC123", 0)
+    manifest.save()
+
+    manifest = Manifest(tmp_path)
+    assert manifest.check(_entry(tmp_path, "ABC123-00.jpg")) == "unchanged"
+    assert manifest.next_index("ABC123") == 1
+    assert manifest.next_index("XYZ999") == 0
+    assert manifest.check(_entry(tmp_path, MANIFEST_NAME)) is None
+
+
+def test_touch_without_changes_is_unchanged(tmp_path, touch):
+    touch(tmp_path, "ABC123-00.jpg")
+    manifest = Manifest(tmp_path)
+    manifest.record(tmp_path / "ABC123-00.jpg", "src.png", "ABC123", 0)
+    st = os.stat(tmp_path / "ABC123-00.jpg")
+    os.utime(tmp_path / "ABC123-00.jpg", ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    # stesso contenuto, mtime diverso: decide l'hash
+    assert manifest.check(_entry(tmp_path, "ABC123-00.jpg")) == "unchanged"
+
+
+def test_prune_and_compaction(tmp_path, touch):
+    touch(tmp_path, "A-00.jpg", "A-01.jpg")
+    manifest = Manifest(tmp_path)
+    for i, name in enumerate(("A-00.jpg", "A-01.jpg")):
+        manifest.record(tmp_path / name, name, "A", i)
+    manifest.save()
+    manifest.prune({"A-01.jpg"})
+    manifest.save()
+    assert set(Manifest(tmp_path).records) == {"A-01.jpg"}
+
+
+def test_edited_file_between_runs(tmp_path, image):
+    image(tmp_path / "ABC123_front.png", (200, 40, 40), "RGBA")
+    image(tmp_path / "ABC123_back.jpg", (40, 200, 40))
+    first = run_profile(ADIDAS, tmp_path, use_manifest=True, workers=1)
+    assert first["converted"] == 1 and first["updated"] == 0
+    names = sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith("."))
+    assert names == ["ABC123-00.jpg", "ABC123-01.jpg"]
+
+    # il fotografo sostituisce un master già rinominato
+    edited = tmp_path / "ABC123-01.jpg"
+    image(edited, (10, 10, 250), size=(40, 30))
+    audit = tmp_path.parent / f"{tmp_path.name}-audit.jsonl"
+    second = run_profile(ADIDAS, tmp_path, use_manifest=True, workers=1, audit=audit)
+
+    assert second["updated"] == 1 and second["unchanged"] == 1
+    assert second["converted"] == 0 and second["renamed"] == 0
+    # nome e indice restano quelli di prima, il record segue il contenuto nuovo
+    names = sorted(p.name for p in tmp_path.iterdir() if not p.name.startswith("."))
+    assert names == ["ABC123-00.jpg", "ABC123-01.jpg"]
+    record = Manifest(tmp_path).records["ABC123-01.jpg"]
+    assert record["hash"] == file_hash(edited) and record["index"] == 1
+    assert '"action": "update"' in audit.read_text(encoding="utf-8")
+
+    third = run_profile(ADIDAS, tmp_path, use_manifest=True, workers=1)
+    assert third["updated"] == 0 and third["unchanged"] == 2
+
+
+def test_manifest_off_by_default(tmp_path, image):
+    image(tmp_path / "ABC123_front.png", (200, 40, 40), "RGBA")
+    run_profile(ADIDAS, tmp_path, workers=1)
+    assert not (tmp_path / MANIFEST_NAME).exists()
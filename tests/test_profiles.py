@@ -0,0 +1,128 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from grouping import GroupRecord
+from profiles import ADIDAS, NEW_BALANCE, NIKE, VIEW_ORDER, BrandProfile, get_profile, parse_filename
+
+
+def legacy_parse_filename(path: Path):
+    """parse_filename originale (loop sui caratteri), riferimento per il parser a regex."""
+    name = path.stem
+    parts = name.split("_")
+    if len(parts) < 3:
+        return None
+
+    article_code = parts[1]
+    ph_part = parts[2]
+
+    if not article_code or not ph_part.startswith("PH"):
+        return None
+
+    view_code = ph_part[:5]
+    rest = ph_part[5:]
+
+    seq_digits = ""
+    for ch in rest:
+        if ch.isdigit():
+            seq_digits += ch
+        elif ch == "-":
+            break
+
+    seq_num = int(seq_digits) if seq_digits.isdigit() else 0
+    return article_code, view_code, seq_num
+
+
+EDGE_NAMES = [
+    "AURORA_415445-101_PHCFH001-2000.png",
+    "AURORA_415445-101_PHCFH001.jpg",
+    "AURORA_415445-101_PHCFH001_2000.png",
+    "AURORA_415445-101_PHCFH1a2-3.png",
+    "AURORA_415445-101_PHCFH-001.png",
+    "AURORA_415445-101_PHCFH.png",
+    "AURORA_415445-101_PH.png",
+    "AURORA_415445-101_PHX.png",
+    "AURORA_415445-101_PHCFH001_extra_parts.png",
+    "AURORA_415445-101_phcfh001.png",
+    "AURORA__PHCFH001.png",
+    "_415445-101_PHCFH001.png",
+    "AURORA_415445-101.png",
+    "IMG_1234.jpg",
+    "README",
+    "A_B_PHSYD999999-1-2.png",
+    "AURORA_415445-101_PHSUH00012-2000.jpeg",
+]
+
+
+def random_names(count, seed=0):
+    rnd = random.Random(seed)
+    views = list(VIEW_ORDER) + ["PHZZZ", "PHA"]
+    names = []
+    for _ in range(count):
+        article = f"{rnd.randrange(100000, 999999)}-{rnd.randrange(0, 999):03d}"
+        view = rnd.choice(views)
+        seq = rnd.choice(["", str(rnd.randrange(1, 20)), f"{rnd.randrange(1, 20):03d}", "1x2"])
+        size = rnd.choice(["", "-2000", "_2000", "-1-2"])
+        prefix = rnd.choice(["AURORA", "NIKE", "", "A-B"])
+        names.append(f"{prefix}_{article}_{view}{seq}{size}" + rnd.choice((".png", ".jpg")))
+    return names
+
+
+def mismatches(names):
+    """Nomi riconosciuti dal parser storico che il profilo NIKE legge in modo diverso."""
+    out = []
+    for name in names:
+        old = legacy_parse_filename(Path(name))
+        if old is None:
+            continue  # le varianti nuove possono riconoscere nomi che lo storico scartava
+        match = NIKE.identify(Path(name))
+        if match is not None and match[0] == "detail":
+            continue  # PHSYD_002 / PHSYD-002: la sequenza separata è voluta (vedi NIKE_PATTERNS)
+        if parse_filename(Path(name)) != old:
+            out.append((name, old, parse_filename(Path(name))))
+    return out
+
+
+@pytest.mark.parametrize("name", EDGE_NAMES)
+def test_parse_filename_matches_legacy(name):
+    assert mismatches([name]) == []
+
+
+def test_parse_filename_matches_legacy_random():
+    assert mismatches(random_names(5000)) == []
+
+
+def test_new_variants():
+    assert NIKE.identify(Path("AURORA_415445-101_PHSYD_002-2000.png")) == \
+        ("detail", "415445-101", "PHSYD", 2)
+    assert NIKE.identify(Path("415445-101_PHCFH001-2000.png")) == ("bare", "415445-101", "PHCFH", 1)
+    assert NIKE.identify(Path("AURORA_415445-101_PHCFH001-2000.png"))[0] == "asset"
+    assert NIKE.identify(Path("IMG_1234.png")) is None
+
+
+def test_classify_matches_identify():
+    names = EDGE_NAMES + random_names(500, seed=1)
+    assert NIKE.classify(names) == [NIKE.identify(Path(n)) for n in names]
+    assert NEW_BALANCE.classify(names) == [NEW_BALANCE.identify(Path(n)) for n in names]
+
+
+def test_adidas_and_new_balance_keys():
+    assert ADIDAS.parse(Path("GX1234_front.png"))[0] == "GX1234"
+    assert NEW_BALANCE.parse(Path("m990gl6_side.png"))[0] == "M990GL6"
+    assert ADIDAS.output_name("GX1234", 3) == "GX1234-03.jpg"
+
+
+def test_sort_key_uses_view_order():
+    records = [GroupRecord("K", n, v, s) for n, v, s in
+               [("c", "PHSYD", 1), ("a", "PHCBH", 2), ("b", "PHCFH", 5), ("d", "PHCBH", 1)]]
+    assert [r.name for r in sorted(records, key=NIKE.sort_key)] == ["b", "d", "a", "c"]
+
+
+def test_profile_validation():
+    with pytest.raises(ValueError):
+        BrandProfile("x")
+    with pytest.raises(ValueError):
+        BrandProfile("x", pattern=[("v", r"(?P<view>PH)")])
+    with pytest.raises(ValueError):
+        get_profile("puma")
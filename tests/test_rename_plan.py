@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+import rename_plan
+from rename_plan import INTENT_NAME, apply_plan, build_plan, recover_intents
+
+
+def _plan(folder, moves):
+    existing = {p.name for p in folder.iterdir()}
+    return build_plan(folder, [(folder / src, dst) for src, dst in moves], existing)
+
+
+def test_simple_moves(tmp_path, touch, contents):
+    touch(tmp_path, "a.jpg", "b.jpg")
+    plan = _plan(tmp_path, [("a.jpg", "X-00.jpg"), ("b.jpg", "X-01.jpg")])
+    assert plan.cycles == 0 and not plan.collisions
+    apply_plan(plan)
+    assert contents(tmp_path) == {"X-00.jpg": b"a.jpg", "X-01.jpg": b"b.jpg"}
+
+
+def test_swap_and_chain(tmp_path, touch, contents):
+    touch(tmp_path, "a.jpg", "b.jpg", "c.jpg", "d.jpg")
+    # a ↔ b (ciclo), c → d → e (catena)
+    plan = _plan(tmp_path, [("a.jpg", "b.jpg"), ("b.jpg", "a.jpg"), ("c.jpg", "d.jpg"),
+                            ("d.jpg", "e.jpg")])
+    assert plan.cycles == 1
+    apply_plan(plan, intents=True)
+    assert contents(tmp_path) == {"a.jpg": b"b.jpg", "b.jpg": b"a.jpg", "d.jpg": b"c.jpg",
+                                  "e.jpg": b"d.jpg"}
+    assert not (tmp_path / INTENT_NAME).exists()
+
+
+def test_collisions(tmp_path, touch):
+    touch(tmp_path, "a.jpg", "b.jpg", "taken.jpg")
+    plan = _plan(tmp_path, [("a.jpg", "taken.jpg"), ("b.jpg", "new.jpg"), ("c.jpg", "new.jpg")])
+    reasons = {src.name: reason for src, _, reason in plan.collisions}
+    assert reasons == {"a.jpg": "esiste già", "c.jpg": "destinazione duplicata"}
+    assert [(s.name, d.name) for s, d in plan.moves] == [("b.jpg", "new.jpg")]
+
+
+def test_external_plan_moves_everything(tmp_path, touch):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    out = tmp_path / "out"
+    plan = build_plan(out, [(src_dir / "a.jpg", "a.jpg"), (src_dir / "b.jpg", "taken.jpg")],
+                      {"taken.jpg"}, external=True)
+    assert [(s.name, d) for s, d in plan.moves] == [("a.jpg", out / "a.jpg")]
+    assert plan.cycles == 0 and len(plan.collisions) == 1
+
+
+def test_failed_rename_is_undone(tmp_path, touch, contents, monkeypatch):
+    touch(tmp_path, "a.jpg", "b.jpg", "c.jpg")
+    before = contents(tmp_path)
+    plan = _plan(tmp_path, [("a.jpg", "b.jpg"), ("b.jpg", "a.jpg"), ("c.jpg", "d.jpg")])
+    real_rename = os.rename
+    calls = []
+
+    def flaky(src, dst):
+        calls.append(src)
+        if len(calls) == 4:
+            raise PermissionError("share non disponibile")
+        real_rename(src, dst)
+
+    monkeypatch.setattr(rename_plan.os, "rename", flaky)
+    with pytest.raises(PermissionError):
+        apply_plan(plan, intents=True)
+    monkeypatch.setattr(rename_plan.os, "rename", real_rename)
+    assert contents(tmp_path) == before
+    assert not (tmp_path / INTENT_NAME).exists()
+
+
+def test_failed_undo_keeps_intents(tmp_path, touch, contents, monkeypatch):
+    touch(tmp_path, "a.jpg", "b.jpg", "c.jpg")
+    before = contents(tmp_path)
+    plan = _plan(tmp_path, [("a.jpg", "b.jpg"), ("b.jpg", "a.jpg"), ("c.jpg", "d.jpg")])
+    real_rename = os.rename
+    calls = []
+
+    def flaky(src, dst):
+        calls.append(src)
+        # 4: la seconda passata fallisce, 6: fallisce anche un rename dell'annullamento
+        if len(calls) in (4, 6):
+            raise PermissionError("share non disponibile")
+        real_rename(src, dst)
+
+    monkeypatch.setattr(rename_plan.os, "rename", flaky)
+    with pytest.raises(PermissionError):
+        apply_plan(plan, intents=True)
+    monkeypatch.undo()
+    # un file è rimasto sul nome temporaneo: l'intent serve a recuperarlo
+    assert (tmp_path / INTENT_NAME).exists()
+    assert any(n.startswith(rename_plan.TEMP_PREFIX) for n in os.listdir(tmp_path))
+
+    assert recover_intents(tmp_path) == 1
+    assert contents(tmp_path) == before
+    assert not (tmp_path / INTENT_NAME).exists()
+
+
+def test_recover_intents_after_interruption(tmp_path, touch, contents, monkeypatch):
+    touch(tmp_path, "a.jpg", "b.jpg", "c.jpg")
+    plan = _plan(tmp_path, [("a.jpg", "b.jpg"), ("b.jpg", "a.jpg"), ("c.jpg", "d.jpg")])
+    real_rename = os.rename
+    calls = []
+
+    def crash(src, dst):
+        calls.append(src)
+        if len(calls) == 4:
+            # processo ucciso a metà della seconda passata
+            raise KeyboardInterrupt
+        real_rename(src, dst)
+
+    monkeypatch.setattr(rename_plan.os, "rename", crash)
+    with pytest.raises(KeyboardInterrupt):
+        apply_plan(plan, intents=True)
+    monkeypatch.undo()
+    assert (tmp_path / INTENT_NAME).exists()
+    assert any(n.startswith(rename_plan.TEMP_PREFIX) for n in os.listdir(tmp_path))
+
+    # il ciclo viene completato; c → d non era ancora partito e resta com'era
+    assert recover_intents(tmp_path) == 1
+    assert contents(tmp_path) == {"a.jpg": b"b.jpg", "b.jpg": b"a.jpg", "c.jpg": b"c.jpg"}
+    assert not (tmp_path / INTENT_NAME).exists()
+    assert recover_intents(tmp_path) == 0
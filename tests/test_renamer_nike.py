@@ -0,0 +1,27 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_does_not_load_pil():
+    # la finestra deve comparire prima di PIL, nike_logic e del pool di processi
+    code = ("import sys; sys.path.insert(0, %r); import renamer_nike; "
+            "print(sorted(m for m in ('PIL', 'nike_logic', 'converter') if m in sys.modules))" % str(ROOT))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_chrome_images_match_placeholders():
+    import renamer_nike
+
+    for key, (width, height, kwargs) in renamer_nike.CHROME.items():
+        assert renamer_nike.create_round_rect_image(width, height, **kwargs).size == (width, height)
+
+
+def test_legacy_names_still_exported():
+    import renamer_nike
+
+    assert callable(renamer_nike.rename_nike_images)
+    assert renamer_nike.parse_filename(Path("AURORA_415445-101_PHCFH001-2000.png")) == ("415445-101", "PHCFH", 1)
@@ -0,0 +1,82 @@
+from audit import read_audit
+from engine import run_profile
+from profiles import ADIDAS
+from rollback import rollback_run
+
+
+def test_round_trip_restores_folder(tmp_path, shoot, contents):
+    folder = tmp_path / "shoot"
+    folder.mkdir()
+    shoot(folder)
+    before = contents(folder)
+    audit = tmp_path / "audit.csv"
+
+    summary = run_profile(ADIDAS, folder, workers=1, audit=audit, keep_originals=True)
+    assert summary["converted"] == 2
+    assert set(contents(folder)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123-02.jpg", "XYZ999-00.jpg"}
+
+    # il dry-run non tocca niente
+    rollback_run(audit, dry_run=True)
+    assert set(contents(folder)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123-02.jpg", "XYZ999-00.jpg"}
+
+    (result,) = rollback_run(audit)
+    assert result["unconverted"] == 2 and result["irreversible"] == 0
+    assert contents(folder) == before
+    assert not (folder / ".renamer_originals").exists()
+
+    # rilanciato non trova più niente da fare
+    (again,) = rollback_run(audit)
+    assert again["restored"] == 0 and again["unconverted"] == 0
+    assert contents(folder) == before
+
+    # il manifest non ricorda più i nomi finali: il run successivo rielabora tutto
+    rerun = run_profile(ADIDAS, folder, workers=1)
+    assert rerun["converted"] == 2 and rerun["unchanged"] == 0
+
+
+def test_conversions_without_originals_are_irreversible(tmp_path, shoot, contents):
+    folder = tmp_path / "shoot"
+    folder.mkdir()
+    shoot(folder)
+    audit = tmp_path / "audit.jsonl"
+    run_profile(ADIDAS, folder, workers=1, audit=audit)
+
+    (result,) = rollback_run(audit)
+    assert result["irreversible"] == 2
+    # le rinomine tornano indietro, i convertiti restano JPG col nome del sorgente
+    assert set(contents(folder)) == {
+        "ABC123_front.jpg", "ABC123_back.jpg", "ABC123_side.jpg", "XYZ999_front.jpg",
+    }
+
+
+def test_only_last_run_is_undone(tmp_path, image, contents):
+    folder = tmp_path / "shoot"
+    folder.mkdir()
+    image(folder / "ABC123_back.jpg", (40, 200, 40))
+    audit = tmp_path / "audit.jsonl"
+    run_profile(ADIDAS, folder, workers=1, audit=audit)
+    image(folder / "ABC123_side.jpg", (40, 40, 200))
+    run_profile(ADIDAS, folder, workers=1, audit=audit)
+    assert set(contents(folder)) == {"ABC123-00.jpg", "ABC123-01.jpg"}
+
+    first_run = next(read_audit(audit))["run"]
+    rollback_run(audit)
+    assert set(contents(folder)) == {"ABC123-00.jpg", "ABC123_side.jpg"}
+    rollback_run(audit, run=first_run)
+    assert set(contents(folder)) == {"ABC123_back.jpg", "ABC123_side.jpg"}
+
+
+def test_output_dir_publish_rolled_back(tmp_path, shoot, contents):
+    folder = tmp_path / "shoot"
+    output = tmp_path / "web"
+    folder.mkdir()
+    shoot(folder)
+    before = contents(folder)
+    audit = tmp_path / "audit.jsonl"
+
+    run_profile(ADIDAS, folder, workers=1, audit=audit, keep_originals=True, output_dir=output)
+    assert set(contents(output)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123-02.jpg", "XYZ999-00.jpg"}
+
+    rollback_run(audit)
+    assert contents(folder) == before
+    assert contents(output) == {}
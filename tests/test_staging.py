@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+import staging
+
+from engine import run_profile
+from profiles import ADIDAS
+from staging import CONVERTED_DIR, JOURNAL_NAME, STAGING_PREFIX, Stage, recover_staging, sync_files
+
+
+def dead_pid():
+    """pid di un processo appena terminato."""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def area_of(folder, pid, host=None):
+    area = folder / f"{STAGING_PREFIX}{host or socket.gethostname()}-{pid}"
+    (area / CONVERTED_DIR).mkdir(parents=True)
+    return area
+
+
+def hidden(folder):
+    return sorted(p.name for p in folder.iterdir() if p.name.startswith(STAGING_PREFIX))
+
+
+def test_staged_run_matches_in_place(tmp_path, shoot, contents):
+    in_place, staged = tmp_path / "a", tmp_path / "b"
+    for folder in (in_place, staged):
+        folder.mkdir()
+        shoot(folder)
+    run_profile(ADIDAS, in_place, workers=1)
+    summary = run_profile(ADIDAS, staged, workers=1, staged=True)
+
+    assert summary["converted"] == 2
+    assert contents(staged) == contents(in_place)
+    assert hidden(staged) == []
+
+
+def test_output_dir_leaves_source_folder(tmp_path, shoot, contents):
+    folder, output = tmp_path / "shoot", tmp_path / "web"
+    folder.mkdir()
+    shoot(folder)
+    run_profile(ADIDAS, folder, workers=1, output_dir=output)
+
+    assert set(contents(output)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123-02.jpg", "XYZ999-00.jpg"}
+    assert contents(folder) == {}
+    assert hidden(output) == []
+
+
+def test_recover_without_journal_discards_area(tmp_path, touch, contents):
+    touch(tmp_path, "a.jpg")
+    stage = Stage(tmp_path)
+    (stage.converted_dir / "b.jpg").write_bytes(b"half")
+    os.link(tmp_path / "a.jpg", stage.dir / "ABC-00.jpg")
+
+    assert recover_staging(tmp_path) == (0, 1)
+    assert contents(tmp_path) == {"a.jpg": b"a.jpg"}
+    assert hidden(tmp_path) == []
+
+
+def test_recover_with_journal_completes_publish(tmp_path, touch, contents):
+    touch(tmp_path, "a.jpg", "b.png", "c.jpg")
+    keep = tmp_path / ".kept"
+    area = area_of(tmp_path, dead_pid())
+    (area / "ABC-00.jpg").write_bytes(b"converted b")
+    os.link(tmp_path / "a.jpg", area / "ABC-01.jpg")
+    # interrotto a metà: ABC-02.jpg (da c.jpg) era già stato pubblicato
+    os.link(tmp_path / "c.jpg", tmp_path / "ABC-02.jpg")
+    journal = {
+        "names": ["ABC-00.jpg", "ABC-01.jpg", "ABC-02.jpg"],
+        "dispose": [[str(tmp_path / "b.png"), str(keep)], [str(tmp_path / "a.jpg"), None],
+                    [str(tmp_path / "c.jpg"), None]],
+    }
+    (area / JOURNAL_NAME).write_text(json.dumps(journal), encoding="utf-8")
+
+    assert recover_staging(tmp_path) == (2, 0)
+    assert contents(tmp_path) == {"ABC-00.jpg": b"converted b", "ABC-01.jpg": b"a.jpg", "ABC-02.jpg": b"c.jpg"}
+    assert (keep / "b.png").read_bytes() == b"b.png"
+    assert hidden(tmp_path) == []
+    # ripetibile: niente da fare al secondo giro
+    assert recover_staging(tmp_path) == (0, 0)
+
+
+def test_interrupted_staged_run_resumed_by_next_run(tmp_path, shoot, contents, monkeypatch):
+    shoot(tmp_path)
+    before = contents(tmp_path)
+
+    def crash(self):
+        raise KeyboardInterrupt
+
+    # crash prima del journal: la cartella resta intatta, l'area viene scartata
+    monkeypatch.setattr(Stage, "publish", crash)
+    with pytest.raises(KeyboardInterrupt):
+        run_profile(ADIDAS, tmp_path, workers=1, staged=True)
+    assert contents(tmp_path) == before
+    assert len(hidden(tmp_path)) == 1
+
+    monkeypatch.undo()
+    summary = run_profile(ADIDAS, tmp_path, workers=1, staged=True)
+    assert summary["converted"] == 2
+    assert set(contents(tmp_path)) == {"ABC123-00.jpg", "ABC123-01.jpg", "ABC123-02.jpg", "XYZ999-00.jpg"}
+    assert hidden(tmp_path) == []
+
+
+def test_areas_of_running_processes_are_left_alone(tmp_path, touch):
+    touch(tmp_path, "a.jpg")
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        running = area_of(tmp_path, live.pid)
+        remote = area_of(tmp_path, dead_pid(), host="altro-host")
+        (running / JOURNAL_NAME).write_text('{"names": [], "dispose": []}', encoding="utf-8")
+        abandoned = area_of(tmp_path, dead_pid())
+        legacy = tmp_path / f"{STAGING_PREFIX}{dead_pid()}"
+        legacy.mkdir()
+
+        assert recover_staging(tmp_path) == (0, 2)
+        assert running.is_dir() and remote.is_dir()
+        assert not abandoned.exists() and not legacy.exists()
+    finally:
+        live.kill()
+        live.wait()
+
+
+def test_sync_files_never_syncs_the_whole_host(tmp_path, touch, monkeypatch):
+    names = [f"{i}.jpg" for i in range(staging.SYNC_POOL_MIN + 4)]
+    touch(tmp_path, *names)
+    synced = []
+    monkeypatch.setattr(staging.os, "sync", lambda: pytest.fail("sync() di sistema"), raising=False)
+    monkeypatch.setattr(staging, "_fsync_file", synced.append)
+    sync_files([tmp_path / n for n in names])
+    assert sorted(p.name for p in synced) == sorted(names)